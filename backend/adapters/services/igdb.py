@@ -1,9 +1,11 @@
 import asyncio
 import http
 import json
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from functools import partial
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Final
 
 import aiohttp
 import yarl
@@ -13,13 +15,45 @@ from unidecode import unidecode
 
 from adapters.services.igdb_types import Game
 from config import IGDB_CLIENT_ID
+from handler.redis_handler import async_cache
 from logger.logger import log
 from utils import get_version
+from utils.cache import cached_provider_response
 from utils.context import ctx_aiohttp_session
+from utils.rate_limit import (
+    ProviderRateLimitedException,
+    acquire_rate_limit,
+    backoff_rate_limit,
+)
 
 if TYPE_CHECKING:
     from handler.metadata.igdb_handler import TwitchAuth
 
+# Maximum number of queries in a single multiquery request
+MULTIQUERY_MAX_QUERIES: Final = 10
+# Time to wait for other queries before sending an incomplete batch
+MULTIQUERY_WINDOW_SECONDS: Final = 0.05
+MULTIQUERY_ENDPOINTS: Final = frozenset({"games", "search"})
+
+
+def build_query(
+    search_term: str | None = None,
+    fields: Sequence[str] | None = None,
+    where: str | None = None,
+    limit: int | None = None,
+) -> str:
+    """Build the body of an Apicalypse query."""
+    content = ""
+    if search_term:
+        content += f'search "{unidecode(search_term)}"; '
+    if fields:
+        content += f"fields {','.join(fields)}; "
+    if where:
+        content += f"where {where}; "
+    if limit is not None:
+        content += f"limit {limit}; "
+    return content.strip()
+
 
 class IGDBInvalidCredentialsException(Exception):
     """Exception raised when IGDB credentials are invalid."""
@@ -48,6 +82,95 @@ async def auth_middleware(
     return await handler(req)
 
 
+class IGDBMultiqueryBatcher:
+    """Collect the queries made concurrently, and send them as multiquery batches."""
+
+    def __init__(self, service: "IGDBService") -> None:
+        self.service = service
+        self.pending: list[tuple[str, str, asyncio.Future[list]]] = []
+        self.tasks: set[asyncio.Task] = set()
+
+    def _run_in_background(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def _take_pending(self) -> list[tuple[str, str, asyncio.Future[list]]]:
+        batch, self.pending = self.pending, []
+        return batch
+
+    async def request(self, endpoint: str, query: str) -> list:
+        future: asyncio.Future[list] = asyncio.get_running_loop().create_future()
+        self.pending.append((endpoint, query, future))
+
+        if len(self.pending) >= MULTIQUERY_MAX_QUERIES:
+            self._run_in_background(self._send(self._take_pending()))
+        elif len(self.pending) == 1:
+            self._run_in_background(self._send_later())
+
+        return await future
+
+    async def _send_later(self) -> None:
+        await asyncio.sleep(MULTIQUERY_WINDOW_SECONDS)
+        if self.pending:
+            await self._send(self._take_pending())
+
+    async def _send_alone(self, endpoint: str, query: str) -> list:
+        return await self.service._post(str(self.service.url.joinpath(endpoint)), query)
+
+    async def _send(self, batch: list[tuple[str, str, asyncio.Future[list]]]) -> None:
+        try:
+            if len(batch) == 1:
+                endpoint, query, _ = batch[0]
+                results = [await self._send_alone(endpoint, query)]
+            else:
+                batch_results = await self.service.multiquery(
+                    [(endpoint, query) for endpoint, query, _ in batch]
+                )
+                # A failed multiquery has no result for its queries, they're
+                # sent on their own instead of resolving to nothing
+                retried = iter(
+                    await asyncio.gather(
+                        *(
+                            self._send_alone(endpoint, query)
+                            for (endpoint, query, _), result in zip(
+                                batch, batch_results, strict=True
+                            )
+                            if result is None
+                        )
+                    )
+                )
+                results = [
+                    result if result is not None else next(retried)
+                    for result in batch_results
+                ]
+
+            for (_, _, future), result in zip(batch, results, strict=True):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            # Don't leave any query waiting if the batch was cancelled
+            for _, _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def flush(self) -> None:
+        """Send the pending queries, and wait for all the batches to be sent."""
+        if self.pending:
+            await self._send(self._take_pending())
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+ctx_igdb_multiquery: ContextVar[IGDBMultiqueryBatcher | None] = ContextVar(
+    "igdb_multiquery", default=None
+)
+
+
 class IGDBService:
     """Service to interact with the IGDB API.
 
@@ -63,6 +186,7 @@ class IGDBService:
         self.twitch_auth = twitch_auth
         self.auth_middleware = partial(auth_middleware, twitch_auth=self.twitch_auth)
 
+    @cached_provider_response("igdb")
     async def _request(
         self,
         url: str,
@@ -72,18 +196,19 @@ class IGDBService:
         limit: int | None = None,
         request_timeout: int = 120,
     ) -> list:
-        aiohttp_session = ctx_aiohttp_session.get()
+        content = build_query(
+            search_term=search_term, fields=fields, where=where, limit=limit
+        )
+
+        batcher = ctx_igdb_multiquery.get()
+        endpoint = yarl.URL(url).name
+        if batcher and batcher.service is self and endpoint in MULTIQUERY_ENDPOINTS:
+            return await batcher.request(endpoint, content)
 
-        content = ""
-        if search_term:
-            content += f'search "{unidecode(search_term)}"; '
-        if fields:
-            content += f"fields {','.join(fields)}; "
-        if where:
-            content += f"where {where}; "
-        if limit is not None:
-            content += f"limit {limit}; "
-        content = content.strip()
+        return await self._post(url, content, request_timeout)
+
+    async def _post(self, url: str, content: str, request_timeout: int = 120) -> list:
+        aiohttp_session = ctx_aiohttp_session.get()
 
         log.debug(
             "API request: URL=%s, Content=%s, Timeout=%s",
@@ -92,6 +217,10 @@ class IGDBService:
             request_timeout,
         )
 
+        if not await acquire_rate_limit(async_cache, "igdb"):
+            log.warning("IGDB rate limit reached, skipping request to URL=%s", url)
+            raise ProviderRateLimitedException("igdb")
+
         try:
             res = await aiohttp_session.post(
                 url,
@@ -123,8 +252,11 @@ class IGDBService:
                 log.info("Twitch token invalid: fetching a new one...")
                 await self.twitch_auth._update_twitch_token()
             elif exc.status == http.HTTPStatus.TOO_MANY_REQUESTS:
-                # Retry after 2 seconds if rate limit hit
-                await asyncio.sleep(2)
+                # Retry once the rate limit allows it
+                await backoff_rate_limit(async_cache, "igdb", exc.headers)
+            elif exc.status >= http.HTTPStatus.INTERNAL_SERVER_ERROR:
+                # Retry the request once if the server fails
+                log.debug("Request to URL=%s failed. Retrying...", url)
             else:
                 # Log the error and return an empty list if the request fails with a different code
                 log.error(exc)
@@ -134,6 +266,10 @@ class IGDBService:
             return []
 
         # Retry the request once if it times out
+        if not await acquire_rate_limit(async_cache, "igdb"):
+            log.warning("IGDB rate limit reached, skipping request to URL=%s", url)
+            raise ProviderRateLimitedException("igdb")
+
         try:
             log.debug(
                 "API request: URL=%s, Content=%s, Timeout=%s",
@@ -151,18 +287,57 @@ class IGDBService:
             res.raise_for_status()
             return await res.json()
         except (aiohttp.ClientResponseError, aiohttp.ServerTimeoutError) as exc:
-            if (
-                isinstance(exc, aiohttp.ClientResponseError)
-                and exc.status == http.HTTPStatus.UNAUTHORIZED
-            ):
-                return []
+            if isinstance(exc, aiohttp.ClientResponseError):
+                if exc.status == http.HTTPStatus.UNAUTHORIZED:
+                    return []
+                if exc.status == http.HTTPStatus.TOO_MANY_REQUESTS:
+                    raise ProviderRateLimitedException("igdb") from exc
 
             log.error(exc)
+            if (
+                isinstance(exc, aiohttp.ServerTimeoutError)
+                or exc.status >= http.HTTPStatus.INTERNAL_SERVER_ERROR
+            ):
+                # Not an empty result, the request should be made again later
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="IGDB is unavailable, try again later",
+                ) from exc
             return []
         except json.JSONDecodeError as exc:
             log.error("Error decoding JSON response from IGDB: %s", exc)
             return []
 
+    async def multiquery(self, queries: Sequence[tuple[str, str]]) -> list[list | None]:
+        """Run up to 10 queries in a single request, returning their results in order.
+
+        Queries missing from the response, when the request failed, get None.
+
+        Reference: https://api-docs.igdb.com/#multi-query
+        """
+        url = self.url.joinpath("multiquery")
+        content = " ".join(
+            f'query {endpoint} "{index}" {{ {query} }};'
+            for index, (endpoint, query) in enumerate(queries)
+        )
+        response = await self._post(str(url), content)
+        results = {item.get("name"): item.get("result", []) for item in response}
+        return [results.get(str(index)) for index in range(len(queries))]
+
+    @asynccontextmanager
+    async def multiquery_batching(self) -> AsyncIterator[None]:
+        """Send the games and search queries made in this context as multiqueries.
+
+        Meant to wrap code identifying many games concurrently, like scans.
+        """
+        batcher = IGDBMultiqueryBatcher(self)
+        token = ctx_igdb_multiquery.set(batcher)
+        try:
+            yield
+        finally:
+            ctx_igdb_multiquery.reset(token)
+            await batcher.flush()
+
     async def list_games(
         self,
         *,
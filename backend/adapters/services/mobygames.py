@@ -1,4 +1,3 @@
-import asyncio
 import http
 import json
 from collections.abc import Collection
@@ -11,9 +10,16 @@ from fastapi import HTTPException, status
 
 from adapters.services.mobygames_types import MobyGame, MobyGameBrief, MobyOutputFormat
 from config import MOBYGAMES_API_KEY
+from handler.redis_handler import async_cache
 from logger.logger import log
 from utils import get_version
+from utils.cache import cached_provider_response
 from utils.context import ctx_aiohttp_session
+from utils.rate_limit import (
+    ProviderRateLimitedException,
+    acquire_rate_limit,
+    backoff_rate_limit,
+)
 
 
 async def auth_middleware(
@@ -36,6 +42,7 @@ class MobyGamesService:
     ) -> None:
         self.url = yarl.URL(base_url or "https://api.mobygames.com/v1")
 
+    @cached_provider_response("mobygames")
     async def _request(self, url: str, request_timeout: int = 120) -> dict:
         aiohttp_session = ctx_aiohttp_session.get()
         log.debug(
@@ -44,6 +51,10 @@ class MobyGamesService:
             request_timeout,
         )
 
+        if not await acquire_rate_limit(async_cache, "mobygames"):
+            log.warning("MobyGames rate limit reached, skipping request to URL=%s", url)
+            raise ProviderRateLimitedException("mobygames")
+
         try:
             res = await aiohttp_session.get(
                 url,
@@ -68,8 +79,11 @@ class MobyGamesService:
                 log.error(exc)
                 return {}
             elif exc.status == http.HTTPStatus.TOO_MANY_REQUESTS:
-                # Retry after 2 seconds if rate limit hit
-                await asyncio.sleep(2)
+                # Retry once the rate limit allows it
+                await backoff_rate_limit(async_cache, "mobygames", exc.headers)
+            elif exc.status >= http.HTTPStatus.INTERNAL_SERVER_ERROR:
+                # Retry the request once if the server fails
+                log.debug("Request to URL=%s failed. Retrying...", url)
             else:
                 # Log the error and return an empty dict if the request fails with a different code
                 log.error(exc)
@@ -79,6 +93,10 @@ class MobyGamesService:
             return {}
 
         # Retry the request once if it times out
+        if not await acquire_rate_limit(async_cache, "mobygames"):
+            log.warning("MobyGames rate limit reached, skipping request to URL=%s", url)
+            raise ProviderRateLimitedException("mobygames")
+
         try:
             log.debug(
                 "API request: URL=%s, Timeout=%s",
@@ -94,13 +112,22 @@ class MobyGamesService:
             res.raise_for_status()
             return await res.json()
         except (aiohttp.ClientResponseError, aiohttp.ServerTimeoutError) as exc:
-            if (
-                isinstance(exc, aiohttp.ClientResponseError)
-                and exc.status == http.HTTPStatus.UNAUTHORIZED
-            ):
-                return {}
+            if isinstance(exc, aiohttp.ClientResponseError):
+                if exc.status == http.HTTPStatus.UNAUTHORIZED:
+                    return {}
+                if exc.status == http.HTTPStatus.TOO_MANY_REQUESTS:
+                    raise ProviderRateLimitedException("mobygames") from exc
 
             log.error(exc)
+            if (
+                isinstance(exc, aiohttp.ServerTimeoutError)
+                or exc.status >= http.HTTPStatus.INTERNAL_SERVER_ERROR
+            ):
+                # Not an empty result, the request should be made again later
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="MobyGames is unavailable, try again later",
+                ) from exc
             return {}
         except json.JSONDecodeError as exc:
             log.error("Error decoding JSON response from ScreenScraper: %s", exc)
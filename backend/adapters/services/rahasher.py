@@ -1,6 +1,8 @@
 import asyncio
 import re
+import weakref
 
+from config import SCAN_RAHASHER_WORKERS
 from handler.metadata.base_handler import UniversalPlatformSlug as UPS
 from logger.formatter import LIGHTMAGENTA
 from logger.formatter import highlight as hl
@@ -70,6 +72,21 @@ PLATFORM_SLUG_TO_RETROACHIEVEMENTS_ID: dict[UPS, int] = {
 }
 
 
+# RAHasher reads whole ROMs, so only a few processes run at once, per event loop
+_rahasher_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
+
+def _get_rahasher_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _rahasher_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(SCAN_RAHASHER_WORKERS)
+        _rahasher_semaphores[loop] = semaphore
+    return semaphore
+
+
 class RAHasherError(Exception): ...
 
 
@@ -77,6 +94,10 @@ class RAHasherService:
     """Service to calculate RetroAchievements hashes using RAHasher."""
 
     async def calculate_hash(self, platform_id: int, file_path: str) -> str:
+        async with _get_rahasher_semaphore():
+            return await self._calculate_hash(platform_id, file_path)
+
+    async def _calculate_hash(self, platform_id: int, file_path: str) -> str:
         from handler.metadata.ra_handler import RA_ID_TO_SLUG
 
         log.debug(
@@ -1,7 +1,7 @@
-import asyncio
 import base64
 import http
 import json
+from datetime import UTC, datetime, timedelta
 from typing import Final, cast
 
 import aiohttp
@@ -11,13 +11,35 @@ from fastapi import HTTPException, status
 
 from adapters.services.screenscraper_types import SSGame
 from config import SCREENSCRAPER_PASSWORD, SCREENSCRAPER_USER
+from handler.redis_handler import async_cache
 from logger.logger import log
 from utils import get_version
+from utils.cache import cached_provider_response
 from utils.context import ctx_aiohttp_session
+from utils.rate_limit import (
+    ProviderRateLimitedException,
+    RateLimit,
+    acquire_rate_limit,
+    backoff_rate_limit,
+    block_rate_limit,
+    get_rate_limit,
+    set_rate_limit,
+)
 
 SS_DEV_ID: Final = base64.b64decode("enVyZGkxNQ==").decode()
 SS_DEV_PASSWORD: Final = base64.b64decode("eFRKd29PRmpPUUc=").decode()
 LOGIN_ERROR_CHECK: Final = "Erreur de login"
+# Returned once the daily requests quota of the account is exhausted
+QUOTA_EXCEEDED_STATUS: Final = 430
+
+
+def seconds_until_quota_reset() -> float:
+    """Seconds until the daily requests quota is reset, at midnight UTC."""
+    now = datetime.now(UTC)
+    reset_at = (now + timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return (reset_at - now).total_seconds()
 
 
 async def auth_middleware(
@@ -49,6 +71,39 @@ class ScreenScraperService:
     ) -> None:
         self.url = yarl.URL(base_url or "https://api.screenscraper.fr/api2")
 
+    async def _update_rate_limit(self, response: dict) -> None:
+        """Apply the thread and quota limits of the user account to the rate limiter.
+
+        Reference: https://api.screenscraper.fr/webapi2.php#ssuserInfos
+        """
+        ssuser = (response.get("response") or {}).get("ssuser") or {}
+        try:
+            max_requests_per_min = int(ssuser["maxrequestspermin"])
+            max_threads = int(ssuser["maxthreads"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        rate_limit = RateLimit(
+            requests=max(max_requests_per_min, 1),
+            period=60,
+            burst=max(max_threads, 1),
+        )
+        if await get_rate_limit(async_cache, "screenscraper") != rate_limit:
+            await set_rate_limit(async_cache, "screenscraper", rate_limit)
+
+        try:
+            requests_today = int(ssuser["requeststoday"])
+            max_requests_per_day = int(ssuser["maxrequestsperday"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        if max_requests_per_day and requests_today >= max_requests_per_day:
+            log.warning("ScreenScraper daily requests quota reached")
+            await block_rate_limit(
+                async_cache, "screenscraper", seconds_until_quota_reset()
+            )
+
+    @cached_provider_response("screenscraper")
     async def _request(self, url: str, request_timeout: int = 120) -> dict:
         aiohttp_session = ctx_aiohttp_session.get()
         log.debug(
@@ -56,6 +111,12 @@ class ScreenScraperService:
             url,
             request_timeout,
         )
+        if not await acquire_rate_limit(async_cache, "screenscraper"):
+            log.warning(
+                "ScreenScraper rate limit reached, skipping request to URL=%s", url
+            )
+            raise ProviderRateLimitedException("screenscraper")
+
         try:
             res = await aiohttp_session.get(
                 url,
@@ -71,7 +132,9 @@ class ScreenScraperService:
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid ScreenScraper credentials",
                 )
-            return await res.json()
+            data = await res.json()
+            await self._update_rate_limit(data)
+            return data
         except aiohttp.ServerTimeoutError:
             # Retry the request once if it times out
             pass
@@ -85,8 +148,17 @@ class ScreenScraperService:
             ) from exc
         except aiohttp.ClientResponseError as err:
             if err.status == http.HTTPStatus.TOO_MANY_REQUESTS:
-                # Retry after 2 seconds if rate limit hit
-                await asyncio.sleep(2)
+                # Retry once the rate limit allows it
+                await backoff_rate_limit(async_cache, "screenscraper", err.headers)
+            elif err.status == QUOTA_EXCEEDED_STATUS:
+                log.warning("ScreenScraper daily requests quota reached")
+                await block_rate_limit(
+                    async_cache, "screenscraper", seconds_until_quota_reset()
+                )
+                raise ProviderRateLimitedException("screenscraper") from err
+            elif err.status >= http.HTTPStatus.INTERNAL_SERVER_ERROR:
+                # Retry the request once if the server fails
+                log.debug("Request to URL=%s failed. Retrying...", url)
             else:
                 # Log the error and return an empty dict if the request fails with a different code
                 log.error(err)
@@ -95,6 +167,12 @@ class ScreenScraperService:
             log.error("Error decoding JSON response from ScreenScraper: %s", exc)
             return {}
 
+        if not await acquire_rate_limit(async_cache, "screenscraper"):
+            log.warning(
+                "ScreenScraper rate limit reached, skipping request to URL=%s", url
+            )
+            raise ProviderRateLimitedException("screenscraper")
+
         try:
             log.debug(
                 "API request: URL=%s, Timeout=%s",
@@ -115,15 +193,34 @@ class ScreenScraperService:
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid ScreenScraper credentials",
                 )
-            return await res.json()
+            data = await res.json()
+            await self._update_rate_limit(data)
+            return data
         except (aiohttp.ClientResponseError, aiohttp.ServerTimeoutError) as err:
-            if (
-                isinstance(err, aiohttp.ClientResponseError)
-                and err.status == http.HTTPStatus.UNAUTHORIZED
-            ):
-                return {}
+            if isinstance(err, aiohttp.ClientResponseError):
+                if err.status == http.HTTPStatus.UNAUTHORIZED:
+                    return {}
+                if err.status == QUOTA_EXCEEDED_STATUS:
+                    log.warning("ScreenScraper daily requests quota reached")
+                    await block_rate_limit(
+                        async_cache, "screenscraper", seconds_until_quota_reset()
+                    )
+                if err.status in (
+                    http.HTTPStatus.TOO_MANY_REQUESTS,
+                    QUOTA_EXCEEDED_STATUS,
+                ):
+                    raise ProviderRateLimitedException("screenscraper") from err
 
             log.error(err)
+            if (
+                isinstance(err, aiohttp.ServerTimeoutError)
+                or err.status >= http.HTTPStatus.INTERNAL_SERVER_ERROR
+            ):
+                # Not an empty result, the request should be made again later
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="ScreenScraper is unavailable, try again later",
+                ) from err
             return {}
         except json.JSONDecodeError as exc:
             log.error("Error decoding JSON response from ScreenScraper: %s", exc)
@@ -105,6 +105,48 @@ FLASHPOINT_API_ENABLED: Final = str_to_bool(
 # HOWLONGTOBEAT
 HLTB_API_ENABLED: Final = str_to_bool(os.environ.get("HLTB_API_ENABLED", "false"))
 
+# METADATA PROVIDERS CACHE
+PROVIDER_CACHE_ENABLED: Final = str_to_bool(
+    os.environ.get("PROVIDER_CACHE_ENABLED", "true")
+)
+PROVIDER_CACHE_TTL_HOURS: Final = max(
+    int(os.environ.get("PROVIDER_CACHE_TTL_HOURS", 24 * 7)), 1
+)  # 7 days
+PROVIDER_CACHE_MAX_ENTRIES: Final = max(
+    int(os.environ.get("PROVIDER_CACHE_MAX_ENTRIES", 10000)), 1
+)  # Per provider
+PROVIDER_CACHE_MAX_ENTRY_SIZE_KB: Final = max(
+    int(os.environ.get("PROVIDER_CACHE_MAX_ENTRY_SIZE_KB", 512)), 1
+)
+
+# METADATA PROVIDERS RATE LIMITS
+PROVIDER_RATE_LIMIT_ENABLED: Final = str_to_bool(
+    os.environ.get("PROVIDER_RATE_LIMIT_ENABLED", "true")
+)
+PROVIDER_RATE_LIMIT_MAX_WAIT_SECONDS: Final = max(
+    int(os.environ.get("PROVIDER_RATE_LIMIT_MAX_WAIT_SECONDS", 60)), 1
+)
+
+# METADATA PROVIDERS CIRCUIT BREAKER
+# Providers failing this many times in a row are skipped during scans for the
+# cool-down period, then probed with a heartbeat
+PROVIDER_CIRCUIT_BREAKER_THRESHOLD: Final = max(
+    int(os.environ.get("PROVIDER_CIRCUIT_BREAKER_THRESHOLD", 5)), 1
+)
+PROVIDER_CIRCUIT_BREAKER_COOLDOWN_SECONDS: Final = max(
+    int(os.environ.get("PROVIDER_CIRCUIT_BREAKER_COOLDOWN_SECONDS", 300)), 1
+)  # 5 minutes
+
+# METADATA PROVIDERS MISSES
+# Providers that found nothing for an unidentified ROM aren't queried again on
+# unidentified scans until the miss expires
+SCAN_MISS_CACHE_ENABLED: Final = str_to_bool(
+    os.environ.get("SCAN_MISS_CACHE_ENABLED", "true")
+)
+SCAN_MISS_CACHE_TTL_HOURS: Final = max(
+    int(os.environ.get("SCAN_MISS_CACHE_TTL_HOURS", 24 * 7)), 1
+)  # 7 days
+
 # AUTH
 ROMM_AUTH_SECRET_KEY: Final[str] = os.environ.get("ROMM_AUTH_SECRET_KEY", "")
 if not ROMM_AUTH_SECRET_KEY:
@@ -137,6 +179,26 @@ OIDC_TLS_CACERTFILE: Final = os.environ.get("OIDC_TLS_CACERTFILE", None)
 
 # SCANS
 SCAN_TIMEOUT: Final = int(os.environ.get("SCAN_TIMEOUT", 60 * 60 * 4))  # 4 hours
+SCAN_CONCURRENCY: Final = max(int(os.environ.get("SCAN_CONCURRENCY", 5)), 1)
+SCAN_HASHING_WORKERS: Final = max(
+    int(os.environ.get("SCAN_HASHING_WORKERS", os.cpu_count() or 1)), 1
+)
+SCAN_RAHASHER_WORKERS: Final = max(
+    int(os.environ.get("SCAN_RAHASHER_WORKERS", os.cpu_count() or 1)), 1
+)  # RAHasher processes running at once
+IMAGE_PROCESSING_WORKERS: Final = max(
+    int(os.environ.get("IMAGE_PROCESSING_WORKERS", os.cpu_count() or 1)), 1
+)  # Images resized and encoded at once
+SCAN_HASHING_CHUNK_SIZE_MB: Final = max(
+    float(os.environ.get("SCAN_HASHING_CHUNK_SIZE_MB", 1)), 0.0625
+)  # 1 MB, minimum of 64 KB
+SCAN_HASHING_USE_MMAP: Final = str_to_bool(
+    os.environ.get("SCAN_HASHING_USE_MMAP", "false")
+)
+SCAN_WRITE_BATCH_SIZE: Final = max(int(os.environ.get("SCAN_WRITE_BATCH_SIZE", 50)), 1)
+SCAN_WRITE_FLUSH_INTERVAL: Final = float(
+    os.environ.get("SCAN_WRITE_FLUSH_INTERVAL", 5)
+)  # 5 seconds
 
 # TASKS
 TASK_TIMEOUT: Final = int(os.environ.get("TASK_TIMEOUT", 60 * 5))  # 5 minutes
@@ -16,6 +16,7 @@ class ScanStats(TypedDict):
     identified_roms: int
     scanned_firmware: int
     added_firmware: int
+    unavailable_sources: list[str]
 
 
 class ScanTaskMeta(TypedDict):
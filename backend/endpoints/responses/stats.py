@@ -8,3 +8,4 @@ class StatsReturn(TypedDict):
     STATES: int
     SCREENSHOTS: int
     TOTAL_FILESIZE_BYTES: int
+    PROVIDER_CACHE: dict[str, int]  # Cache hits and misses, by provider
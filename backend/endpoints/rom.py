@@ -887,6 +887,7 @@ async def update_rom(
                 new_name=new_fs_name,
                 fs_path=rom.fs_path,
             )
+            await fs_rom_handler.remove_cached_hashes([rom.full_path])
         except RomAlreadyExistsException as exc:
             log.error(exc)
             raise HTTPException(
@@ -1081,6 +1082,7 @@ async def delete_roms(
                 f"Deleting {hl(str(rom.name or 'ROM'), color=BLUE)} [{hl(rom.fs_name)}] from database"
             )
             db_rom_handler.delete_rom(id)
+            await fs_rom_handler.remove_cached_hashes([rom.full_path])
 
             try:
                 await fs_resource_handler.remove_directory(rom.fs_resources_path)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import time
+from dataclasses import dataclass, field
 from itertools import batched
 from typing import Any, Final
 
@@ -8,7 +10,15 @@ import socketio  # type: ignore
 from rq import Worker
 from rq.job import Job
 
-from config import DEV_MODE, REDIS_URL, SCAN_TIMEOUT, TASK_RESULT_TTL
+from config import (
+    DEV_MODE,
+    REDIS_URL,
+    SCAN_CONCURRENCY,
+    SCAN_TIMEOUT,
+    SCAN_WRITE_BATCH_SIZE,
+    SCAN_WRITE_FLUSH_INTERVAL,
+    TASK_RESULT_TTL,
+)
 from endpoints.responses import TaskType
 from endpoints.responses.platform import PlatformSchema
 from endpoints.responses.rom import SimpleRomSchema
@@ -25,10 +35,12 @@ from handler.filesystem import (
     fs_resource_handler,
     fs_rom_handler,
 )
-from handler.filesystem.roms_handler import FSRom
+from handler.filesystem.roms_handler import FSRom, RomsInventory
+from handler.metadata import meta_igdb_handler
 from handler.redis_handler import high_prio_queue, redis_client
 from handler.scan_handler import (
     ScanType,
+    get_unavailable_sources,
     scan_firmware,
     scan_platform,
     scan_rom,
@@ -59,6 +71,8 @@ class ScanStats:
     identified_roms: int = 0
     scanned_firmware: int = 0
     added_firmware: int = 0
+    # Metadata sources skipped because their provider keeps failing
+    unavailable_sources: list[str] = field(default_factory=list)
 
     def update(self, **kwargs):
         for key, value in kwargs.items():
@@ -79,9 +93,76 @@ class ScanStats:
             "identified_roms": self.identified_roms,
             "scanned_firmware": self.scanned_firmware,
             "added_firmware": self.added_firmware,
+            "unavailable_sources": self.unavailable_sources,
         }
 
 
+class ScanWriteBuffer:
+    """Collect scan results and write them to the database in batches
+
+    Results are flushed in a single transaction every `batch_size` roms or
+    `flush_interval` seconds, and the scanned roms are then sent to the client.
+    """
+
+    def __init__(
+        self,
+        socket_manager: socketio.AsyncRedisManager,
+        batch_size: int = SCAN_WRITE_BATCH_SIZE,
+        flush_interval: float = SCAN_WRITE_FLUSH_INTERVAL,
+    ):
+        self.socket_manager = socket_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.roms: dict[int, Rom] = {}
+        self.rom_files: dict[int, list[RomFile]] = {}
+        self.rom_updates: dict[int, dict[str, Any]] = {}
+        self.last_flush = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.roms.keys() | self.rom_updates.keys())
+
+    async def add_rom(self, rom: Rom, rom_files: list[RomFile]) -> None:
+        self.roms[rom.id] = rom
+        self.rom_files[rom.id] = rom_files
+        await self._flush_if_needed()
+
+    async def update_rom(self, rom_id: int, data: dict[str, Any]) -> None:
+        self.rom_updates.setdefault(rom_id, {}).update(data)
+        await self._flush_if_needed()
+
+    async def _flush_if_needed(self) -> None:
+        if (
+            len(self) >= self.batch_size
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self) -> None:
+        # Swap the pending results first so roms added while emitting go to the next batch
+        roms, rom_files, rom_updates = self.roms, self.rom_files, self.rom_updates
+        self.roms, self.rom_files, self.rom_updates = {}, {}, {}
+        self.last_flush = time.monotonic()
+
+        if not roms and not rom_updates:
+            return
+
+        db_rom_handler.write_scan_results(
+            roms=roms.values(), rom_files=rom_files, rom_updates=rom_updates
+        )
+
+        if not roms:
+            return
+
+        for rom in db_rom_handler.get_scanned_roms(list(roms.keys())):
+            await self.socket_manager.emit(
+                "scan:scanning_rom",
+                SimpleRomSchema.from_orm_with_factory(rom).model_dump(
+                    exclude={"created_at", "updated_at", "rom_user"}
+                ),
+            )
+        await self.socket_manager.emit("", None)
+
+
 def _get_socket_manager() -> socketio.AsyncRedisManager:
     """Connect to external socketio server"""
     return socketio.AsyncRedisManager(str(REDIS_URL), write_only=True)
@@ -156,6 +237,7 @@ def _should_scan_rom(scan_type: ScanType, rom: Rom | None, roms_ids: list[int])
 # 3. Create a new ROM entry if it doesn't exist
 # 4. Build the ROM files and calculate the hashes
 # 4. Scan the ROM and update its metadata
+# 5. Store the resources and queue the ROM to be written to the database
 async def _identify_rom(
     platform: Platform,
     fs_rom: FSRom,
@@ -165,6 +247,7 @@ async def _identify_rom(
     metadata_sources: list[str],
     socket_manager: socketio.AsyncRedisManager,
     scan_stats: ScanStats,
+    write_buffer: ScanWriteBuffer,
 ) -> ScanStats:
     # Break early if the flag is set
     if redis_client.get(STOP_SCAN_FLAG):
@@ -172,13 +255,16 @@ async def _identify_rom(
 
     if not _should_scan_rom(scan_type=scan_type, rom=rom, roms_ids=roms_ids):
         if rom:
+            rom_updates: dict[str, Any] = {}
             if rom.fs_name != fs_rom["fs_name"]:
                 # Just to update the filesystem data
-                rom.fs_name = fs_rom["fs_name"]
-                db_rom_handler.add_rom(rom)
+                rom_updates["fs_name"] = fs_rom["fs_name"]
 
             if rom.missing_from_fs:
-                db_rom_handler.update_rom(rom.id, {"missing_from_fs": False})
+                rom_updates["missing_from_fs"] = False
+
+            if rom_updates:
+                await write_buffer.update_rom(rom.id, rom_updates)
 
         scan_stats.update(scanned_roms=scan_stats.scanned_roms + 1)
         return scan_stats
@@ -189,10 +275,10 @@ async def _identify_rom(
     )
     roms_path = fs_rom_handler.get_roms_fs_structure(platform.fs_slug)
 
-    # Create the entry early so we have the ID
+    # Create the entry early so we have the ID, the scanned rom is written in batches
     newly_added: bool = rom is None
     if not rom:
-        rom = db_rom_handler.add_rom(
+        rom = db_rom_handler.upsert_rom(
             Rom(
                 fs_name=fs_rom["fs_name"],
                 fs_path=roms_path,
@@ -222,7 +308,9 @@ async def _identify_rom(
     # Build rom files object before scanning
     log.debug(f"Calculating file hashes for {rom.fs_name}...")
     rom_files, rom_crc_c, rom_md5_h, rom_sha1_h, rom_ra_h = (
-        await fs_rom_handler.get_rom_files(rom)
+        await fs_rom_handler.get_rom_files(
+            rom, use_cached_hashes=scan_type != ScanType.HASHES
+        )
     )
     fs_rom.update(
         {
@@ -247,100 +335,48 @@ async def _identify_rom(
 
     scan_stats.update(
         scanned_roms=scan_stats.scanned_roms + 1,
-        added_roms=scan_stats.added_roms + (1 if not rom else 0),
+        added_roms=scan_stats.added_roms + (1 if newly_added else 0),
         identified_roms=scan_stats.identified_roms
         + (1 if scanned_rom.is_identified else 0),
     )
 
-    _added_rom = db_rom_handler.add_rom(scanned_rom)
-
-    if _added_rom.is_identified:
-        await socket_manager.emit(
-            "scan:scanning_rom",
-            SimpleRomSchema.from_orm_with_factory(_added_rom).model_dump(
-                exclude={"created_at", "updated_at", "rom_user"}
-            ),
-        )
-
-    # Delete the existing rom files in the DB
-    db_rom_handler.purge_rom_files(_added_rom.id)
-
-    # Create each file entry for the rom
-    new_rom_files = [
-        RomFile(
-            rom_id=_added_rom.id,
-            file_name=file.file_name,
-            file_path=file.file_path,
-            file_size_bytes=file.file_size_bytes,
-            last_modified=file.last_modified,
-            category=file.category,
-            crc_hash=file.crc_hash,
-            md5_hash=file.md5_hash,
-            sha1_hash=file.sha1_hash,
-            ra_hash=file.ra_hash,
-        )
-        for file in rom_files
-    ]
-    for new_rom_file in new_rom_files:
-        db_rom_handler.add_rom_file(new_rom_file)
+    unavailable_sources = get_unavailable_sources(metadata_sources)
+    if unavailable_sources != scan_stats.unavailable_sources:
+        scan_stats.update(unavailable_sources=unavailable_sources)
+        await socket_manager.emit("scan:unavailable_sources", unavailable_sources)
 
-    if _added_rom.ra_metadata:
-        await fs_resource_handler.create_ra_resources_path(platform.id, _added_rom.id)
+    if scanned_rom.ra_metadata:
+        await fs_resource_handler.create_ra_resources_path(platform.id, scanned_rom.id)
 
-        # Store the achievements badges
-        for ach in _added_rom.ra_metadata.get("achievements", []):
-            # Store both normal and locked version
+        # Store both normal and locked version of the achievements badges
+        badges: list[tuple[str, str]] = []
+        for ach in scanned_rom.ra_metadata.get("achievements", []):
             badge_url_lock = ach.get("badge_url_lock", None)
             badge_path_lock = ach.get("badge_path_lock", None)
             if badge_url_lock and badge_path_lock:
-                await fs_resource_handler.store_ra_badge(
-                    badge_url_lock, badge_path_lock
-                )
+                badges.append((badge_url_lock, badge_path_lock))
             badge_url = ach.get("badge_url", None)
             badge_path = ach.get("badge_path", None)
             if badge_url and badge_path:
-                await fs_resource_handler.store_ra_badge(badge_url, badge_path)
+                badges.append((badge_url, badge_path))
 
-    path_cover_s, path_cover_l = await fs_resource_handler.get_cover(
-        entity=_added_rom,
-        overwrite=True,
-        url_cover=_added_rom.url_cover,
-    )
+        await fs_resource_handler.store_ra_badges(badges)
 
-    path_manual = await fs_resource_handler.get_manual(
-        rom=_added_rom,
+    artwork = await fs_resource_handler.get_rom_artwork(
+        rom=scanned_rom,
         overwrite=True,
-        url_manual=_added_rom.url_manual,
-    )
-
-    path_screenshots = await fs_resource_handler.get_rom_screenshots(
-        rom=_added_rom,
-        url_screenshots=_added_rom.url_screenshots,
+        url_cover=scanned_rom.url_cover,
+        url_manual=scanned_rom.url_manual,
+        url_screenshots=scanned_rom.url_screenshots,
     )
 
-    _added_rom.path_cover_s = path_cover_s
-    _added_rom.path_cover_l = path_cover_l
-    _added_rom.path_screenshots = path_screenshots
-    _added_rom.path_manual = path_manual
-
-    # Update the scanned rom with the cover and screenshots paths and update database
-    db_rom_handler.update_rom(
-        _added_rom.id,
-        {
-            "path_cover_s": path_cover_s,
-            "path_cover_l": path_cover_l,
-            "path_screenshots": path_screenshots,
-            "path_manual": path_manual,
-        },
-    )
+    scanned_rom.path_cover_s = artwork.path_cover_s
+    scanned_rom.path_cover_l = artwork.path_cover_l
+    scanned_rom.path_screenshots = artwork.path_screenshots
+    scanned_rom.path_manual = artwork.path_manual
 
-    await socket_manager.emit(
-        "scan:scanning_rom",
-        SimpleRomSchema.from_orm_with_factory(_added_rom).model_dump(
-            exclude={"created_at", "updated_at", "rom_user"}
-        ),
-    )
-    await socket_manager.emit("", None)
+    # The rom, its files and resources paths are written in batches
+    await write_buffer.add_rom(scanned_rom, rom_files)
 
     return scan_stats
 
@@ -353,6 +389,7 @@ async def _identify_platform(
     metadata_sources: list[str],
     socket_manager: socketio.AsyncRedisManager,
     scan_stats: ScanStats,
+    roms_inventory: RomsInventory | None = None,
 ) -> ScanStats:
     # Stop the scan if the flag is set
     if redis_client.get(STOP_SCAN_FLAG):
@@ -404,11 +441,17 @@ async def _identify_platform(
         )
 
     # Scanning roms
-    try:
-        fs_roms = await fs_rom_handler.get_roms(platform)
-    except RomsNotFoundException as e:
-        log.error(e)
-        return scan_stats
+    saved_inventory = await fs_rom_handler.get_saved_roms_inventory(platform)
+    if not roms_inventory:
+        try:
+            roms_inventory = await fs_rom_handler.get_roms_inventory(
+                platform, previous=saved_inventory
+            )
+        except RomsNotFoundException as e:
+            log.error(e)
+            return scan_stats
+
+    fs_roms = fs_rom_handler.get_roms_from_inventory(roms_inventory)
 
     if len(fs_roms) == 0:
         log.warning(
@@ -417,31 +460,95 @@ async def _identify_platform(
     else:
         log.info(f"{hl(str(len(fs_roms)))} roms found in the file system")
 
-    for fs_roms_batch in batched(fs_roms, 200, strict=False):
-        rom_by_filename_map = db_rom_handler.get_roms_by_fs_name(
-            platform_id=platform.id,
-            fs_names={fs_rom["fs_name"] for fs_rom in fs_roms_batch},
+    # Quick scans only visit the roms added or modified since the last scan,
+    # as long as no rom was added or deleted from the database in between
+    fs_roms_to_scan = fs_roms
+    removed_fs_names: set[str] | None = None
+    if (
+        scan_type == ScanType.QUICK
+        and not roms_ids
+        and saved_inventory
+        and saved_inventory["rom_count"] == platform.rom_count
+    ):
+        changed_fs_names, removed_fs_names = fs_rom_handler.get_roms_inventory_changes(
+            saved_inventory, roms_inventory
         )
+        fs_roms_to_scan = [
+            fs_rom for fs_rom in fs_roms if fs_rom["fs_name"] in changed_fs_names
+        ]
+        log.info(f"{hl(str(len(fs_roms_to_scan)))} roms changed since the last scan")
+        scan_stats.update(
+            scanned_roms=scan_stats.scanned_roms + len(fs_roms) - len(fs_roms_to_scan)
+        )
+
+    # Limit the number of roms being identified at the same time
+    scan_semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+    write_buffer = ScanWriteBuffer(socket_manager)
 
-        for fs_rom in fs_roms_batch:
-            scan_stats = await _identify_rom(
+    async def _identify_rom_with_semaphore(fs_rom: FSRom, rom: Rom | None) -> None:
+        async with scan_semaphore:
+            await _identify_rom(
                 platform=platform,
                 fs_rom=fs_rom,
-                rom=rom_by_filename_map.get(fs_rom["fs_name"]),
+                rom=rom,
                 scan_type=scan_type,
                 roms_ids=roms_ids,
                 metadata_sources=metadata_sources,
                 socket_manager=socket_manager,
                 scan_stats=scan_stats,
+                write_buffer=write_buffer,
             )
 
-    missing_roms = db_rom_handler.mark_missing_roms(
-        platform.id, [rom["fs_name"] for rom in fs_roms]
-    )
+    try:
+        # IGDB lookups of the roms identified at the same time share requests
+        async with meta_igdb_handler.multiquery_batching():
+            for fs_roms_batch in batched(fs_roms_to_scan, 200, strict=False):
+                rom_by_filename_map = db_rom_handler.get_roms_by_fs_name(
+                    platform_id=platform.id,
+                    fs_names={fs_rom["fs_name"] for fs_rom in fs_roms_batch},
+                )
+
+                rom_tasks = [
+                    asyncio.ensure_future(
+                        _identify_rom_with_semaphore(
+                            fs_rom, rom_by_filename_map.get(fs_rom["fs_name"])
+                        )
+                    )
+                    for fs_rom in fs_roms_batch
+                ]
+                try:
+                    await asyncio.gather(*rom_tasks)
+                except BaseException:
+                    # The other roms must not be written once the scan failed
+                    for rom_task in rom_tasks:
+                        rom_task.cancel()
+                    await asyncio.gather(*rom_tasks, return_exceptions=True)
+                    raise
+
+                # Stop the scan if the flag was set while the batch was being processed
+                if redis_client.get(STOP_SCAN_FLAG):
+                    raise ScanStoppedException()
+    finally:
+        # Write what's left, including when the scan is stopped
+        await write_buffer.flush()
+
+    if removed_fs_names is None:
+        missing_roms = db_rom_handler.mark_missing_roms(
+            platform.id, [rom["fs_name"] for rom in fs_roms]
+        )
+    else:
+        missing_roms = db_rom_handler.mark_roms_missing_by_fs_name(
+            platform.id, removed_fs_names
+        )
     if len(missing_roms) > 0:
         log.warning(f"{hl('Missing')} roms from filesystem:")
         for r in missing_roms:
             log.warning(f" - {r.fs_name}")
+        await fs_rom_handler.remove_cached_hashes(r.full_path for r in missing_roms)
+
+    # Save the snapshot once the database matches the filesystem
+    roms_inventory["rom_count"] = db_rom_handler.count_roms(platform.id)
+    await fs_rom_handler.save_roms_inventory(platform, roms_inventory)
 
     missing_firmware = db_firmware_handler.mark_missing_firmware(
         platform.id, [fw for fw in fs_firmware]
@@ -488,54 +595,75 @@ async def scan_platforms(
         await socket_manager.emit("scan:done_ko", e.message)
         return scan_stats
 
-    # Precalculate total platforms and ROMs
-    scan_stats.update(total_platforms=len(fs_platforms))
-    for platform_slug in fs_platforms:
-        fs_roms = await fs_rom_handler.get_roms(Platform(fs_slug=platform_slug))
-        scan_stats.update(total_roms=scan_stats.total_roms + len(fs_roms))
-
     async def stop_scan():
         log.info(f"{emoji.EMOJI_STOP_SIGN} Scan stopped manually")
         await socket_manager.emit("scan:done", scan_stats.to_dict())
         redis_client.delete(STOP_SCAN_FLAG)
 
     try:
-        platform_list = [
-            platform.fs_slug
-            for s in platform_ids
-            if (platform := db_platform_handler.get_platform(s)) is not None
-        ] or fs_platforms
-        platform_list = sorted(platform_list)
-
-        if len(platform_list) == 0:
-            log.warning(
-                f"{hl(emoji.EMOJI_WARNING, color=LIGHTYELLOW)} No platforms found, verify that the folder structure is right and the volume is mounted correctly."
-                "Check https://github.com/rommapp/romm?tab=readme-ov-file#folder-structure for more details."
-            )
-        else:
-            log.info(
-                f"Found {hl(str(len(platform_list)))} platforms in the file system"
+        # Roms are hashed in worker processes, stopped once the scan is over
+        with fs_rom_handler.hashing_pool():
+            platform_list = [
+                platform.fs_slug
+                for s in platform_ids
+                if (platform := db_platform_handler.get_platform(s)) is not None
+            ] or fs_platforms
+            platform_list = sorted(platform_list)
+
+            # Precalculate total platforms and ROMs, keeping the listings for the scan
+            roms_inventories: dict[str, RomsInventory] = {}
+            for platform_slug in platform_list:
+                platform = Platform(fs_slug=platform_slug)
+                try:
+                    roms_inventories[platform_slug] = (
+                        await fs_rom_handler.get_roms_inventory(
+                            platform,
+                            previous=await fs_rom_handler.get_saved_roms_inventory(
+                                platform
+                            ),
+                        )
+                    )
+                except RomsNotFoundException:
+                    continue
+
+            scan_stats.update(
+                total_platforms=len(platform_list),
+                total_roms=sum(
+                    len(fs_rom_handler.get_roms_from_inventory(inventory))
+                    for inventory in roms_inventories.values()
+                ),
             )
 
-        for platform_slug in platform_list:
-            scan_stats = await _identify_platform(
-                platform_slug=platform_slug,
-                scan_type=scan_type,
-                fs_platforms=fs_platforms,
-                roms_ids=roms_ids,
-                metadata_sources=metadata_sources,
-                socket_manager=socket_manager,
-                scan_stats=scan_stats,
-            )
+            if len(platform_list) == 0:
+                log.warning(
+                    f"{hl(emoji.EMOJI_WARNING, color=LIGHTYELLOW)} No platforms found, verify that the folder structure is right and the volume is mounted correctly."
+                    "Check https://github.com/rommapp/romm?tab=readme-ov-file#folder-structure for more details."
+                )
+            else:
+                log.info(
+                    f"Found {hl(str(len(platform_list)))} platforms in the file system"
+                )
+
+            for platform_slug in platform_list:
+                scan_stats = await _identify_platform(
+                    platform_slug=platform_slug,
+                    scan_type=scan_type,
+                    fs_platforms=fs_platforms,
+                    roms_ids=roms_ids,
+                    metadata_sources=metadata_sources,
+                    socket_manager=socket_manager,
+                    scan_stats=scan_stats,
+                    roms_inventory=roms_inventories.get(platform_slug),
+                )
 
-        missed_platforms = db_platform_handler.mark_missing_platforms(fs_platforms)
-        if len(missed_platforms) > 0:
-            log.warning(f"{hl('Missing')} platforms from filesystem:")
-            for p in missed_platforms:
-                log.warning(f" - {p.slug} ({p.fs_slug})")
+            missed_platforms = db_platform_handler.mark_missing_platforms(fs_platforms)
+            if len(missed_platforms) > 0:
+                log.warning(f"{hl('Missing')} platforms from filesystem:")
+                for p in missed_platforms:
+                    log.warning(f" - {p.slug} ({p.fs_slug})")
 
-        log.info(f"{emoji.EMOJI_CHECK_MARK} Scan completed")
-        await socket_manager.emit("scan:done", scan_stats.to_dict())
+            log.info(f"{emoji.EMOJI_CHECK_MARK} Scan completed")
+            await socket_manager.emit("scan:done", scan_stats.to_dict())
     except ScanStoppedException:
         await stop_scan()
     except Exception as e:
@@ -1,5 +1,7 @@
 from endpoints.responses.stats import StatsReturn
 from handler.database import db_stats_handler
+from handler.redis_handler import async_cache
+from utils.cache import get_provider_cache_stats
 from utils.router import APIRouter
 
 router = APIRouter(
@@ -9,7 +11,7 @@ router = APIRouter(
 
 
 @router.get("")
-def stats() -> StatsReturn:
+async def stats() -> StatsReturn:
     """Endpoint to return the current RomM stats
 
     Returns:
@@ -23,4 +25,5 @@ def stats() -> StatsReturn:
         "STATES": db_stats_handler.get_states_count(),
         "SCREENSHOTS": db_stats_handler.get_screenshots_count(),
         "TOTAL_FILESIZE_BYTES": db_stats_handler.get_total_filesize(),
+        "PROVIDER_CACHE": await get_provider_cache_stats(async_cache),
     }
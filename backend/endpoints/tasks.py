@@ -32,6 +32,8 @@ from handler.redis_handler import (
     redis_client,
 )
 from tasks.manual.cleanup_orphaned_resources import cleanup_orphaned_resources_task
+from tasks.manual.clear_provider_cache import clear_provider_cache_task
+from tasks.manual.clear_scan_misses import clear_scan_misses_task
 from tasks.scheduled.convert_images_to_webp import convert_images_to_webp_task
 from tasks.scheduled.scan_library import scan_library_task
 from tasks.scheduled.update_launchbox_metadata import update_launchbox_metadata_task
@@ -97,6 +99,20 @@ manual_tasks: list[ManualTask] = [
             "task": cleanup_orphaned_resources_task,
         }
     ),
+    ManualTask(
+        {
+            "name": "clear_scan_misses",
+            "type": TaskType.GENERIC,
+            "task": clear_scan_misses_task,
+        }
+    ),
+    ManualTask(
+        {
+            "name": "clear_provider_cache",
+            "type": TaskType.CLEANUP,
+            "task": clear_provider_cache_task,
+        }
+    ),
 ]
 
 
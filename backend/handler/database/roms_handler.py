@@ -1,4 +1,5 @@
 import functools
+import math
 from collections.abc import Iterable, Sequence
 from typing import Any
 
@@ -13,6 +14,8 @@ from sqlalchemy import (
     delete,
     false,
     func,
+    insert,
+    inspect,
     literal,
     not_,
     or_,
@@ -153,6 +156,52 @@ def with_simple(func):
     return wrapper
 
 
+ROM_FILE_COMPARED_FIELDS = (
+    "file_size_bytes",
+    "category",
+    "crc_hash",
+    "md5_hash",
+    "sha1_hash",
+    "ra_hash",
+    "missing_from_fs",
+)
+
+
+# Columns written for each scanned rom, see DBRomsHandler.write_scan_results
+ROM_COLUMNS = tuple(column.key for column in inspect(Rom).column_attrs)
+
+
+def _rom_file_values(rom_id: int, rom_file: RomFile) -> dict[str, Any]:
+    return {
+        "rom_id": rom_id,
+        "file_name": rom_file.file_name,
+        "file_path": rom_file.file_path,
+        "file_size_bytes": rom_file.file_size_bytes,
+        "last_modified": rom_file.last_modified,
+        "category": rom_file.category,
+        "crc_hash": rom_file.crc_hash,
+        "md5_hash": rom_file.md5_hash,
+        "sha1_hash": rom_file.sha1_hash,
+        "ra_hash": rom_file.ra_hash,
+        "missing_from_fs": bool(rom_file.missing_from_fs),
+    }
+
+
+def _rom_file_changed(existing: RomFile, values: dict[str, Any]) -> bool:
+    if any(
+        getattr(existing, field) != values[field] for field in ROM_FILE_COMPARED_FIELDS
+    ):
+        return True
+
+    # MariaDB stores last_modified as a single precision float, so exact
+    # comparisons would flag every file as changed
+    if existing.last_modified is None or values["last_modified"] is None:
+        return existing.last_modified != values["last_modified"]
+    return not math.isclose(
+        existing.last_modified, values["last_modified"], rel_tol=1e-6
+    )
+
+
 class DBRomsHandler(DBBaseHandler):
     @begin_session
     @with_details
@@ -162,6 +211,20 @@ class DBRomsHandler(DBBaseHandler):
 
         return session.scalar(query.filter_by(id=rom.id).limit(1))
 
+    @begin_session
+    def upsert_rom(self, rom: Rom, session: Session = None) -> Rom:
+        """Insert or update a rom, without loading its details.
+
+        Only the scalar columns and the platform and metadata (joined by default)
+        are loaded, files are left empty. Use `add_rom` for the full object.
+        """
+        rom = session.merge(rom)
+        session.flush()
+
+        return session.scalars(
+            select(Rom).filter_by(id=rom.id).options(noload(Rom.files)).limit(1)
+        ).one()
+
     @begin_session
     @with_details
     def get_rom(
@@ -179,6 +242,19 @@ class DBRomsHandler(DBBaseHandler):
             return []
         return session.scalars(query.filter(Rom.id.in_(ids))).all()
 
+    @begin_session
+    def get_scanned_roms(
+        self, ids: list[int], session: Session = None
+    ) -> Sequence[Rom]:
+        """Get multiple ROMs by their IDs, with only their platform, metadata and files."""
+        if not ids:
+            return []
+        return session.scalars(
+            select(Rom)
+            .filter(Rom.id.in_(ids))
+            .options(selectinload(Rom.files).options(noload(RomFile.rom)))
+        ).all()
+
     def filter_by_platform_id(self, query: Query, platform_id: int):
         return query.filter(Rom.platform_id == platform_id)
 
@@ -776,6 +852,40 @@ class DBRomsHandler(DBBaseHandler):
         )
         return missing_roms
 
+    @begin_session
+    def mark_roms_missing_by_fs_name(
+        self, platform_id: int, fs_names: Iterable[str], session: Session = None
+    ) -> Sequence[Rom]:
+        fs_names = list(fs_names)
+        if not fs_names:
+            return []
+
+        missing_roms = (
+            session.scalars(
+                select(Rom)
+                .order_by(Rom.fs_name.asc())
+                .where(and_(Rom.platform_id == platform_id, Rom.fs_name.in_(fs_names)))
+            )
+            .unique()
+            .all()
+        )
+        session.execute(
+            update(Rom)
+            .where(and_(Rom.platform_id == platform_id, Rom.fs_name.in_(fs_names)))
+            .values(**{"missing_from_fs": True})
+            .execution_options(synchronize_session="evaluate")
+        )
+        return missing_roms
+
+    @begin_session
+    def count_roms(self, platform_id: int, session: Session = None) -> int:
+        return (
+            session.scalar(
+                select(func.count(Rom.id)).where(Rom.platform_id == platform_id)
+            )
+            or 0
+        )
+
     @begin_session
     def add_rom_user(
         self, rom_id: int, user_id: int, session: Session = None
@@ -861,3 +971,70 @@ class DBRomsHandler(DBBaseHandler):
             .execution_options(synchronize_session="evaluate")
         )
         return purged_rom_files
+
+    def _replace_rom_files(
+        self, rom_id: int, files: Iterable[RomFile], session: Session
+    ) -> None:
+        """Sync the files of a rom in bulk, only writing the rows that changed."""
+        existing_rom_files = {
+            (rom_file.file_path, rom_file.file_name): rom_file
+            for rom_file in session.scalars(
+                select(RomFile).filter_by(rom_id=rom_id).options(noload(RomFile.rom))
+            ).all()
+        }
+
+        new_values: list[dict[str, Any]] = []
+        updated_values: list[dict[str, Any]] = []
+        for rom_file in files:
+            values = _rom_file_values(rom_id, rom_file)
+            existing = existing_rom_files.pop(
+                (rom_file.file_path, rom_file.file_name), None
+            )
+            if existing is None:
+                new_values.append(values)
+            elif _rom_file_changed(existing, values):
+                updated_values.append({"id": existing.id, **values})
+
+        if existing_rom_files:
+            session.execute(
+                delete(RomFile)
+                .where(
+                    RomFile.id.in_(
+                        [rom_file.id for rom_file in existing_rom_files.values()]
+                    )
+                )
+                .execution_options(synchronize_session=False)
+            )
+        if updated_values:
+            session.execute(update(RomFile), updated_values)
+        if new_values:
+            session.execute(insert(RomFile), new_values)
+
+    @begin_session
+    def write_scan_results(
+        self,
+        roms: Iterable[Rom],
+        rom_files: dict[int, Sequence[RomFile]],
+        rom_updates: dict[int, dict[str, Any]],
+        session: Session = None,
+    ) -> None:
+        """Write a batch of scanned roms, their files and partial updates in a single transaction.
+
+        The scanned roms already exist in the database, only the columns set on
+        them are written, with one bulk update per batch.
+        """
+        rom_values = [
+            {key: rom_state.dict[key] for key in ROM_COLUMNS if key in rom_state.dict}
+            for rom_state in map(inspect, roms)
+        ]
+        if rom_values:
+            session.execute(update(Rom), rom_values)
+
+        for rom_id, files in rom_files.items():
+            self._replace_rom_files(rom_id, files, session=session)
+
+        if rom_updates:
+            session.execute(
+                update(Rom),
+                [{"id": rom_id, **data} for rom_id, data in rom_updates.items()],
+            )
@@ -1,13 +1,25 @@
+import asyncio
+import functools
 import gzip
+import json
 import os
+import weakref
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from pathlib import Path
+from typing import Final, NamedTuple
 
 import httpx
 from fastapi import status
 from PIL import Image, ImageFile, UnidentifiedImageError
 
-from config import ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP, RESOURCES_BASE_PATH
+from config import (
+    ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP,
+    IMAGE_PROCESSING_WORKERS,
+    RESOURCES_BASE_PATH,
+)
+from handler.redis_handler import async_cache
 from logger.logger import log
 from models.collection import Collection
 from models.rom import Rom
@@ -16,6 +28,53 @@ from utils.context import ctx_httpx_client
 
 from .base_handler import CoverSize, FSHandler
 
+# Validators (ETag, Last-Modified) of the downloaded assets, by file path
+ARTWORK_VALIDATORS_KEY: Final = "romm:artwork_validators"
+
+# Paths of the stored achievements badges, by URL, shared by the roms of a game
+RA_BADGES_KEY: Final = "romm:ra_badges"
+RA_BADGES_CONCURRENCY: Final = 8
+
+
+class RomArtwork(NamedTuple):
+    path_cover_s: str | None
+    path_cover_l: str | None
+    path_manual: str | None
+    path_screenshots: list[str]
+
+
+@functools.cache
+def _get_image_executor() -> ThreadPoolExecutor:
+    # Pillow releases the GIL while decoding, resizing and encoding images
+    return ThreadPoolExecutor(
+        max_workers=IMAGE_PROCESSING_WORKERS, thread_name_prefix="image"
+    )
+
+
+# Badges downloaded at once, across all the roms being scanned, per event loop
+_ra_badges_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+
+
+def _get_ra_badges_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _ra_badges_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(RA_BADGES_CONCURRENCY)
+        _ra_badges_semaphores[loop] = semaphore
+    return semaphore
+
+
+# Badges being downloaded, by URL, per event loop
+_ra_badges_downloads: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, asyncio.Future[None]]
+] = weakref.WeakKeyDictionary()
+
+
+def _get_ra_badges_downloads() -> dict[str, asyncio.Future[None]]:
+    return _ra_badges_downloads.setdefault(asyncio.get_running_loop(), {})
+
 
 class FSResourcesHandler(FSHandler):
     def __init__(self) -> None:
@@ -40,7 +99,110 @@ class FSResourcesHandler(FSHandler):
             return True  # At least one file found
         return False
 
-    def resize_cover_to_small(self, cover: ImageFile.ImageFile, save_path: str) -> None:
+    async def _get_conditional_headers(
+        self, url: str, file_path: str
+    ) -> dict[str, str]:
+        """Headers asking the asset only if it changed since it was downloaded"""
+        if not await self.file_exists(file_path):
+            return {}
+
+        cached_validators = await async_cache.hget(ARTWORK_VALIDATORS_KEY, file_path)
+        if not cached_validators:
+            return {}
+
+        validators = json.loads(cached_validators)
+        if validators.get("url") != url:
+            return {}
+
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    async def _set_validators(
+        self, url: str, file_path: str, headers: httpx.Headers
+    ) -> None:
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            await async_cache.hdel(ARTWORK_VALIDATORS_KEY, file_path)
+            return
+
+        await async_cache.hset(
+            ARTWORK_VALIDATORS_KEY,
+            file_path,
+            json.dumps({"url": url, "etag": etag, "last_modified": last_modified}),
+        )
+
+    async def _download_asset(self, url: str, path: str, filename: str) -> bool:
+        """Download an asset to filesystem, unless it didn't change upstream
+
+        Args:
+            url: URL to get the asset
+            path: directory of the asset
+            filename: name of the asset file
+        Returns
+            True if the asset was written, False if it's unchanged or unavailable
+        """
+        file_path = f"{path}/{filename}"
+        headers = await self._get_conditional_headers(url, file_path)
+
+        httpx_client = ctx_httpx_client.get()
+        async with httpx_client.stream(
+            "GET", url, headers=headers, timeout=120
+        ) as response:
+            if response.status_code == status.HTTP_304_NOT_MODIFIED:
+                log.debug(f"{file_path} didn't change, skipping download")
+                return False
+
+            if response.status_code != status.HTTP_200_OK:
+                return False
+
+            # Check if content is gzipped from response headers
+            is_gzipped = response.headers.get("content-encoding", "").lower() == "gzip"
+
+            # The asset is streamed next to the current one, which is only
+            # replaced once the download is complete
+            part_filename = f"{filename}.part"
+            try:
+                async with await self.write_file_streamed(
+                    path=path, filename=part_filename
+                ) as f:
+                    if is_gzipped:
+                        # Content is gzipped, decompress it
+                        content = await response.aread()
+                        try:
+                            decompressed_content = gzip.decompress(content)
+                            await f.write(decompressed_content)
+                        except gzip.BadGzipFile:
+                            await f.write(content)
+                    else:
+                        # Content is not gzipped, stream directly
+                        async for chunk in response.aiter_raw():
+                            await f.write(chunk)
+            except BaseException:
+                # Download it again next time rather than trust the current file
+                await self._forget_validators(file_path)
+                self.validate_path(f"{path}/{part_filename}").unlink(missing_ok=True)
+                raise
+
+            os.replace(
+                self.validate_path(f"{path}/{part_filename}"),
+                self.validate_path(file_path),
+            )
+            await self._set_validators(url, file_path, response.headers)
+
+        return True
+
+    async def _forget_validators(self, file_path: str) -> None:
+        """Make the next request of an asset download it again"""
+        await async_cache.hdel(ARTWORK_VALIDATORS_KEY, file_path)
+
+    def resize_cover_to_small(
+        self, cover: ImageFile.ImageFile, save_path: str
+    ) -> Image.Image:
         """Resize cover to small size, and save it to filesystem."""
         if cover.height >= 1000:
             ratio = 0.2
@@ -53,68 +215,90 @@ class FSResourcesHandler(FSHandler):
         small_img = cover.resize(small_size)
 
         small_img.save(save_path)
+        return small_img
 
-    async def _store_cover(
-        self, entity: Rom | Collection, url_cover: str, size: CoverSize
+    def _derive_covers(
+        self,
+        source: Path | BytesIO,
+        path_cover_l: Path | None,
+        path_cover_s: Path | None,
     ) -> None:
-        """Store roms resources in filesystem
+        """Write the covers and their WebP versions, decoding the image only once
 
         Args:
-            fs_slug: short name of the platform
-            rom_name: name of rom file
+            source: image to derive the covers from
+            path_cover_l: path of the big cover, None to skip it
+            path_cover_s: path of the small cover, None to skip it
+        """
+        with Image.open(source) as img:
+            # Fully read, so the source file itself can be overwritten
+            img.load()
+
+            if path_cover_l:
+                if path_cover_l != source:
+                    img.save(path_cover_l)
+                if ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP:
+                    self.image_converter.save_as_webp(
+                        img, path_cover_l.with_suffix(".webp")
+                    )
+
+            if path_cover_s:
+                small_img = self.resize_cover_to_small(img, save_path=str(path_cover_s))
+                if ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP:
+                    self.image_converter.save_as_webp(
+                        small_img, path_cover_s.with_suffix(".webp")
+                    )
+
+    async def _process_covers(
+        self,
+        source: Path | BytesIO,
+        path_cover_l: Path | None,
+        path_cover_s: Path | None,
+    ) -> None:
+        """Derive the covers in the image pool, keeping the event loop free"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            _get_image_executor(),
+            self._derive_covers,
+            source,
+            path_cover_l,
+            path_cover_s,
+        )
+
+    async def _store_cover(self, entity: Rom | Collection, url_cover: str) -> None:
+        """Store rom or collection covers in filesystem
+
+        The cover is downloaded once, and all the sizes are derived from it.
+
+        Args:
+            entity: Rom or Collection object
             url_cover: url to get the cover
-            size: size of the cover
         """
         cover_file = f"{entity.fs_resources_path}/cover"
         await self.make_directory(f"{cover_file}")
 
-        httpx_client = ctx_httpx_client.get()
         try:
-            async with httpx_client.stream("GET", url_cover, timeout=120) as response:
-                if response.status_code == status.HTTP_200_OK:
-                    # Check if content is gzipped from response headers
-                    is_gzipped = (
-                        response.headers.get("content-encoding", "").lower() == "gzip"
-                    )
-
-                    async with await self.write_file_streamed(
-                        path=cover_file, filename=f"{size.value}.png"
-                    ) as f:
-                        if is_gzipped:
-                            # Content is gzipped, decompress it
-                            content = await response.aread()
-                            try:
-                                decompressed_content = gzip.decompress(content)
-                                await f.write(decompressed_content)
-                            except gzip.BadGzipFile:
-                                await f.write(content)
-                        else:
-                            # Content is not gzipped, stream directly
-                            async for chunk in response.aiter_raw():
-                                await f.write(chunk)
-
-                    if ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP:
-                        self.image_converter.convert_to_webp(
-                            self.validate_path(f"{cover_file}/{size.value}.png"),
-                            force=True,
-                        )
+            downloaded = await self._download_asset(
+                url_cover, cover_file, f"{CoverSize.BIG.value}.png"
+            )
         except httpx.TransportError as exc:
             log.error(f"Unable to fetch cover at {url_cover}: {str(exc)}")
             return None
 
-        if size == CoverSize.SMALL:
-            try:
-                image_path = self.validate_path(f"{cover_file}/{size.value}.png")
-                with Image.open(image_path) as img:
-                    self.resize_cover_to_small(img, save_path=str(image_path))
+        path_cover_l = self.validate_path(f"{cover_file}/{CoverSize.BIG.value}.png")
+        path_cover_s = self.validate_path(f"{cover_file}/{CoverSize.SMALL.value}.png")
 
-                if ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP:
-                    self.image_converter.convert_to_webp(
-                        self.validate_path(f"{cover_file}/{size.value}.png"), force=True
-                    )
-            except UnidentifiedImageError as exc:
-                log.error(f"Unable to identify image {cover_file}: {str(exc)}")
-                return None
+        # Covers of an unchanged image were already derived from it
+        if not downloaded and (path_cover_s.exists() or not path_cover_l.exists()):
+            return None
+
+        try:
+            await self._process_covers(path_cover_l, path_cover_l, path_cover_s)
+        except UnidentifiedImageError as exc:
+            log.error(f"Unable to identify image {cover_file}: {str(exc)}")
+            # Not processed, so it must not be considered up to date
+            await self._forget_validators(f"{cover_file}/{CoverSize.BIG.value}.png")
+            return None
 
     def _get_cover_path(self, entity: Rom | Collection, size: CoverSize) -> str | None:
         """Returns rom cover filesystem path adapted to frontend folder structure
@@ -135,28 +319,18 @@ class FSResourcesHandler(FSHandler):
         if not entity:
             return None, None
 
-        small_cover_exists = self.cover_exists(entity, CoverSize.SMALL)
-        if url_cover and (overwrite or not small_cover_exists):
-            await self._store_cover(entity, url_cover, CoverSize.SMALL)
-            small_cover_exists = self.cover_exists(entity, CoverSize.SMALL)
+        if url_cover and (
+            overwrite
+            or not self.cover_exists(entity, CoverSize.SMALL)
+            or not self.cover_exists(entity, CoverSize.BIG)
+        ):
+            await self._store_cover(entity, url_cover)
 
-        path_cover_s = (
-            self._get_cover_path(entity, CoverSize.SMALL)
-            if small_cover_exists
-            else None
+        return (
+            self._get_cover_path(entity, CoverSize.SMALL),
+            self._get_cover_path(entity, CoverSize.BIG),
         )
 
-        big_cover_exists = self.cover_exists(entity, CoverSize.BIG)
-        if url_cover and (overwrite or not big_cover_exists):
-            await self._store_cover(entity, url_cover, CoverSize.BIG)
-            big_cover_exists = self.cover_exists(entity, CoverSize.BIG)
-
-        path_cover_l = (
-            self._get_cover_path(entity, CoverSize.BIG) if big_cover_exists else None
-        )
-
-        return path_cover_s, path_cover_l
-
     async def remove_cover(self, entity: Rom | Collection | None):
         if not entity:
             return {"path_cover_s": "", "path_cover_l": ""}
@@ -187,13 +361,7 @@ class FSResourcesHandler(FSHandler):
         path_cover_l, path_cover_s = await self._build_artwork_path(entity, file_ext)
 
         try:
-            with Image.open(artwork) as img:
-                img.save(path_cover_l)
-                self.resize_cover_to_small(img, save_path=str(path_cover_s))
-
-                if ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP:
-                    self.image_converter.convert_to_webp(path_cover_l, force=True)
-                    self.image_converter.convert_to_webp(path_cover_s, force=True)
+            await self._process_covers(artwork, path_cover_l, path_cover_s)
         except UnidentifiedImageError as exc:
             log.error(
                 f"Unable to identify image for {entity.fs_resources_path}: {str(exc)}"
@@ -213,32 +381,8 @@ class FSResourcesHandler(FSHandler):
         """
         screenshot_path = f"{rom.fs_resources_path}/screenshots"
 
-        httpx_client = ctx_httpx_client.get()
         try:
-            async with httpx_client.stream(
-                "GET", url_screenhot, timeout=120
-            ) as response:
-                if response.status_code == status.HTTP_200_OK:
-                    # Check if content is gzipped from response headers
-                    is_gzipped = (
-                        response.headers.get("content-encoding", "").lower() == "gzip"
-                    )
-
-                    async with await self.write_file_streamed(
-                        path=screenshot_path, filename=f"{idx}.jpg"
-                    ) as f:
-                        if is_gzipped:
-                            # Content is gzipped, decompress it
-                            content = await response.aread()
-                            try:
-                                decompressed_content = gzip.decompress(content)
-                                await f.write(decompressed_content)
-                            except gzip.BadGzipFile:
-                                await f.write(content)
-                        else:
-                            # Content is not gzipped, stream directly
-                            async for chunk in response.aiter_raw():
-                                await f.write(chunk)
+            await self._download_asset(url_screenhot, screenshot_path, f"{idx}.jpg")
         except httpx.TransportError as exc:
             log.error(f"Unable to fetch screenshot at {url_screenhot}: {str(exc)}")
             return None
@@ -258,12 +402,17 @@ class FSResourcesHandler(FSHandler):
         if not rom or not url_screenshots:
             return []
 
-        path_screenshots: list[str] = []
-        for idx, url_screenhot in enumerate(url_screenshots):
-            await self._store_screenshot(rom, url_screenhot, idx)
-            path_screenshots.append(self._get_screenshot_path(rom, str(idx)))
+        await asyncio.gather(
+            *(
+                self._store_screenshot(rom, url_screenhot, idx)
+                for idx, url_screenhot in enumerate(url_screenshots)
+            )
+        )
 
-        return path_screenshots
+        return [
+            self._get_screenshot_path(rom, str(idx))
+            for idx in range(len(url_screenshots))
+        ]
 
     def manual_exists(self, rom: Rom) -> bool:
         """Check if rom manual exists in filesystem
@@ -281,30 +430,8 @@ class FSResourcesHandler(FSHandler):
     async def _store_manual(self, rom: Rom, url_manual: str):
         manual_path = f"{rom.fs_resources_path}/manual"
 
-        httpx_client = ctx_httpx_client.get()
         try:
-            async with httpx_client.stream("GET", url_manual, timeout=120) as response:
-                if response.status_code == status.HTTP_200_OK:
-                    # Check if content is gzipped from response headers
-                    is_gzipped = (
-                        response.headers.get("content-encoding", "").lower() == "gzip"
-                    )
-
-                    async with await self.write_file_streamed(
-                        path=manual_path, filename=f"{rom.id}.pdf"
-                    ) as f:
-                        if is_gzipped:
-                            # Decompress gzipped content
-                            content = await response.aread()
-                            try:
-                                decompressed_content = gzip.decompress(content)
-                                await f.write(decompressed_content)
-                            except gzip.BadGzipFile:
-                                await f.write(content)
-                        else:
-                            # Content is not gzipped, stream directly
-                            async for chunk in response.aiter_raw():
-                                await f.write(chunk)
+            await self._download_asset(url_manual, manual_path, f"{rom.id}.pdf")
         except httpx.TransportError as exc:
             log.error(f"Unable to fetch manual at {url_manual}: {str(exc)}")
             return None
@@ -335,27 +462,107 @@ class FSResourcesHandler(FSHandler):
         path_manual = self._get_manual_path(rom) if manual_exists else None
         return path_manual
 
+    async def get_rom_artwork(
+        self,
+        rom: Rom,
+        overwrite: bool,
+        url_cover: str | None,
+        url_manual: str | None,
+        url_screenshots: list | None,
+    ) -> RomArtwork:
+        """Fetch the cover, manual and screenshots of a rom concurrently
+
+        Assets downloaded before are only downloaded again if they changed upstream.
+        """
+        (path_cover_s, path_cover_l), path_manual, path_screenshots = (
+            await asyncio.gather(
+                self.get_cover(entity=rom, overwrite=overwrite, url_cover=url_cover),
+                self.get_manual(rom=rom, overwrite=overwrite, url_manual=url_manual),
+                self.get_rom_screenshots(rom=rom, url_screenshots=url_screenshots),
+            )
+        )
+
+        return RomArtwork(
+            path_cover_s=path_cover_s,
+            path_cover_l=path_cover_l,
+            path_manual=path_manual,
+            path_screenshots=path_screenshots,
+        )
+
     async def remove_manual(self, rom: Rom):
         await self.remove_directory(f"{rom.fs_resources_path}/manual")
 
-    async def store_ra_badge(self, url: str, path: str) -> None:
+    async def _copy_stored_ra_badge(self, url: str, path: str) -> bool:
+        """Copy the badge from another rom of the same game, if it was stored"""
+        stored_path = await async_cache.hget(RA_BADGES_KEY, url)
+        if isinstance(stored_path, bytes):
+            stored_path = stored_path.decode()
+        if not stored_path or stored_path == path:
+            return False
+        if not await self.file_exists(stored_path):
+            return False
+
+        directory, filename = os.path.split(path)
+        await self.write_file(await self.read_file(stored_path), directory, filename)
+        return True
+
+    async def _download_ra_badge(self, url: str, path: str) -> None:
         httpx_client = ctx_httpx_client.get()
         directory, filename = os.path.split(path)
 
-        if await self.file_exists(path):
-            log.debug(f"Badge {path} already exists, skipping download")
-            return
+        async with _get_ra_badges_semaphore():
+            try:
+                async with httpx_client.stream("GET", url, timeout=120) as response:
+                    if response.status_code != status.HTTP_200_OK:
+                        return
 
-        try:
-            async with httpx_client.stream("GET", url, timeout=120) as response:
-                if response.status_code == status.HTTP_200_OK:
                     async with await self.write_file_streamed(
                         path=directory, filename=filename
                     ) as f:
                         async for chunk in response.aiter_raw():
                             await f.write(chunk)
-        except httpx.TransportError as exc:
-            log.error(f"Unable to fetch cover at {url}: {str(exc)}")
+            except httpx.TransportError as exc:
+                log.error(f"Unable to fetch badge at {url}: {str(exc)}")
+                return
+
+        await async_cache.hset(RA_BADGES_KEY, url, path)
+
+    async def store_ra_badge(self, url: str, path: str) -> None:
+        if await self.file_exists(path):
+            log.debug(f"Badge {path} already exists, skipping download")
+            return
+
+        downloads = _get_ra_badges_downloads()
+        in_flight = downloads.get(url)
+        if in_flight:
+            # Another rom of the same game is downloading the badge
+            await asyncio.shield(in_flight)
+
+        if await self._copy_stored_ra_badge(url, path):
+            log.debug(f"Badge {path} copied from another rom, skipping download")
+            return
+
+        download = asyncio.ensure_future(self._download_ra_badge(url, path))
+        downloads[url] = download
+
+        def forget_download(_: asyncio.Future[None]) -> None:
+            if downloads.get(url) is download:
+                del downloads[url]
+
+        download.add_done_callback(forget_download)
+        await asyncio.shield(download)
+
+    async def store_ra_badges(self, badges: Iterable[tuple[str, str]]) -> None:
+        """Store achievements badges concurrently
+
+        Args:
+            badges: URL and path of each badge
+        """
+        # Each path is only written once
+        urls_by_path = {path: url for url, path in badges}
+        await asyncio.gather(
+            *(self.store_ra_badge(url, path) for path, url in urls_by_path.items())
+        )
 
     def get_ra_resources_path(self, platform_id: int, rom_id: int) -> str:
         return os.path.join(
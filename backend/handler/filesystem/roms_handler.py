@@ -1,31 +1,33 @@
-import binascii
-import bz2
+import asyncio
+import contextlib
 import fnmatch
 import hashlib
+import json
+import multiprocessing
 import os
 import re
-import tarfile
-import zipfile
-import zlib
-from collections.abc import Callable, Iterator
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextvars import ContextVar
 from pathlib import Path
-from typing import IO, Any, Final, Literal, TypedDict
+from typing import Final, TypedDict
 
 import magic
-import zipfile_inflate64  # trunk-ignore(ruff/F401): Patches zipfile to support Enhanced Deflate
 
-from config import LIBRARY_BASE_PATH
+from config import LIBRARY_BASE_PATH, SCAN_HASHING_WORKERS
 from config.config_manager import config_manager as cm
 from exceptions.fs_exceptions import (
     RomAlreadyExistsException,
     RomsNotFoundException,
 )
 from handler.metadata.base_handler import UniversalPlatformSlug as UPS
+from handler.redis_handler import async_cache
+from logger.logger import log
 from models.platform import Platform
 from models.rom import Rom, RomFile, RomFileCategory
-from utils.archive_7zip import process_file_7z
 from utils.filesystem import iter_files
-from utils.hashing import crc32_to_hex
+from utils.hashing import FileHash, calculate_files_hashes
 
 from .base_handler import (
     LANGUAGES_BY_SHORTCODE,
@@ -89,7 +91,21 @@ NON_HASHABLE_PLATFORMS = frozenset(
     )
 )
 
-FILE_READ_CHUNK_SIZE = 1024 * 8
+
+# Hashes of every scanned rom, reused while none of its files change
+ROM_FILE_HASHES_KEY: Final = "romm:rom_file_hashes"
+# RetroAchievements hashes of every scanned rom, reused while its content is the same
+ROM_RA_HASHES_KEY: Final = "romm:rom_ra_hashes"
+
+
+# Snapshot of the roms folder of every platform, used to skip unchanged folders
+ROMS_INVENTORY_KEY: Final = "romm:roms_inventory"
+
+
+class RomsInventory(TypedDict):
+    mtime_ns: int  # Modification time of the roms folder
+    rom_count: int  # Roms of the platform in the database when saved
+    entries: dict[str, list[int]]  # Name to [is_dir, size, mtime_ns]
 
 
 class FSRom(TypedDict):
@@ -103,12 +119,6 @@ class FSRom(TypedDict):
     ra_hash: str
 
 
-class FileHash(TypedDict):
-    crc_hash: str
-    md5_hash: str
-    sha1_hash: str
-
-
 def is_compressed_file(file_path: str) -> bool:
     mime = magic.Magic(mime=True)
     file_type = mime.from_file(file_path)
@@ -118,83 +128,39 @@ def is_compressed_file(file_path: str) -> bool:
     )
 
 
-def read_basic_file(file_path: os.PathLike[str]) -> Iterator[bytes]:
-    with open(file_path, "rb") as f:
-        while chunk := f.read(FILE_READ_CHUNK_SIZE):
-            yield chunk
-
-
-def read_zip_file(file: str | os.PathLike[str] | IO[bytes]) -> Iterator[bytes]:
-    try:
-        with zipfile.ZipFile(file, "r") as z:
-            # Find the biggest file in the archive
-            largest_file = max(z.infolist(), key=lambda x: x.file_size)
-            with z.open(largest_file, "r") as f:
-                while chunk := f.read(FILE_READ_CHUNK_SIZE):
-                    yield chunk
-    except zipfile.BadZipFile:
-        if isinstance(file, Path):
-            for chunk in read_basic_file(file):
-                yield chunk
-
-
-def read_tar_file(
-    file_path: Path, mode: Literal["r", "r:*", "r:", "r:gz", "r:bz2", "r:xz"] = "r"
-) -> Iterator[bytes]:
-    try:
-        with tarfile.open(file_path, mode) as f:
-            regular_files = [member for member in f.getmembers() if member.isfile()]
-
-            # Find the largest file among regular files only
-            largest_file = max(regular_files, key=lambda x: x.size)
-            with f.extractfile(largest_file) as ef:  # type: ignore
-                while chunk := ef.read(FILE_READ_CHUNK_SIZE):
-                    yield chunk
-    except tarfile.ReadError:
-        for chunk in read_basic_file(file_path):
-            yield chunk
-
-
-def read_gz_file(file_path: Path) -> Iterator[bytes]:
-    return read_tar_file(file_path, "r:gz")
-
-
-def process_7z_file(
-    file_path: Path,
-    fn_hash_update: Callable[[bytes | bytearray], None],
-) -> None:
-    processed = process_file_7z(
-        file_path=file_path,
-        fn_hash_update=fn_hash_update,
-    )
-    if not processed:
-        for chunk in read_basic_file(file_path):
-            fn_hash_update(chunk)
-
-
-def read_bz2_file(file_path: Path) -> Iterator[bytes]:
-    try:
-        with bz2.BZ2File(file_path, "rb") as f:
-            while chunk := f.read(FILE_READ_CHUNK_SIZE):
-                yield chunk
-    except EOFError:
-        for chunk in read_basic_file(file_path):
-            yield chunk
-
-
 def category_matches(category: str, path_parts: list[str]):
     return category in path_parts or f"{category}s" in path_parts
 
 
-DEFAULT_CRC_C = 0
-DEFAULT_MD5_H_DIGEST = hashlib.md5(usedforsecurity=False).digest()
-DEFAULT_SHA1_H_DIGEST = hashlib.sha1(usedforsecurity=False).digest()
+# Pool hashing the roms of the running scan, see FSRomsHandler.hashing_pool
+_hashing_executor: ContextVar[ProcessPoolExecutor | None] = ContextVar(
+    "hashing_executor", default=None
+)
 
 
 class FSRomsHandler(FSHandler):
     def __init__(self) -> None:
         super().__init__(base_path=LIBRARY_BASE_PATH)
 
+    @contextlib.contextmanager
+    def hashing_pool(self) -> Iterator[None]:
+        """Hash roms in a pool of worker processes while in this context.
+
+        The pool is shut down when leaving the context, as its workers would
+        otherwise outlive the job running the scan.
+        """
+        # Spawn workers, as forking a multi-threaded process can deadlock the child
+        executor = ProcessPoolExecutor(
+            max_workers=SCAN_HASHING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        token = _hashing_executor.set(executor)
+        try:
+            yield
+        finally:
+            _hashing_executor.reset(token)
+            executor.shutdown(cancel_futures=True)
+
     def get_roms_fs_structure(self, fs_slug: str) -> str:
         cnfg = cm.get_config()
         return (
@@ -285,15 +251,15 @@ class FSRomsHandler(FSHandler):
             sha1_hash=file_hash["sha1_hash"],
         )
 
-    async def get_rom_files(self, rom: Rom) -> tuple[list[RomFile], str, str, str, str]:
-        from adapters.services.rahasher import RAHasherService
+    async def get_rom_files(
+        self, rom: Rom, use_cached_hashes: bool = True
+    ) -> tuple[list[RomFile], str, str, str, str]:
         from handler.metadata import meta_ra_handler
 
         rel_roms_path = self.get_roms_fs_structure(
             rom.platform.fs_slug
         )  # Relative path to roms
         abs_fs_path = self.validate_path(rel_roms_path)  # Absolute path to roms
-        rom_files: list[RomFile] = []
 
         # Skip hashing games for platforms that don't have a hash database
         hashable_platform = rom.platform_slug not in NON_HASHABLE_PLATFORMS
@@ -301,17 +267,19 @@ class FSRomsHandler(FSHandler):
         excluded_file_names = cm.get_config().EXCLUDED_MULTI_PARTS_FILES
         excluded_file_exts = cm.get_config().EXCLUDED_MULTI_PARTS_EXT
 
-        rom_crc_c = 0
-        rom_md5_h = hashlib.md5(usedforsecurity=False)
-        rom_sha1_h = hashlib.sha1(usedforsecurity=False)
         rom_ra_h = ""
+        # RA platform and path to run RAHasher on, if the rom has a RA hash
+        ra_hash_target: tuple[int, str] | None = None
+
+        # Absolute directory, relative directory and name of each file in the rom
+        rom_file_paths: list[tuple[Path, Path, str]] = []
 
         # Check if rom is a multi-part rom
         if os.path.isdir(f"{abs_fs_path}/{rom.fs_name}"):
             # Calculate the RA hash if the platform has a slug that matches a known RA slug
             ra_platform = meta_ra_handler.get_platform(rom.platform_slug)
             if ra_platform and ra_platform["ra_id"]:
-                rom_ra_h = await RAHasherService().calculate_hash(
+                ra_hash_target = (
                     ra_platform["ra_id"],
                     f"{abs_fs_path}/{rom.fs_name}/*",
                 )
@@ -330,186 +298,244 @@ class FSRomsHandler(FSHandler):
                 ):
                     continue
 
-                if hashable_platform:
-                    try:
-                        crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h = (
-                            self._calculate_rom_hashes(
-                                Path(f_path, file_name),
-                                rom_crc_c,
-                                rom_md5_h,
-                                rom_sha1_h,
-                            )
-                        )
-                    except zlib.error:
-                        crc_c = 0
-                        md5_h = hashlib.md5(usedforsecurity=False)
-                        sha1_h = hashlib.sha1(usedforsecurity=False)
-
-                    file_hash = FileHash(
-                        crc_hash=crc32_to_hex(crc_c) if crc_c != DEFAULT_CRC_C else "",
-                        md5_hash=(
-                            md5_h.hexdigest()
-                            if md5_h.digest() != DEFAULT_MD5_H_DIGEST
-                            else ""
-                        ),
-                        sha1_hash=(
-                            sha1_h.hexdigest()
-                            if sha1_h.digest() != DEFAULT_SHA1_H_DIGEST
-                            else ""
-                        ),
-                    )
-                else:
-                    file_hash = FileHash(
-                        crc_hash="",
-                        md5_hash="",
-                        sha1_hash="",
-                    )
-
-                rom_files.append(
-                    self._build_rom_file(
-                        f_path.relative_to(self.base_path),
-                        file_name,
-                        file_hash,
-                    )
+                rom_file_paths.append(
+                    (f_path, f_path.relative_to(self.base_path), file_name)
                 )
-        elif hashable_platform:
-            try:
-                crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h = (
-                    self._calculate_rom_hashes(
-                        Path(abs_fs_path, rom.fs_name), rom_crc_c, rom_md5_h, rom_sha1_h
+        else:
+            if hashable_platform:
+                # Calculate the RA hash if the platform has a slug that matches a known RA slug
+                ra_platform = meta_ra_handler.get_platform(rom.platform_slug)
+                if ra_platform and ra_platform["ra_id"]:
+                    ra_hash_target = (
+                        ra_platform["ra_id"],
+                        f"{abs_fs_path}/{rom.fs_name}",
                     )
-                )
-            except zlib.error:
-                crc_c = 0
-                md5_h = hashlib.md5(usedforsecurity=False)
-                sha1_h = hashlib.sha1(usedforsecurity=False)
 
-            # Calculate the RA hash if the platform has a slug that matches a known RA slug
-            ra_platform = meta_ra_handler.get_platform(rom.platform_slug)
-            if ra_platform and ra_platform["ra_id"]:
-                rom_ra_h = await RAHasherService().calculate_hash(
-                    ra_platform["ra_id"],
-                    f"{abs_fs_path}/{rom.fs_name}",
-                )
+            rom_file_paths.append((abs_fs_path, Path(rel_roms_path), rom.fs_name))
 
-            file_hash = FileHash(
-                crc_hash=crc32_to_hex(crc_c) if crc_c != DEFAULT_CRC_C else "",
-                md5_hash=(
-                    md5_h.hexdigest() if md5_h.digest() != DEFAULT_MD5_H_DIGEST else ""
-                ),
-                sha1_hash=(
-                    sha1_h.hexdigest()
-                    if sha1_h.digest() != DEFAULT_SHA1_H_DIGEST
-                    else ""
-                ),
-            )
-            rom_files.append(
-                self._build_rom_file(Path(rel_roms_path), rom.fs_name, file_hash)
+        abs_file_paths = [
+            Path(abs_path, file_name) for abs_path, _, file_name in rom_file_paths
+        ]
+
+        if hashable_platform:
+            file_hashes, rom_hash = await self._get_files_hashes(
+                f"{rel_roms_path}/{rom.fs_name}",
+                abs_file_paths,
+                use_cached_hashes=use_cached_hashes,
             )
         else:
-            file_hash = FileHash(
-                crc_hash="",
-                md5_hash="",
-                sha1_hash="",
+            file_hashes = [
+                FileHash(crc_hash="", md5_hash="", sha1_hash="") for _ in rom_file_paths
+            ]
+            rom_hash = FileHash(crc_hash="", md5_hash="", sha1_hash="")
+
+        if ra_hash_target:
+            rom_ra_h = await self._get_ra_hash(
+                f"{rel_roms_path}/{rom.fs_name}",
+                *ra_hash_target,
+                sha1_hash=rom_hash["sha1_hash"],
+                file_paths=abs_file_paths,
+                use_cached_hashes=use_cached_hashes,
             )
-            rom_files.append(
-                self._build_rom_file(Path(rel_roms_path), rom.fs_name, file_hash)
+
+        rom_files = [
+            self._build_rom_file(rel_path, file_name, file_hash)
+            for (_, rel_path, file_name), file_hash in zip(
+                rom_file_paths, file_hashes, strict=True
             )
+        ]
 
         return (
             rom_files,
-            crc32_to_hex(rom_crc_c) if rom_crc_c != DEFAULT_CRC_C else "",
-            rom_md5_h.hexdigest() if rom_md5_h.digest() != DEFAULT_MD5_H_DIGEST else "",
-            (
-                rom_sha1_h.hexdigest()
-                if rom_sha1_h.digest() != DEFAULT_SHA1_H_DIGEST
-                else ""
-            ),
+            rom_hash["crc_hash"],
+            rom_hash["md5_hash"],
+            rom_hash["sha1_hash"],
             rom_ra_h,
         )
 
-    def _calculate_rom_hashes(
-        self,
-        file_path: Path,
-        rom_crc_c: int,
-        rom_md5_h: Any,
-        rom_sha1_h: Any,
-    ) -> tuple[int, int, Any, Any, Any, Any]:
-        extension = Path(file_path).suffix.lower()
-        mime = magic.Magic(mime=True)
+    def _get_files_signature(self, file_paths: list[Path]) -> list[list] | None:
+        """Identify the current state of the files by their path, size, mtime and inode."""
         try:
-            file_type = mime.from_file(file_path)
+            return [
+                [
+                    str(file_path.relative_to(self.base_path)),
+                    (stat := file_path.stat()).st_size,
+                    stat.st_mtime_ns,
+                    stat.st_ino,
+                ]
+                for file_path in file_paths
+            ]
+        except (FileNotFoundError, PermissionError, ValueError):
+            return None
+
+    async def _get_files_hashes(
+        self, cache_field: str, file_paths: list[Path], use_cached_hashes: bool = True
+    ) -> tuple[list[FileHash], FileHash]:
+        """Get the hashes of the files of a rom, only reading them if any file changed
 
-            crc_c = 0
-            md5_h = hashlib.md5(usedforsecurity=False)
-            sha1_h = hashlib.sha1(usedforsecurity=False)
+        Args:
+            cache_field: Relative path to the rom, used as the cache entry name
+            file_paths: Absolute paths to the files of the rom
+            use_cached_hashes: Whether cached hashes can be reused
+        """
+        files_signature = self._get_files_signature(file_paths)
+
+        if use_cached_hashes and files_signature:
+            cached_entry = await async_cache.hget(ROM_FILE_HASHES_KEY, cache_field)
+            if cached_entry:
+                cached_hashes = json.loads(cached_entry)
+                if cached_hashes["files"] == files_signature:
+                    log.debug(f"Reusing cached file hashes for {cache_field}")
+                    return cached_hashes["file_hashes"], cached_hashes["rom_hash"]
+
+        file_hashes, rom_hash = await self._calculate_files_hashes(file_paths)
+
+        if files_signature:
+            await async_cache.hset(
+                ROM_FILE_HASHES_KEY,
+                cache_field,
+                json.dumps(
+                    {
+                        "files": files_signature,
+                        "file_hashes": file_hashes,
+                        "rom_hash": rom_hash,
+                    }
+                ),
+            )
 
-            def update_hashes(chunk: bytes | bytearray):
-                md5_h.update(chunk)
-                rom_md5_h.update(chunk)
+        return file_hashes, rom_hash
 
-                sha1_h.update(chunk)
-                rom_sha1_h.update(chunk)
+    async def _get_ra_hash(
+        self,
+        cache_field: str,
+        ra_platform_id: int,
+        hash_path: str,
+        sha1_hash: str,
+        file_paths: list[Path],
+        use_cached_hashes: bool = True,
+    ) -> str:
+        """Get the RetroAchievements hash of a rom, only running RAHasher if it changed
+
+        Hashes are reused while the RA platform and SHA1 of the rom are the same, or
+        the size and modification time of its files when the rom isn't hashed.
 
-                nonlocal crc_c
-                crc_c = binascii.crc32(chunk, crc_c)
-                nonlocal rom_crc_c
-                rom_crc_c = binascii.crc32(chunk, rom_crc_c)
+        Args:
+            cache_field: Relative path to the rom, used as the cache entry name
+        """
+        from adapters.services.rahasher import RAHasherService
 
-            if extension == ".zip" or file_type == "application/zip":
-                for chunk in read_zip_file(file_path):
-                    update_hashes(chunk)
+        content_key = sha1_hash
+        if not content_key:
+            files_signature = self._get_files_signature(file_paths)
+            if files_signature:
+                content_key = hashlib.sha1(
+                    json.dumps(files_signature).encode(), usedforsecurity=False
+                ).hexdigest()
+        content_key = f"{ra_platform_id}:{content_key}" if content_key else ""
+
+        if use_cached_hashes and content_key:
+            cached_entry = await async_cache.hget(ROM_RA_HASHES_KEY, cache_field)
+            if cached_entry:
+                cached_ra_hash = json.loads(cached_entry)
+                if cached_ra_hash["content"] == content_key:
+                    log.debug(f"Reusing cached RA hash for {hash_path}")
+                    return cached_ra_hash["ra_hash"]
+
+        ra_hash = await RAHasherService().calculate_hash(ra_platform_id, hash_path)
+        # Failed runs are retried on the next scan
+        if ra_hash and content_key:
+            await async_cache.hset(
+                ROM_RA_HASHES_KEY,
+                cache_field,
+                json.dumps({"content": content_key, "ra_hash": ra_hash}),
+            )
 
-            elif extension == ".tar" or file_type == "application/x-tar":
-                for chunk in read_tar_file(file_path):
-                    update_hashes(chunk)
+        return ra_hash
 
-            elif extension == ".gz" or file_type == "application/x-gzip":
-                for chunk in read_gz_file(file_path):
-                    update_hashes(chunk)
+    async def remove_cached_hashes(self, rom_paths: Iterable[str]) -> None:
+        """Forget the cached hashes of roms that were removed, renamed or went missing
 
-            elif extension == ".7z" or file_type == "application/x-7z-compressed":
-                process_7z_file(
-                    file_path=file_path,
-                    fn_hash_update=update_hashes,
-                )
+        Args:
+            rom_paths: Relative paths to the roms
+        """
+        rom_paths = list(rom_paths)
+        if not rom_paths:
+            return
+
+        async with async_cache.pipeline() as pipe:
+            await pipe.hdel(ROM_FILE_HASHES_KEY, *rom_paths)
+            await pipe.hdel(ROM_RA_HASHES_KEY, *rom_paths)
+            await pipe.execute()
+
+    async def _calculate_files_hashes(
+        self, file_paths: list[Path]
+    ) -> tuple[list[FileHash], FileHash]:
+        """Hash the files of a rom off the event loop.
+
+        Files are hashed in the worker processes of the scan, or in a thread
+        outside of scans.
+        """
+        executor = _hashing_executor.get()
+        if executor is None:
+            return await asyncio.to_thread(calculate_files_hashes, file_paths)
 
-            elif extension == ".bz2" or file_type == "application/x-bzip2":
-                for chunk in read_bz2_file(file_path):
-                    update_hashes(chunk)
-
-            else:
-                for chunk in read_basic_file(file_path):
-                    update_hashes(chunk)
-
-            return crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h
-        except (FileNotFoundError, PermissionError):
-            return (
-                0,
-                rom_crc_c,
-                hashlib.md5(usedforsecurity=False),
-                rom_md5_h,
-                hashlib.sha1(usedforsecurity=False),
-                rom_sha1_h,
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                executor, calculate_files_hashes, file_paths
             )
+        except BrokenProcessPool:
+            log.warning("Hashing process pool is broken, hashing in a thread")
+            return await asyncio.to_thread(calculate_files_hashes, file_paths)
 
-    async def get_roms(self, platform: Platform) -> list[FSRom]:
-        """Gets all filesystem roms for a platform
+    async def get_roms_inventory(
+        self, platform: Platform, previous: RomsInventory | None = None
+    ) -> RomsInventory:
+        """Takes a snapshot of the roms folder of a platform
 
         Args:
             platform: platform where roms belong
+            previous: earlier snapshot, reused as is if the folder didn't change
         Returns:
-            list with all the filesystem roms for a platform
+            names, sizes and modification times of every entry in the roms folder
         """
-        try:
-            rel_roms_path = self.get_roms_fs_structure(
-                platform.fs_slug
-            )  # Relative path to roms
+        rel_roms_path = self.get_roms_fs_structure(platform.fs_slug)
+        roms_path = self.validate_path(rel_roms_path)
 
-            fs_single_roms = await self.list_files(path=rel_roms_path)
-            fs_multi_roms = await self.list_directories(path=rel_roms_path)
-        except FileNotFoundError as e:
-            raise RomsNotFoundException(platform=platform.fs_slug) from e
+        lock = await self._get_file_lock(str(roms_path))
+        async with lock:
+            try:
+                # Read before listing, so changes made while listing show up next time
+                mtime_ns = os.stat(roms_path).st_mtime_ns
+                if previous and previous["mtime_ns"] == mtime_ns:
+                    return previous
+
+                entries: dict[str, list[int]] = {}
+                with os.scandir(roms_path) as it:
+                    for entry in it:
+                        try:
+                            entry_stat = entry.stat()
+                            entries[entry.name] = [
+                                int(entry.is_dir()),
+                                entry_stat.st_size,
+                                entry_stat.st_mtime_ns,
+                            ]
+                        except OSError:
+                            # Broken symlinks are listed as files
+                            entries[entry.name] = [0, 0, 0]
+            except (FileNotFoundError, NotADirectoryError) as e:
+                raise RomsNotFoundException(platform=platform.fs_slug) from e
+
+        return RomsInventory(mtime_ns=mtime_ns, rom_count=0, entries=entries)
+
+    def get_roms_from_inventory(self, inventory: RomsInventory) -> list[FSRom]:
+        """Gets the filesystem roms listed in a snapshot of the roms folder"""
+        fs_single_roms = [
+            name for name, (is_dir, _, _) in inventory["entries"].items() if not is_dir
+        ]
+        fs_multi_roms = [
+            name for name, (is_dir, _, _) in inventory["entries"].items() if is_dir
+        ]
 
         fs_roms: list[dict] = [
             {"fs_name": rom, "flat": True, "nested": False}
@@ -536,6 +562,50 @@ class FSRomsHandler(FSHandler):
             key=lambda rom: rom["fs_name"],
         )
 
+    def get_roms_inventory_changes(
+        self, previous: RomsInventory, current: RomsInventory
+    ) -> tuple[set[str], set[str]]:
+        """Compares two snapshots of a roms folder
+
+        Returns:
+            names of the roms added or modified, and names of the roms removed
+        """
+        previous_roms = {
+            rom["fs_name"] for rom in self.get_roms_from_inventory(previous)
+        }
+        current_roms = {rom["fs_name"] for rom in self.get_roms_from_inventory(current)}
+
+        changed_roms = {
+            fs_name
+            for fs_name in current_roms
+            if fs_name not in previous_roms
+            or previous["entries"].get(fs_name) != current["entries"][fs_name]
+        }
+        return changed_roms, previous_roms - current_roms
+
+    async def get_saved_roms_inventory(
+        self, platform: Platform
+    ) -> RomsInventory | None:
+        inventory = await async_cache.hget(ROMS_INVENTORY_KEY, platform.fs_slug)
+        return json.loads(inventory) if inventory else None
+
+    async def save_roms_inventory(
+        self, platform: Platform, inventory: RomsInventory
+    ) -> None:
+        await async_cache.hset(
+            ROMS_INVENTORY_KEY, platform.fs_slug, json.dumps(inventory)
+        )
+
+    async def get_roms(self, platform: Platform) -> list[FSRom]:
+        """Gets all filesystem roms for a platform
+
+        Args:
+            platform: platform where roms belong
+        Returns:
+            list with all the filesystem roms for a platform
+        """
+        return self.get_roms_from_inventory(await self.get_roms_inventory(platform))
+
     async def rename_fs_rom(self, old_name: str, new_name: str, fs_path: str) -> None:
         if new_name != old_name:
             file_path = f"{fs_path}/{new_name}"
@@ -1,14 +1,26 @@
 import abc
+import asyncio
+import copy
 import enum
+import functools
 import json
 import re
+import time
 import unicodedata
+from collections.abc import Awaitable, Callable
 from functools import lru_cache
 from pathlib import Path
-from typing import Final, NotRequired, TypedDict
+from typing import Any, Final, NotRequired, ParamSpec, TypedDict, TypeVar
 
+import aiohttp
+import httpx
+from fastapi import HTTPException
 from strsimpy.jaro_winkler import JaroWinkler
 
+from config import (
+    PROVIDER_CIRCUIT_BREAKER_COOLDOWN_SECONDS,
+    PROVIDER_CIRCUIT_BREAKER_THRESHOLD,
+)
 from handler.redis_handler import async_cache
 from logger.logger import log
 from tasks.scheduled.update_switch_titledb import (
@@ -16,9 +28,14 @@ from tasks.scheduled.update_switch_titledb import (
     SWITCH_TITLEDB_INDEX_KEY,
     update_switch_titledb_task,
 )
+from utils.cache import get_provider_cache_digest
+from utils.rate_limit import ProviderRateLimitedException
 
 jarowinkler = JaroWinkler()
 
+P = ParamSpec("P")
+R = TypeVar("R")
+
 
 METADATA_FIXTURES_DIR: Final = Path(__file__).parent / "fixtures"
 
@@ -55,6 +72,52 @@ class BaseRom(TypedDict):
     url_manual: NotRequired[str]
 
 
+# Lookups currently running, shared by all the identical calls made meanwhile
+_in_flight_lookups: dict[tuple[Any, ...], asyncio.Task] = {}
+
+
+def single_flight(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+    """Share a single in-flight call between concurrent identical calls of a method.
+
+    Sibling ROMs (regional variants, revisions, discs) often look up the same
+    search term or id at the same time during a scan; only the first call
+    reaches the provider, the others wait for its result. Calls made once the
+    first one finished aren't affected.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        # Calls are shared per handler instance and event loop
+        key = (
+            asyncio.get_running_loop(),
+            id(args[0]),
+            func.__qualname__,
+            get_provider_cache_digest(*args[1:], **kwargs),
+        )
+
+        task = _in_flight_lookups.get(key)
+        if task is not None:
+            log.debug(f"Waiting for identical in-flight call to {func.__qualname__}")
+            # Callers may modify the result they get
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(func(*args, **kwargs))
+        _in_flight_lookups[key] = task
+
+        def _done(task: asyncio.Task) -> None:
+            if _in_flight_lookups.get(key) is task:
+                del _in_flight_lookups[key]
+            # Mark the exception as retrieved, if all the callers were cancelled
+            if not task.cancelled():
+                task.exception()
+
+        task.add_done_callback(_done)
+        # The call keeps running for the other callers if this one is cancelled
+        return await asyncio.shield(task)
+
+    return wrapper
+
+
 # This caches results to avoid repeated normalization of the same search term
 @lru_cache(maxsize=1024)
 def _normalize_search_term(
@@ -81,6 +144,178 @@ def _normalize_search_term(
     return name.strip()
 
 
+def _jaro_winkler_upper_bound(len_a: int, len_b: int) -> float:
+    """Highest Jaro-Winkler similarity two strings of these lengths can have.
+
+    Reached when all the characters of the shortest string match, in order,
+    as a prefix of the longest one.
+    """
+    shortest, longest = min(len_a, len_b), max(len_a, len_b)
+    if not shortest:
+        return 1.0 if not longest else 0.0
+
+    jaro = (shortest / len_a + shortest / len_b + 1) / 3
+    if jaro <= jarowinkler.get_threshold():
+        return jaro
+    prefix_scale = min(jarowinkler.jw_coef, 1.0 / longest) * shortest
+    return jaro + prefix_scale * (1 - jaro)
+
+
+class MatchCandidates:
+    """Game names normalized once, to be scored against any number of search terms."""
+
+    def __init__(self, game_names: list[str], split_game_name: bool = False) -> None:
+        # Names with the same normalized form get the same score, so only the
+        # first one can be the best match
+        self.names: dict[str, str] = {}
+        for game_name in game_names:
+            # If the game name is split, normalize the last term
+            if split_game_name and MetadataHandler.SEARCH_TERM_SPLIT_PATTERN.search(
+                game_name
+            ):
+                normalized = _normalize_search_term(
+                    MetadataHandler.SEARCH_TERM_SPLIT_PATTERN.split(game_name)[-1]
+                )
+            else:
+                normalized = _normalize_search_term(game_name)
+            self.names.setdefault(normalized, game_name)
+
+        self.lengths = {normalized: len(normalized) for normalized in self.names}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def extract(
+        self, search_term: str, score_cutoff: float = 0.0, limit: int | None = None
+    ) -> list[tuple[str, float]]:
+        """
+        Score the candidates against a search term.
+
+        Candidates that can't reach the cutoff, judging by their length alone,
+        aren't compared at all.
+
+        Returns:
+            List of (game_name, similarity_score) tuples with a score of at least
+            `score_cutoff`, best first and in candidate order for equal scores
+        """
+        search_term = _normalize_search_term(search_term)
+
+        exact_match = self.names.get(search_term)
+        if limit == 1 and exact_match is not None:
+            return [(exact_match, 1.0)]
+
+        search_term_length = len(search_term)
+        best_score = 0.0
+        matches: list[tuple[str, float]] = []
+
+        for normalized, game_name in self.names.items():
+            upper_bound = _jaro_winkler_upper_bound(
+                search_term_length, self.lengths[normalized]
+            )
+            if upper_bound < score_cutoff:
+                continue
+            # Only a strictly better score replaces the best match
+            if limit == 1 and upper_bound <= best_score:
+                continue
+
+            score = jarowinkler.similarity(search_term, normalized)
+            if score < score_cutoff or (limit == 1 and score <= best_score):
+                continue
+
+            if limit == 1:
+                best_score = score
+                matches = [(game_name, score)]
+            else:
+                matches.append((game_name, score))
+
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:limit] if limit is not None else matches
+
+
+# Errors raised when a provider can't be reached, or is throttling requests
+PROVIDER_FAILURES: Final = (
+    HTTPException,
+    httpx.TransportError,
+    aiohttp.ClientError,
+    TimeoutError,
+)
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    if isinstance(exc, ProviderRateLimitedException):
+        return True
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500
+    return isinstance(exc, PROVIDER_FAILURES)
+
+
+class CircuitBreaker:
+    """Stop calling a provider that keeps failing, for a cool-down period.
+
+    The circuit opens after `threshold` consecutive failures. Once the
+    cool-down is over, a single caller probes the provider with its heartbeat,
+    closing the circuit if the provider answers, or starting a new cool-down
+    otherwise.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        heartbeat: Callable[[], Awaitable[bool]],
+        threshold: int = PROVIDER_CIRCUIT_BREAKER_THRESHOLD,
+        cooldown_seconds: float = PROVIDER_CIRCUIT_BREAKER_COOLDOWN_SECONDS,
+    ) -> None:
+        self.name = name
+        self.heartbeat = heartbeat
+        self.threshold = threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    async def allow_request(self) -> bool:
+        """Whether the provider can be called, probing it if the cool-down is over."""
+        if self.opened_at is None:
+            return True
+
+        if self._probing or time.monotonic() - self.opened_at < self.cooldown_seconds:
+            return False
+
+        self._probing = True
+        try:
+            healthy = await self.heartbeat()
+        except Exception:
+            healthy = False
+        finally:
+            self._probing = False
+
+        if not healthy:
+            log.warning(f"{self.name} is still unavailable, skipping it")
+            self.opened_at = time.monotonic()
+            return False
+
+        log.info(f"{self.name} is available again")
+        self.failures = 0
+        self.opened_at = None
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is None and self.failures >= self.threshold:
+            log.warning(
+                f"{self.name} failed {self.failures} times in a row, skipping it "
+                f"for {self.cooldown_seconds}s"
+            )
+            self.opened_at = time.monotonic()
+
+
 class MetadataHandler(abc.ABC):
     SEARCH_TERM_SPLIT_PATTERN = re.compile(r"[\:\-\/]")
     SEARCH_TERM_NORMALIZER = re.compile(r"\s*[:-]\s*")
@@ -90,6 +325,14 @@ class MetadataHandler(abc.ABC):
     def is_enabled(cls) -> bool:
         """Return whether this metadata handler is enabled."""
 
+    async def heartbeat(self) -> bool:
+        """Return whether the provider can be reached."""
+        return self.is_enabled()
+
+    @functools.cached_property
+    def circuit_breaker(self) -> CircuitBreaker:
+        return CircuitBreaker(type(self).__name__, self.heartbeat)
+
     def normalize_cover_url(self, url: str) -> str:
         return url if not url else f"https:{url.replace('https:', '')}"
 
@@ -101,7 +344,7 @@ class MetadataHandler(abc.ABC):
     def find_best_match(
         self,
         search_term: str,
-        game_names: list[str],
+        game_names: "list[str] | MatchCandidates",
         min_similarity_score: float = 0.75,
         split_game_name: bool = False,
     ) -> tuple[str | None, float]:
@@ -110,41 +353,44 @@ class MetadataHandler(abc.ABC):
 
         Args:
             search_term: The search term to match
-            game_names: List of game names to check against
+            game_names: List of game names to check against, or candidates prepared
+                with `MatchCandidates` when matching many search terms
             min_similarity_score: Minimum similarity score to consider a match
+            split_game_name: Match the last part of split game names
 
         Returns:
             Tuple of (best_match_name, similarity_score) or (None, 0.0) if no good match
         """
-        if not game_names:
-            return None, 0.0
-
-        best_match = None
-        best_score = 0.0
-        search_term_normalized = self.normalize_search_term(search_term)
-
-        for game_name in game_names:
-            game_name_normalized = self.normalize_search_term(game_name)
-
-            # If the game name is split, normalize the last term
-            if split_game_name and re.search(self.SEARCH_TERM_SPLIT_PATTERN, game_name):
-                game_name_normalized = self.normalize_search_term(
-                    re.split(self.SEARCH_TERM_SPLIT_PATTERN, game_name)[-1]
-                )
-
-            score = jarowinkler.similarity(search_term_normalized, game_name_normalized)
-            if score > best_score:
-                best_score = score
-                best_match = game_name
-
-                # Early exit for perfect match
-                if score == 1.0:
-                    break
+        candidates = (
+            game_names
+            if isinstance(game_names, MatchCandidates)
+            else MatchCandidates(game_names, split_game_name=split_game_name)
+        )
+        matches = candidates.extract(
+            search_term, score_cutoff=min_similarity_score, limit=1
+        )
+        return matches[0] if matches else (None, 0.0)
 
-        if best_score >= min_similarity_score:
-            return best_match, best_score
+    def find_best_matches(
+        self,
+        search_terms: list[str],
+        game_names: list[str],
+        min_similarity_score: float = 0.75,
+        split_game_name: bool = False,
+    ) -> list[tuple[str | None, float]]:
+        """
+        Find the best matching game name for each search term, normalizing the
+        candidates only once.
 
-        return None, 0.0
+        Returns:
+            List of (best_match_name, similarity_score) tuples, in the order of the
+            search terms
+        """
+        candidates = MatchCandidates(game_names, split_game_name=split_game_name)
+        return [
+            self.find_best_match(search_term, candidates, min_similarity_score)
+            for search_term in search_terms
+        ]
 
     async def _ps2_opl_format(self, match: re.Match[str], search_term: str) -> str:
         serial_code = match.group(1)
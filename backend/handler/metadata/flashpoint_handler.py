@@ -8,12 +8,19 @@ import yarl
 from fastapi import HTTPException, status
 
 from config import FLASHPOINT_API_ENABLED
+from handler.metadata.base_handler import UniversalPlatformSlug as UPS
+from handler.redis_handler import async_cache
 from logger.logger import log
 from utils import get_version
+from utils.cache import bypass_provider_cache, cached_provider_response
 from utils.context import ctx_httpx_client
+from utils.rate_limit import (
+    ProviderRateLimitedException,
+    acquire_rate_limit,
+    backoff_rate_limit,
+)
 
-from .base_handler import MetadataHandler
-from .base_handler import UniversalPlatformSlug as UPS
+from .base_handler import MetadataHandler, is_provider_failure, single_flight
 
 
 class FlashpointPlatform(TypedDict):
@@ -105,6 +112,7 @@ class FlashpointHandler(MetadataHandler):
     def is_enabled(cls) -> bool:
         return FLASHPOINT_API_ENABLED
 
+    @cached_provider_response("flashpoint")
     async def _request(self, url: str, query: dict) -> dict:
         """
         Sends a request to Flashpoint API.
@@ -132,11 +140,26 @@ class FlashpointHandler(MetadataHandler):
 
         headers = {"user-agent": f"RomM/{get_version()}"}
 
+        if not await acquire_rate_limit(async_cache, "flashpoint"):
+            log.warning(
+                "Flashpoint rate limit reached, skipping request to URL=%s", url
+            )
+            raise ProviderRateLimitedException("flashpoint")
+
         try:
             res = await httpx_client.get(url, headers=headers, timeout=60)
             res.raise_for_status()
             return res.json()
         except (httpx.HTTPStatusError, httpx.ConnectError, httpx.ReadTimeout) as exc:
+            if (
+                isinstance(exc, httpx.HTTPStatusError)
+                and exc.response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            ):
+                await backoff_rate_limit(
+                    async_cache, "flashpoint", exc.response.headers
+                )
+                raise ProviderRateLimitedException("flashpoint") from exc
+
             log.warning(
                 "Connection error: can't connect to Flashpoint API", exc_info=True
             )
@@ -153,13 +176,15 @@ class FlashpointHandler(MetadataHandler):
             return False
 
         try:
-            response = await self._request(self.platforms_url, {})
+            with bypass_provider_cache():
+                response = await self._request(self.platforms_url, {})
         except Exception as e:
             log.error("Error checking Flashpoint API: %s", e)
             return False
 
         return bool(response)
 
+    @single_flight
     async def search_games(self, search_term: str) -> list[FlashpointGame]:
         """
         Search for games in Flashpoint database.
@@ -210,6 +235,10 @@ class FlashpointHandler(MetadataHandler):
             ]
 
         except Exception as exc:
+            # Failures are left to the caller, they aren't missing results
+            if is_provider_failure(exc):
+                raise
+
             log.error("Error searching Flashpoint API: %s", exc)
             return []
 
@@ -323,6 +352,7 @@ class FlashpointHandler(MetadataHandler):
             for game in games
         ]
 
+    @single_flight
     async def get_rom_by_id(self, flashpoint_id: str) -> FlashpointRom:
         """
         Get ROM information by Flashpoint ID.
@@ -398,6 +428,10 @@ class FlashpointHandler(MetadataHandler):
             )
 
         except Exception as exc:
+            # Failures are left to the caller, they aren't missing results
+            if is_provider_failure(exc):
+                raise
+
             log.error("Error getting ROM by ID from Flashpoint API: %s", exc)
             return FlashpointRom(flashpoint_id=None)
 
@@ -7,10 +7,17 @@ import pydash
 from fastapi import HTTPException, status
 
 from config import DEV_MODE, HASHEOUS_API_ENABLED
+from handler.redis_handler import async_cache
 from logger.logger import log
 from models.rom import RomFile
 from utils import get_version
+from utils.cache import cached_provider_response
 from utils.context import ctx_httpx_client
+from utils.rate_limit import (
+    ProviderRateLimitedException,
+    acquire_rate_limit,
+    backoff_rate_limit,
+)
 
 from .base_handler import BaseRom, MetadataHandler
 from .base_handler import UniversalPlatformSlug as UPS
@@ -144,6 +151,7 @@ class HasheousHandler(MetadataHandler):
 
         return bool(response)
 
+    @cached_provider_response("hasheous")
     async def _request(
         self,
         url: str,
@@ -158,6 +166,10 @@ class HasheousHandler(MetadataHandler):
         if method not in ["GET", "POST"]:
             raise ValueError(f"Unsupported HTTP method: {method}")
 
+        if not await acquire_rate_limit(async_cache, "hasheous"):
+            log.warning("Hasheous rate limit reached, skipping request to URL=%s", url)
+            raise ProviderRateLimitedException("hasheous")
+
         try:
             log.debug(
                 "API request: Method=%s, URL=%s, Params=%s, Data=%s",
@@ -192,12 +204,21 @@ class HasheousHandler(MetadataHandler):
                 log.debug("Game not found in Hasheous API")
                 return {}
 
+            if exc.response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+                await backoff_rate_limit(async_cache, "hasheous", exc.response.headers)
+                raise ProviderRateLimitedException("hasheous") from exc
+
             log.error(
                 "Hasheous API returned an error: %s %s",
                 exc.response.status_code,
                 exc.response.text,
             )
-            pass
+            if exc.response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+                # Not an empty result, the request should be made again later
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Hasheous is unavailable, try again later",
+                ) from exc
         except httpx.NetworkError as exc:
             log.critical("Connection error: can't connect to Hasheous")
             raise HTTPException(
@@ -208,8 +229,11 @@ class HasheousHandler(MetadataHandler):
             # Log the error and return an empty dict if the response is not valid JSON
             log.error(exc)
             return {}
-        except httpx.TimeoutException:
-            pass
+        except httpx.TimeoutException as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Hasheous is unavailable, try again later",
+            ) from exc
 
         return {}
 
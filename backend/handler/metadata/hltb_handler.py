@@ -7,11 +7,18 @@ from fastapi import HTTPException, status
 
 from config import HLTB_API_ENABLED
 from handler.metadata.base_handler import UniversalPlatformSlug as UPS
+from handler.redis_handler import async_cache
 from logger.logger import log
 from utils import get_version
+from utils.cache import cached_provider_response
 from utils.context import ctx_httpx_client
+from utils.rate_limit import (
+    ProviderRateLimitedException,
+    acquire_rate_limit,
+    backoff_rate_limit,
+)
 
-from .base_handler import BaseRom, MetadataHandler
+from .base_handler import BaseRom, MetadataHandler, is_provider_failure, single_flight
 
 # Regex to detect HLTB ID tags in filenames like (hltb-12345)
 HLTB_TAG_REGEX = re.compile(r"\(hltb-(\d+)\)", re.IGNORECASE)
@@ -212,6 +219,7 @@ class HowLongToBeatHandler(MetadataHandler):
 
         return True
 
+    @cached_provider_response("hltb")
     async def _request(self, url: str, payload: dict) -> dict:
         """
         Sends a POST request to HowLongToBeat API.
@@ -238,6 +246,12 @@ class HowLongToBeatHandler(MetadataHandler):
             60,
         )
 
+        if not await acquire_rate_limit(async_cache, "hltb"):
+            log.warning(
+                "HowLongToBeat rate limit reached, skipping request to URL=%s", url
+            )
+            raise ProviderRateLimitedException("hltb")
+
         try:
             res = await httpx_client.post(
                 url, json=payload, headers=headers, timeout=60
@@ -245,6 +259,13 @@ class HowLongToBeatHandler(MetadataHandler):
             res.raise_for_status()
             return res.json()
         except (httpx.HTTPStatusError, httpx.ConnectError, httpx.ReadTimeout) as exc:
+            if (
+                isinstance(exc, httpx.HTTPStatusError)
+                and exc.response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            ):
+                await backoff_rate_limit(async_cache, "hltb", exc.response.headers)
+                raise ProviderRateLimitedException("hltb") from exc
+
             log.warning(
                 "Connection error: can't connect to HowLongToBeat API", exc_info=True
             )
@@ -256,6 +277,7 @@ class HowLongToBeatHandler(MetadataHandler):
             log.error("Error decoding JSON response from HowLongToBeat API: %s", exc)
             return {}
 
+    @single_flight
     async def search_games(
         self, search_term: str, platform_slug: str
     ) -> list[HLTBGame]:
@@ -350,6 +372,10 @@ class HowLongToBeatHandler(MetadataHandler):
             return games
 
         except Exception as exc:
+            # Failures are left to the caller, they aren't missing results
+            if is_provider_failure(exc):
+                raise
+
             log.error("Error searching HowLongToBeat API: %s", exc)
             return []
 
@@ -526,6 +552,10 @@ class HowLongToBeatHandler(MetadataHandler):
             return price_response
 
         except Exception as exc:
+            # Failures are left to the caller, they aren't missing results
+            if is_provider_failure(exc):
+                raise
+
             log.error("Error fetching price data from HowLongToBeat API: %s", exc)
             return None
 
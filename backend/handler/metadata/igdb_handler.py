@@ -1,4 +1,5 @@
 import re
+from contextlib import AbstractAsyncContextManager
 from typing import Final, NotRequired, TypedDict
 
 import httpx
@@ -13,8 +14,10 @@ from adapters.services.igdb_types import (
     mark_list_expanded,
 )
 from config import IGDB_CLIENT_ID, IGDB_CLIENT_SECRET, IS_PYTEST_RUN
+from handler.metadata.base_handler import UniversalPlatformSlug as UPS
 from handler.redis_handler import async_cache
 from logger.logger import log
+from utils.cache import bypass_provider_cache
 from utils.context import ctx_httpx_client
 
 from .base_handler import (
@@ -24,8 +27,8 @@ from .base_handler import (
     SWITCH_TITLEDB_REGEX,
     BaseRom,
     MetadataHandler,
+    single_flight,
 )
-from .base_handler import UniversalPlatformSlug as UPS
 
 PS1_IGDB_ID: Final = 7
 PS2_IGDB_ID: Final = 8
@@ -226,6 +229,7 @@ class IGDBHandler(MetadataHandler):
             return int(match.group(1))
         return None
 
+    @single_flight
     async def _search_rom(
         self, search_term: str, platform_igdb_id: int, with_game_type: bool = False
     ) -> Game | None:
@@ -309,15 +313,20 @@ class IGDBHandler(MetadataHandler):
 
         return None
 
+    def multiquery_batching(self) -> AbstractAsyncContextManager[None]:
+        """Send the IGDB lookups made concurrently in this context as multiqueries."""
+        return self.igdb_service.multiquery_batching()
+
     async def heartbeat(self) -> bool:
         if not self.is_enabled():
             return False
 
         try:
-            roms = await self.igdb_service.list_games(
-                fields=["id"],
-                limit=1,
-            )
+            with bypass_provider_cache():
+                roms = await self.igdb_service.list_games(
+                    fields=["id"],
+                    limit=1,
+                )
         except Exception as e:
             log.error("Error checking IGDB API: %s", e)
             return False
@@ -474,6 +483,7 @@ class IGDBHandler(MetadataHandler):
             igdb_metadata=extract_metadata_from_igdb_rom(self, rom),
         )
 
+    @single_flight
     async def get_rom_by_id(self, igdb_id: int) -> IGDBRom:
         if not self.is_enabled():
             return IGDBRom(igdb_id=None)
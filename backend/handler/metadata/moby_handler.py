@@ -8,7 +8,9 @@ from unidecode import unidecode as uc
 from adapters.services.mobygames import MobyGamesService
 from adapters.services.mobygames_types import MobyGame
 from config import MOBYGAMES_API_KEY
+from handler.metadata.base_handler import UniversalPlatformSlug as UPS
 from logger.logger import log
+from utils.cache import bypass_provider_cache
 
 from .base_handler import (
     PS2_OPL_REGEX,
@@ -17,8 +19,8 @@ from .base_handler import (
     SWITCH_TITLEDB_REGEX,
     BaseRom,
     MetadataHandler,
+    single_flight,
 )
-from .base_handler import UniversalPlatformSlug as UPS
 
 PS1_MOBY_ID: Final = 6
 PS2_MOBY_ID: Final = 7
@@ -87,7 +89,8 @@ class MobyGamesHandler(MetadataHandler):
             return False
 
         try:
-            response = await self.moby_service.list_groups(limit=1)
+            with bypass_provider_cache():
+                response = await self.moby_service.list_groups(limit=1)
         except Exception as e:
             log.error("Error checking MobyGames API: %s", e)
             return False
@@ -102,6 +105,7 @@ class MobyGamesHandler(MetadataHandler):
             return int(match.group(1))
         return None
 
+    @single_flight
     async def _search_rom(
         self, search_term: str, platform_moby_id: int, split_game_name: bool = False
     ) -> MobyGame | None:
@@ -261,6 +265,7 @@ class MobyGamesHandler(MetadataHandler):
 
         return MobyGamesRom({k: v for k, v in rom.items() if v})  # type: ignore[misc]
 
+    @single_flight
     async def get_rom_by_id(self, moby_id: int) -> MobyGamesRom:
         if not self.is_enabled():
             return MobyGamesRom(moby_id=None)
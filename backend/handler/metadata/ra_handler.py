@@ -1,7 +1,9 @@
+import asyncio
 import json
 import os
 import re
 import time
+import weakref
 from datetime import datetime
 from typing import NotRequired, TypedDict
 
@@ -123,10 +125,23 @@ def extract_metadata_from_rom_details(
     )
 
 
+# Locks of the hashes indexes by platform id, per event loop
+_hashes_index_locks: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[int, asyncio.Lock]
+] = weakref.WeakKeyDictionary()
+
+
+def _get_hashes_index_lock(platform_id: int) -> asyncio.Lock:
+    locks = _hashes_index_locks.setdefault(asyncio.get_running_loop(), {})
+    return locks.setdefault(platform_id, asyncio.Lock())
+
+
 class RAHandler(MetadataHandler):
     def __init__(self) -> None:
         self.ra_service = RetroAchievementsService()
         self.HASHES_FILE_NAME = "ra_hashes.json"
+        # Hash to game indexes by platform, with the mtime of their hashes file
+        self._hashes_indexes: dict[int, tuple[float, dict[str, RAGameListItem]]] = {}
 
     @classmethod
     def is_enabled(cls) -> bool:
@@ -171,47 +186,80 @@ class RAHandler(MetadataHandler):
         full_path = fs_resource_handler.validate_path(file_path)
         return int((time.time() - os.path.getmtime(full_path)) / (24 * 3600))
 
-    async def _search_rom(self, rom: Rom, ra_hash: str) -> RAGameListItem | None:
-        if not rom.platform.ra_id:
-            return None
+    @staticmethod
+    def _build_hashes_index(
+        roms: list[RAGameListItem],
+    ) -> dict[str, RAGameListItem]:
+        hashes_index: dict[str, RAGameListItem] = {}
+        for r in roms:
+            for h in r.get("Hashes", ()):
+                # Keep the first game listing a hash, like a linear search would
+                hashes_index.setdefault(h.lower(), r)
+        return hashes_index
 
-        # Fetch all hashes for specific platform
-        roms: list[RAGameListItem]
-        if (
-            REFRESH_RETROACHIEVEMENTS_CACHE_DAYS
-            <= await self._days_since_last_cache_file_update(rom.platform.id)
-            or not await self._exists_cache_file(rom.platform.id)
-        ):
-            # Write the roms result to a JSON file if older than REFRESH_RETROACHIEVEMENTS_CACHE_DAYS days
-            roms = await self.ra_service.get_game_list(
-                system_id=rom.platform.ra_id,
-                only_games_with_achievements=True,
-                include_hashes=True,
-            )
+    def _get_hashes_file_mtime(self, platform_id: int) -> float:
+        full_path = fs_resource_handler.validate_path(
+            self._get_hashes_file_path(platform_id)
+        )
+        return os.path.getmtime(full_path)
 
-            platform_resources_path = fs_resource_handler.get_platform_resources_path(
-                rom.platform.id
-            )
+    async def _get_hashes_index(
+        self, platform_id: int, system_id: int
+    ) -> dict[str, RAGameListItem]:
+        """Index of the games of a platform by hash.
 
-            json_file = json.dumps(roms, indent=4)
-            await fs_resource_handler.write_file(
-                json_file.encode("utf-8"),
-                platform_resources_path,
-                self.HASHES_FILE_NAME,
-            )
-        else:
-            # Read the roms result from the JSON file
-            json_file_bytes = await fs_resource_handler.read_file(
-                self._get_hashes_file_path(rom.platform.id)
+        The index is built once from the hashes file, and rebuilt when the file
+        is refreshed. Roms of the platform scanned at the same time wait for a
+        single refresh.
+        """
+        async with _get_hashes_index_lock(platform_id):
+            if (
+                REFRESH_RETROACHIEVEMENTS_CACHE_DAYS
+                <= await self._days_since_last_cache_file_update(platform_id)
+                or not await self._exists_cache_file(platform_id)
+            ):
+                # Write the roms result to a JSON file if older than REFRESH_RETROACHIEVEMENTS_CACHE_DAYS days
+                roms = await self.ra_service.get_game_list(
+                    system_id=system_id,
+                    only_games_with_achievements=True,
+                    include_hashes=True,
+                )
+
+                platform_resources_path = (
+                    fs_resource_handler.get_platform_resources_path(platform_id)
+                )
+
+                json_file = json.dumps(roms, indent=4)
+                await fs_resource_handler.write_file(
+                    json_file.encode("utf-8"),
+                    platform_resources_path,
+                    self.HASHES_FILE_NAME,
+                )
+            else:
+                mtime = self._get_hashes_file_mtime(platform_id)
+                cached_index = self._hashes_indexes.get(platform_id)
+                if cached_index and cached_index[0] == mtime:
+                    return cached_index[1]
+
+                # Read the roms result from the JSON file
+                json_file_bytes = await fs_resource_handler.read_file(
+                    self._get_hashes_file_path(platform_id)
+                )
+                roms = json.loads(json_file_bytes.decode("utf-8"))
+
+            hashes_index = self._build_hashes_index(roms)
+            self._hashes_indexes[platform_id] = (
+                self._get_hashes_file_mtime(platform_id),
+                hashes_index,
             )
-            roms = json.loads(json_file_bytes.decode("utf-8"))
+            return hashes_index
 
-        ra_hash_lower = ra_hash.lower()
-        for r in roms:
-            if any(ra_hash_lower == h.lower() for h in r.get("Hashes", ())):
-                return r
+    async def _search_rom(self, rom: Rom, ra_hash: str) -> RAGameListItem | None:
+        if not rom.platform.ra_id:
+            return None
 
-        return None
+        hashes_index = await self._get_hashes_index(rom.platform.id, rom.platform.ra_id)
+        return hashes_index.get(ra_hash.lower())
 
     def get_platform(self, slug: str) -> RAGamesPlatform:
         if slug not in RA_PLATFORM_LIST:
@@ -6,7 +6,7 @@ from adapters.services.steamgriddb_types import SGDBDimension, SGDBGame, SGDBTyp
 from config import STEAMGRIDDB_API_KEY
 from logger.logger import log
 
-from .base_handler import MetadataHandler
+from .base_handler import MetadataHandler, single_flight
 
 
 class SGDBResource(TypedDict):
@@ -46,6 +46,7 @@ class SGDBBaseHandler(MetadataHandler):
 
         return bool(response)
 
+    @single_flight
     async def get_rom_by_id(self, sgdb_id: int) -> SGDBRom:
         """Get ROM details by SteamGridDB ID."""
         if not self.is_enabled():
@@ -78,6 +79,7 @@ class SGDBBaseHandler(MetadataHandler):
             log.warning(f"Failed to fetch ROM by SteamGridDB ID {sgdb_id}: {e}")
             return SGDBRom(sgdb_id=None)
 
+    @single_flight
     async def get_details(self, search_term: str) -> list[SGDBResult]:
         if not self.is_enabled():
             return []
@@ -95,12 +97,16 @@ class SGDBBaseHandler(MetadataHandler):
 
         return list(filter(None, results))
 
+    @single_flight
     async def get_details_by_names(self, game_names: list[str]) -> SGDBRom:
         if not self.is_enabled():
             return SGDBRom(sgdb_id=None)
 
-        for game_name in game_names:
-            search_term = self.normalize_search_term(game_name, remove_articles=False)
+        search_terms = [
+            self.normalize_search_term(game_name, remove_articles=False)
+            for game_name in game_names
+        ]
+        for search_term in search_terms:
             games = await self.sgdb_service.search_games(term=search_term)
             if not games:
                 log.debug(f"Could not find '{search_term}' on SteamGridDB")
@@ -114,10 +120,15 @@ class SGDBBaseHandler(MetadataHandler):
                 ):
                     games_by_name[game["name"]] = game
 
-            best_match, best_score = self.find_best_match(
-                search_term,
-                list(games_by_name.keys()),
-                min_similarity_score=self.min_similarity_score,
+            # Any of the names of the rom can match the games found, the first
+            # one wins ties
+            best_match, best_score = max(
+                self.find_best_matches(
+                    search_terms,
+                    list(games_by_name.keys()),
+                    min_similarity_score=self.min_similarity_score,
+                ),
+                key=lambda match: match[1],
             )
             if best_match:
                 game_details = await self._get_game_covers(
@@ -11,7 +11,9 @@ from adapters.services.screenscraper import ScreenScraperService
 from adapters.services.screenscraper_types import SSGame, SSGameDate
 from config import SCREENSCRAPER_PASSWORD, SCREENSCRAPER_USER
 from config.config_manager import config_manager as cm
+from handler.metadata.base_handler import UniversalPlatformSlug as UPS
 from logger.logger import log
+from utils.cache import bypass_provider_cache
 
 from .base_handler import (
     PS2_OPL_REGEX,
@@ -20,8 +22,8 @@ from .base_handler import (
     SWITCH_TITLEDB_REGEX,
     BaseRom,
     MetadataHandler,
+    single_flight,
 )
-from .base_handler import UniversalPlatformSlug as UPS
 
 SS_DEV_ID: Final = base64.b64decode("enVyZGkxNQ==").decode()
 SS_DEV_PASSWORD: Final = base64.b64decode("eFRKd29PRmpPUUc=").decode()
@@ -305,7 +307,8 @@ class SSHandler(MetadataHandler):
             return False
 
         try:
-            response = await self.ss_service.get_infra_info()
+            with bypass_provider_cache():
+                response = await self.ss_service.get_infra_info()
         except Exception as e:
             log.error("Error checking ScreenScraper API: %s", e)
             return False
@@ -320,6 +323,7 @@ class SSHandler(MetadataHandler):
             return int(match.group(1))
         return None
 
+    @single_flight
     async def _search_rom(
         self, search_term: str, platform_ss_id: int, split_game_name: bool = False
     ) -> SSGame | None:
@@ -469,6 +473,7 @@ class SSHandler(MetadataHandler):
 
         return build_ss_rom(res)
 
+    @single_flight
     async def get_rom_by_id(self, ss_id: int) -> SSRom:
         if not self.is_enabled():
             return SSRom(ss_id=None)
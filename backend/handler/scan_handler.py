@@ -1,13 +1,14 @@
 import asyncio
 import enum
-from typing import Any
+from collections.abc import Awaitable
+from typing import Any, Final, TypeVar
 
 import socketio  # type: ignore
 
 from config.config_manager import config_manager as cm
 from endpoints.responses.rom import SimpleRomSchema
-from handler.database import db_platform_handler, db_rom_handler
-from handler.filesystem import fs_asset_handler, fs_firmware_handler
+from handler.database import db_platform_handler
+from handler.filesystem import fs_asset_handler, fs_firmware_handler, fs_rom_handler
 from handler.filesystem.roms_handler import FSRom
 from handler.metadata import (
     meta_flashpoint_handler,
@@ -22,6 +23,7 @@ from handler.metadata import (
     meta_ss_handler,
     meta_tgdb_handler,
 )
+from handler.metadata.base_handler import MetadataHandler, is_provider_failure
 from handler.metadata.flashpoint_handler import FLASHPOINT_PLATFORM_LIST, FlashpointRom
 from handler.metadata.hasheous_handler import HASHEOUS_PLATFORM_LIST, HasheousRom
 from handler.metadata.hltb_handler import HLTB_PLATFORM_LIST, HLTBRom
@@ -32,6 +34,7 @@ from handler.metadata.playmatch_handler import PlaymatchRomMatch
 from handler.metadata.ra_handler import RA_PLATFORM_LIST, RAGameRom
 from handler.metadata.sgdb_handler import SGDBRom
 from handler.metadata.ss_handler import SCREENSAVER_PLATFORM_LIST, SSRom
+from handler.redis_handler import async_cache
 from logger.formatter import BLUE, LIGHTYELLOW
 from logger.formatter import highlight as hl
 from logger.logger import log
@@ -41,9 +44,12 @@ from models.platform import Platform
 from models.rom import Rom
 from models.user import User
 from utils import emoji
+from utils.cache import get_scan_miss_digest, get_scan_misses, set_scan_misses
 
 LOGGER_MODULE_NAME = {"module_name": "scan"}
 
+T = TypeVar("T")
+
 
 @enum.unique
 class ScanType(enum.StrEnum):
@@ -69,6 +75,42 @@ class MetadataSource(enum.StrEnum):
     HLTB = "hltb"  # HowLongToBeat
 
 
+METADATA_SOURCE_HANDLERS: Final[dict[MetadataSource, MetadataHandler]] = {
+    MetadataSource.IGDB: meta_igdb_handler,
+    MetadataSource.MOBY: meta_moby_handler,
+    MetadataSource.SS: meta_ss_handler,
+    MetadataSource.RA: meta_ra_handler,
+    MetadataSource.LB: meta_launchbox_handler,
+    MetadataSource.HASHEOUS: meta_hasheous_handler,
+    MetadataSource.TGDB: meta_tgdb_handler,
+    MetadataSource.SGDB: meta_sgdb_handler,
+    MetadataSource.FLASHPOINT: meta_flashpoint_handler,
+    MetadataSource.HLTB: meta_hltb_handler,
+}
+
+
+async def get_available_sources(metadata_sources: list[str]) -> list[str]:
+    """Metadata sources whose circuit breaker lets requests through."""
+    return [
+        source
+        for source in metadata_sources
+        if source not in METADATA_SOURCE_HANDLERS
+        or await METADATA_SOURCE_HANDLERS[
+            MetadataSource(source)
+        ].circuit_breaker.allow_request()
+    ]
+
+
+def get_unavailable_sources(metadata_sources: list[str]) -> list[str]:
+    """Metadata sources skipped because their provider keeps failing."""
+    return [
+        source
+        for source in metadata_sources
+        if source in METADATA_SOURCE_HANDLERS
+        and METADATA_SOURCE_HANDLERS[MetadataSource(source)].circuit_breaker.is_open
+    ]
+
+
 def get_main_platform_igdb_id(platform: Platform):
     cnfg = cm.get_config()
 
@@ -351,9 +393,69 @@ async def scan_rom(
             }
         )
 
+    # Providers that recently found nothing for the same inputs aren't queried
+    # again on unidentified scans
+    scan_miss_digest = get_scan_miss_digest(
+        meta_igdb_handler.normalize_search_term(
+            fs_rom_handler.get_file_name_with_no_tags(fs_rom["fs_name"])
+        ),
+        platform.id,
+        [
+            fs_rom["crc_hash"],
+            fs_rom["md5_hash"],
+            fs_rom["sha1_hash"],
+            fs_rom["ra_hash"],
+        ],
+    )
+    # SteamGridDB is searched with the names found by the other providers, so
+    # whether it finds something doesn't only depend on these inputs
+    known_misses = (
+        await get_scan_misses(
+            async_cache,
+            [source for source in metadata_sources if source != MetadataSource.SGDB],
+            scan_miss_digest,
+        )
+        if scan_type == ScanType.UNIDENTIFIED
+        else set()
+    )
+    if known_misses:
+        log.debug(
+            f"Skipping {', '.join(sorted(known_misses))} for {hl(rom_attrs['fs_name'])}, "
+            "nothing was found recently",
+            extra=LOGGER_MODULE_NAME,
+        )
+    # Providers that keep failing are skipped until they're available again
+    available_sources = await get_available_sources(metadata_sources)
+    skipped_sources = known_misses | (set(metadata_sources) - set(available_sources))
+    queried_sources: set[MetadataSource] = set()
+
+    async def fetch_with_circuit_breaker(
+        source: MetadataSource, fetch: Awaitable[T], default: T
+    ) -> T:
+        circuit_breaker = METADATA_SOURCE_HANDLERS[source].circuit_breaker
+        try:
+            result = await fetch
+        except Exception as e:
+            if not is_provider_failure(e):
+                raise
+
+            log.warning(
+                f"Failed to fetch {source} metadata for {hl(rom_attrs['fs_name'])}: {e}",
+                extra=LOGGER_MODULE_NAME,
+            )
+            circuit_breaker.record_failure()
+            # Failures aren't misses, the provider will be queried again
+            queried_sources.discard(source)
+            return default
+
+        if source in queried_sources:
+            circuit_breaker.record_success()
+        return result
+
     async def fetch_playmatch_hash_match() -> PlaymatchRomMatch:
         if (
             MetadataSource.IGDB in metadata_sources
+            and MetadataSource.IGDB not in skipped_sources
             and platform.igdb_id
             and (
                 newly_added
@@ -369,6 +471,7 @@ async def scan_rom(
     async def fetch_hasheous_hash_match() -> HasheousRom:
         if (
             MetadataSource.HASHEOUS in metadata_sources
+            and MetadataSource.HASHEOUS not in skipped_sources
             and platform.hasheous_id
             and (
                 newly_added
@@ -387,14 +490,15 @@ async def scan_rom(
 
         return HasheousRom(hasheous_id=None, igdb_id=None, tgdb_id=None, ra_id=None)
 
-    _added_rom = db_rom_handler.add_rom(Rom(**rom_attrs))
-    _added_rom.is_identifying = True
+    # The scanned rom is only written once its scan is over, so the client is
+    # shown the stored one while it's being identified
+    rom.is_identifying = True
 
     if socket_manager:
         await socket_manager.emit(
             "scan:scanning_rom",
             {
-                **SimpleRomSchema.from_orm_with_factory(_added_rom).model_dump(
+                **SimpleRomSchema.from_orm_with_factory(rom).model_dump(
                     exclude={"created_at", "updated_at", "rom_user"}
                 ),
             },
@@ -406,7 +510,11 @@ async def scan_rom(
         hasheous_hash_match,
     ) = await asyncio.gather(
         fetch_playmatch_hash_match(),
-        fetch_hasheous_hash_match(),
+        fetch_with_circuit_breaker(
+            MetadataSource.HASHEOUS,
+            fetch_hasheous_hash_match(),
+            HasheousRom(hasheous_id=None, igdb_id=None, tgdb_id=None, ra_id=None),
+        ),
     )
 
     async def fetch_igdb_rom(
@@ -414,6 +522,7 @@ async def scan_rom(
     ) -> IGDBRom:
         if (
             MetadataSource.IGDB in metadata_sources
+            and MetadataSource.IGDB not in skipped_sources
             and platform.igdb_id
             and (
                 newly_added
@@ -426,6 +535,8 @@ async def scan_rom(
                 or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
             )
         ):
+            queried_sources.add(MetadataSource.IGDB)
+
             # Use Hasheous match to get the IGDB ID
             h_igdb_id = hasheous_rom.get("igdb_id")
             if h_igdb_id:
@@ -457,6 +568,7 @@ async def scan_rom(
     async def fetch_flashpoint_rom() -> FlashpointRom:
         if (
             MetadataSource.FLASHPOINT in metadata_sources
+            and MetadataSource.FLASHPOINT not in skipped_sources
             and platform.slug in FLASHPOINT_PLATFORM_LIST
             and (
                 newly_added
@@ -469,6 +581,7 @@ async def scan_rom(
                 or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
             )
         ):
+            queried_sources.add(MetadataSource.FLASHPOINT)
             return await meta_flashpoint_handler.get_rom(
                 rom_attrs["fs_name"], platform.slug
             )
@@ -478,6 +591,7 @@ async def scan_rom(
     async def fetch_hltb_rom() -> HLTBRom:
         if (
             MetadataSource.HLTB in metadata_sources
+            and MetadataSource.HLTB not in skipped_sources
             and platform.slug in HLTB_PLATFORM_LIST
             and (
                 newly_added
@@ -486,6 +600,7 @@ async def scan_rom(
                 or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
             )
         ):
+            queried_sources.add(MetadataSource.HLTB)
             return await meta_hltb_handler.get_rom(rom_attrs["fs_name"], platform.slug)
 
         return HLTBRom(hltb_id=None)
@@ -493,6 +608,7 @@ async def scan_rom(
     async def fetch_moby_rom() -> MobyGamesRom:
         if (
             MetadataSource.MOBY in metadata_sources
+            and MetadataSource.MOBY not in skipped_sources
             and platform.moby_id
             and (
                 newly_added
@@ -505,6 +621,7 @@ async def scan_rom(
                 or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
             )
         ):
+            queried_sources.add(MetadataSource.MOBY)
             return await meta_moby_handler.get_rom(
                 rom_attrs["fs_name"], platform_moby_id=platform.moby_id
             )
@@ -514,6 +631,7 @@ async def scan_rom(
     async def fetch_ss_rom() -> SSRom:
         if (
             MetadataSource.SS in metadata_sources
+            and MetadataSource.SS not in skipped_sources
             and platform.ss_id
             and (
                 newly_added
@@ -526,6 +644,7 @@ async def scan_rom(
                 or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
             )
         ):
+            queried_sources.add(MetadataSource.SS)
             return await meta_ss_handler.get_rom(
                 rom_attrs["fs_name"], platform_ss_id=platform.ss_id
             )
@@ -533,16 +652,21 @@ async def scan_rom(
         return SSRom(ss_id=None)
 
     async def fetch_launchbox_rom(platform_slug: str) -> LaunchboxRom:
-        if MetadataSource.LB in metadata_sources and (
-            newly_added
-            or scan_type == ScanType.COMPLETE
-            or (
-                scan_type == ScanType.PARTIAL
-                and not rom.launchbox_id
-                and rom.platform_slug in LAUNCHBOX_PLATFORM_LIST
+        if (
+            MetadataSource.LB in metadata_sources
+            and MetadataSource.LB not in skipped_sources
+            and (
+                newly_added
+                or scan_type == ScanType.COMPLETE
+                or (
+                    scan_type == ScanType.PARTIAL
+                    and not rom.launchbox_id
+                    and rom.platform_slug in LAUNCHBOX_PLATFORM_LIST
+                )
+                or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
             )
-            or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
         ):
+            queried_sources.add(MetadataSource.LB)
             return await meta_launchbox_handler.get_rom(
                 rom_attrs["fs_name"], platform_slug
             )
@@ -552,6 +676,7 @@ async def scan_rom(
     async def fetch_ra_rom(hasheous_rom: HasheousRom) -> RAGameRom:
         if (
             MetadataSource.RA in metadata_sources
+            and MetadataSource.RA not in skipped_sources
             and platform.ra_id
             and (
                 newly_added
@@ -565,6 +690,8 @@ async def scan_rom(
                 or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
             )
         ):
+            queried_sources.add(MetadataSource.RA)
+
             # Use Hasheous match to get the IGDB ID
             h_ra_id = hasheous_rom.get("ra_id")
             if h_ra_id:
@@ -582,6 +709,7 @@ async def scan_rom(
     async def fetch_hasheous_rom(hasheous_rom: HasheousRom) -> HasheousRom:
         if (
             MetadataSource.HASHEOUS in metadata_sources
+            and MetadataSource.HASHEOUS not in skipped_sources
             and platform.hasheous_id
             and (
                 newly_added
@@ -594,6 +722,7 @@ async def scan_rom(
                 or (scan_type == ScanType.UNIDENTIFIED and rom.is_unidentified)
             )
         ):
+            queried_sources.add(MetadataSource.HASHEOUS)
             (
                 igdb_game,
                 ra_game,
@@ -623,14 +752,40 @@ async def scan_rom(
         flashpoint_handler_rom,
         hltb_handler_rom,
     ) = await asyncio.gather(
-        fetch_igdb_rom(playmatch_hash_match, hasheous_hash_match),
-        fetch_moby_rom(),
-        fetch_ss_rom(),
-        fetch_ra_rom(hasheous_hash_match),
-        fetch_launchbox_rom(platform.slug),
-        fetch_hasheous_rom(hasheous_hash_match),
-        fetch_flashpoint_rom(),
-        fetch_hltb_rom(),
+        fetch_with_circuit_breaker(
+            MetadataSource.IGDB,
+            fetch_igdb_rom(playmatch_hash_match, hasheous_hash_match),
+            IGDBRom(igdb_id=None),
+        ),
+        fetch_with_circuit_breaker(
+            MetadataSource.MOBY, fetch_moby_rom(), MobyGamesRom(moby_id=None)
+        ),
+        fetch_with_circuit_breaker(
+            MetadataSource.SS, fetch_ss_rom(), SSRom(ss_id=None)
+        ),
+        fetch_with_circuit_breaker(
+            MetadataSource.RA,
+            fetch_ra_rom(hasheous_hash_match),
+            RAGameRom(ra_id=None),
+        ),
+        fetch_with_circuit_breaker(
+            MetadataSource.LB,
+            fetch_launchbox_rom(platform.slug),
+            LaunchboxRom(launchbox_id=None),
+        ),
+        fetch_with_circuit_breaker(
+            MetadataSource.HASHEOUS,
+            fetch_hasheous_rom(hasheous_hash_match),
+            HasheousRom(hasheous_id=None, igdb_id=None, tgdb_id=None, ra_id=None),
+        ),
+        fetch_with_circuit_breaker(
+            MetadataSource.FLASHPOINT,
+            fetch_flashpoint_rom(),
+            FlashpointRom(flashpoint_id=None),
+        ),
+        fetch_with_circuit_breaker(
+            MetadataSource.HLTB, fetch_hltb_rom(), HLTBRom(hltb_id=None)
+        ),
     )
 
     metadata_handlers = {
@@ -644,6 +799,19 @@ async def scan_rom(
         MetadataSource.HLTB: hltb_handler_rom,
     }
 
+    # Only answers count as misses, failed and throttled requests were already
+    # discarded from the queried sources
+    await set_scan_misses(
+        async_cache,
+        [
+            source
+            for source in sorted(queried_sources)
+            if source in metadata_handlers
+            and not metadata_handlers[source].get(f"{source}_id")
+        ],
+        scan_miss_digest,
+    )
+
     # Determine which metadata sources are available
     available_sources = [
         name for name, handler in metadata_handlers.items() if handler.get(f"{name}_id")
@@ -714,11 +882,12 @@ async def scan_rom(
 
     async def fetch_sgdb_details() -> SGDBRom:
         """Fetch SteamGridDB details for the ROM."""
-        if (
+        if MetadataSource.SGDB not in skipped_sources and (
             MetadataSource.SGDB in metadata_sources
             and newly_added
             or scan_type == ScanType.COMPLETE
         ):
+            queried_sources.add(MetadataSource.SGDB)
             game_names = [
                 igdb_handler_rom.get("name", None),
                 hasheous_handler_rom.get("name", None),
@@ -732,7 +901,9 @@ async def scan_rom(
 
         return SGDBRom(sgdb_id=None)
 
-    sgdb_hander_rom = await fetch_sgdb_details()
+    sgdb_hander_rom = await fetch_with_circuit_breaker(
+        MetadataSource.SGDB, fetch_sgdb_details(), SGDBRom(sgdb_id=None)
+    )
     if sgdb_hander_rom.get("sgdb_id"):
         rom_attrs.update({**sgdb_hander_rom})
 
@@ -741,7 +912,7 @@ async def scan_rom(
         extra=LOGGER_MODULE_NAME,
     )
 
-    if rom.has_nested_single_file or rom.has_multiple_files:
+    if len(fs_rom["files"]) > 1 or any(file.is_nested for file in fs_rom["files"]):
         for file in fs_rom["files"]:
             log.info(
                 f"\t · {hl(file.file_name, color=LIGHTYELLOW)}",
@@ -0,0 +1,32 @@
+from config import PROVIDER_CACHE_ENABLED
+from handler.redis_handler import async_cache
+from logger.logger import log
+from tasks.tasks import Task, TaskType
+from utils.cache import clear_provider_cache, get_provider_cache_stats
+from utils.context import initialize_context
+
+
+class ClearProviderCacheTask(Task):
+    def __init__(self):
+        super().__init__(
+            title="Clear metadata cache",
+            description="Fetch fresh responses from the metadata providers",
+            task_type=TaskType.CLEANUP,
+            enabled=PROVIDER_CACHE_ENABLED,
+            manual_run=True,
+            cron_string=None,
+        )
+
+    @initialize_context()
+    async def run(self) -> dict[str, int]:
+        """Remove the cached responses of all the metadata providers."""
+        log.info(f"Starting {self.title} task...")
+
+        stats = await get_provider_cache_stats(async_cache)
+        removed = await clear_provider_cache(async_cache)
+
+        log.info(f"Cleared {removed} cached metadata responses")
+        return {"removed": removed, **stats}
+
+
+clear_provider_cache_task = ClearProviderCacheTask()
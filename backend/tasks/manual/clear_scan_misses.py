@@ -0,0 +1,31 @@
+from config import SCAN_MISS_CACHE_ENABLED
+from handler.redis_handler import async_cache
+from logger.logger import log
+from tasks.tasks import Task, TaskType
+from utils.cache import clear_scan_misses
+from utils.context import initialize_context
+
+
+class ClearScanMissesTask(Task):
+    def __init__(self):
+        super().__init__(
+            title="Clear metadata misses",
+            description="Query metadata providers again for unidentified ROMs",
+            task_type=TaskType.GENERIC,
+            enabled=SCAN_MISS_CACHE_ENABLED,
+            manual_run=True,
+            cron_string=None,
+        )
+
+    @initialize_context()
+    async def run(self) -> dict[str, int]:
+        """Forget the providers that found nothing for unidentified ROMs."""
+        log.info(f"Starting {self.title} task...")
+
+        removed = await clear_scan_misses(async_cache)
+
+        log.info(f"Cleared {removed} metadata misses")
+        return {"removed": removed}
+
+
+clear_scan_misses_task = ClearScanMissesTask()
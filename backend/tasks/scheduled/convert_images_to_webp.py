@@ -1,20 +1,38 @@
 """Background task to convert existing images to WebP format."""
 
 import asyncio
+import multiprocessing
+import os
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Final, List
 
 from PIL import Image, UnidentifiedImageError
 
 from config import (
     ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP,
+    IMAGE_PROCESSING_WORKERS,
     RESOURCES_BASE_PATH,
     SCHEDULED_CONVERT_IMAGES_TO_WEBP_CRON,
 )
+from handler.redis_handler import async_cache
 from logger.logger import log
 from tasks.tasks import PeriodicTask, TaskType, update_job_meta
 
+# Modification time (in ns) of the images converted to WebP, by relative path
+WEBP_CONVERSIONS_KEY: Final = "romm:webp_conversions"
+
+# Modification time (in ns) of the cover directories whose images were all
+# converted to WebP, by relative path
+WEBP_CONVERTED_DIRS_KEY: Final = "romm:webp_converted_dirs"
+
+# Images converted between two checkpoints of the conversions
+CONVERSION_BATCH_SIZE: Final = 100
+
 
 @dataclass
 class ConversionResult:
@@ -58,6 +76,27 @@ class ImageConverter:
         target_mode = self.MODE_CONVERSIONS.get(img.mode, "RGB")
         return img.convert(target_mode)
 
+    def save_as_webp(self, img: Image.Image, webp_path: Path) -> bool:
+        """Save an already decoded image in WebP format.
+        Args:
+            img: PIL Image object
+            webp_path: Path to the WebP image
+        Returns:
+            True if conversion was successful, False otherwise
+        """
+        try:
+            # Convert image mode if necessary
+            img = self._convert_image_mode(img)
+
+            # Save as WebP
+            img.save(webp_path, "WEBP", quality=self.quality, optimize=True)
+            log.info(f"Created WebP version: {webp_path}")
+            return True
+
+        except Exception as exc:
+            log.error(f"Failed to create WebP version {webp_path}: {str(exc)}")
+            return False
+
     def convert_to_webp(self, image_path: Path, force: bool = False) -> bool:
         """Convert a single image to WebP format.
         Args:
@@ -74,19 +113,42 @@ class ImageConverter:
 
         try:
             with Image.open(image_path) as img:
-                # Convert image mode if necessary
-                img = self._convert_image_mode(img)
-
-                # Save as WebP
-                img.save(webp_path, "WEBP", quality=self.quality, optimize=True)
-                log.info(f"Created WebP version: {webp_path}")
-                return True
+                return self.save_as_webp(img, webp_path)
 
         except Exception as exc:
             log.error(f"Failed to create WebP version of {image_path}: {str(exc)}")
             return False
 
 
+def convert_image(image_path: Path, mtime: int) -> str | None:
+    """Convert an image to WebP format, in a worker process.
+    Args:
+        image_path: Path to the image file
+        mtime: Modification time of the image file, in nanoseconds
+    Returns:
+        The error if the image couldn't be converted, None otherwise
+    """
+    try:
+        # Validate image file first
+        with Image.open(image_path) as img:
+            img.verify()
+    except (UnidentifiedImageError, OSError) as exc:
+        log.warning(f"Skipping invalid image file {image_path}: {str(exc)}")
+        return f"Invalid image file: {image_path} - {str(exc)}"
+
+    # Convert again if the image changed since its WebP version was created
+    webp_path = image_path.with_suffix(".webp")
+    force = webp_path.exists() and webp_path.stat().st_mtime_ns < mtime
+
+    try:
+        if ImageConverter().convert_to_webp(image_path, force=force):
+            return None
+        return f"Conversion failed: {image_path}"
+    except Exception as exc:
+        log.error(f"Unexpected error processing {image_path}: {str(exc)}")
+        return f"Unexpected error: {image_path} - {str(exc)}"
+
+
 @dataclass
 class ConversionStats:
     """Statistics for cleanup operations."""
@@ -124,7 +186,6 @@ class ConvertImagesToWebPTask(PeriodicTask):
             func="tasks.scheduled.convert_images_to_webp.convert_images_to_webp_task.run",
         )
         self.resources_path = Path(RESOURCES_BASE_PATH)
-        self.converter = ImageConverter()
         self._reset_counters()
 
     def _reset_counters(self) -> None:
@@ -133,57 +194,117 @@ class ConvertImagesToWebPTask(PeriodicTask):
         self.error_count = 0
         self.errors: list[str] = []
 
-    def _find_convertible_images(self) -> List[Path]:
-        """Find all convertible images in the resources directory.
+    def _iter_cover_dirs(self) -> Iterator[tuple[Path, int]]:
+        """Iterate over the cover directories, with their modification time in ns."""
+        for root, _, _ in os.walk(self.resources_path):
+            if os.path.basename(root) == "cover":
+                yield Path(root), os.stat(root).st_mtime_ns
+
+    def _iter_cover_images(self, cover_dir: Path) -> Iterator[tuple[Path, int]]:
+        """Iterate over the images of a cover directory, with their modification time in ns."""
+        with os.scandir(cover_dir) as entries:
+            for entry in entries:
+                suffix = Path(entry.name).suffix.lower()
+                if (
+                    entry.is_file(follow_symlinks=False)
+                    and suffix in ImageConverter.SUPPORTED_EXTENSIONS
+                ):
+                    mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+                    yield Path(entry.path), mtime
+
+    async def _get_cached_mtimes(self, key: str) -> dict[str, str]:
+        """Modification times recorded under a cache key, by relative path."""
+        mtimes = await async_cache.hgetall(key)
+        return {
+            (path.decode() if isinstance(path, bytes) else path): (
+                mtime.decode() if isinstance(mtime, bytes) else mtime
+            )
+            for path, mtime in mtimes.items()
+        }
+
+    async def _find_convertible_images(self) -> List[tuple[Path, int]]:
+        """Find the images not converted since they were last modified.
+
+        The images of a directory are only checked again once the directory
+        changed, as covers are added, removed or replaced (and converted) by
+        RomM. Images edited in place by other programs are found once their
+        directory changes.
+
         Returns:
-            List of paths to image files that can be converted to WebP
+            List of paths to image files that can be converted to WebP,
+            with their modification time
         """
         if not self.resources_path.exists():
             log.warning(f"Resources path does not exist: {self.resources_path}")
             return []
 
-        image_files = [
-            p
-            for p in self.resources_path.rglob("**/cover/*")
-            if p.is_file()
-            and not p.is_symlink()
-            and p.suffix.lower() in ImageConverter.SUPPORTED_EXTENSIONS
-            and not p.with_suffix(".webp").exists()
-        ]
+        conversions_by_dir: dict[str, dict[str, str]] = defaultdict(dict)
+        for relative_path, mtime in (
+            await self._get_cached_mtimes(WEBP_CONVERSIONS_KEY)
+        ).items():
+            conversions_by_dir[os.path.dirname(relative_path)][relative_path] = mtime
+        converted_dirs = await self._get_cached_mtimes(WEBP_CONVERTED_DIRS_KEY)
+
+        image_files = []
+        removed_images: list[str] = []
+        done_dirs: dict[str, str] = {}
+        for cover_dir, dir_mtime in self._iter_cover_dirs():
+            relative_dir = str(cover_dir.relative_to(self.resources_path))
+            conversions = conversions_by_dir.pop(relative_dir, {})
+            if converted_dirs.pop(relative_dir, None) == str(dir_mtime):
+                continue
+
+            convertible_images = []
+            for image_path, mtime in self._iter_cover_images(cover_dir):
+                relative_path = str(image_path.relative_to(self.resources_path))
+                if conversions.pop(relative_path, None) != str(mtime):
+                    convertible_images.append((image_path, mtime))
+            removed_images.extend(conversions)
+
+            if convertible_images:
+                image_files.extend(convertible_images)
+            else:
+                # Skipped by later runs, until an image is added or replaced
+                done_dirs[relative_dir] = str(dir_mtime)
+
+        # Forget the images and directories removed since they were converted
+        for conversions in conversions_by_dir.values():
+            removed_images.extend(conversions)
+        if removed_images:
+            await async_cache.hdel(WEBP_CONVERSIONS_KEY, *removed_images)
+        if converted_dirs:
+            await async_cache.hdel(WEBP_CONVERTED_DIRS_KEY, *converted_dirs)
+        if done_dirs:
+            await async_cache.hset(WEBP_CONVERTED_DIRS_KEY, mapping=done_dirs)
 
         return sorted(image_files)  # Sort for consistent processing order
 
-    def _process_single_image(self, image_path: Path) -> bool:
-        """Process a single image file.
-        Args:
-            image_path: Path to the image file
-        Returns:
-            True if processing was successful, False otherwise
-        """
+    async def _convert_batch(
+        self, executor: ProcessPoolExecutor, batch: list[tuple[Path, int]]
+    ) -> list[str | None]:
+        """Convert a batch of images in parallel, in the worker processes."""
+        loop = asyncio.get_running_loop()
         try:
-            # Validate image file first
-            with Image.open(image_path) as img:
-                img.verify()
-
-            # Convert to WebP
-            if self.converter.convert_to_webp(image_path):
-                self.processed_count += 1
-                return True
-            else:
-                self.error_count += 1
-                self.errors.append(f"Conversion failed: {image_path}")
-                return False
-
-        except (UnidentifiedImageError, OSError) as exc:
-            log.warning(f"Skipping invalid image file {image_path}: {str(exc)}")
-            self.error_count += 1
-            self.errors.append(f"Invalid image file: {image_path} - {str(exc)}")
-            return False
-        except Exception as exc:
-            log.error(f"Unexpected error processing {image_path}: {str(exc)}")
-            self.error_count += 1
-            self.errors.append(f"Unexpected error: {image_path} - {str(exc)}")
-            return False
+            return await asyncio.gather(
+                *(
+                    loop.run_in_executor(executor, convert_image, path, mtime)
+                    for path, mtime in batch
+                )
+            )
+        except BrokenProcessPool:
+            log.warning("Conversion process pool is broken, converting in process")
+            return [convert_image(path, mtime) for path, mtime in batch]
+
+    async def _checkpoint(self, converted: list[tuple[Path, int]]) -> None:
+        """Record the converted images, so they are skipped by later runs."""
+        if converted:
+            await async_cache.hset(
+                WEBP_CONVERSIONS_KEY,
+                mapping={
+                    str(path.relative_to(self.resources_path)): str(mtime)
+                    for path, mtime in converted
+                },
+            )
 
     def _get_progress_message(self) -> str:
         """Get current progress message."""
@@ -198,7 +319,7 @@ class ConvertImagesToWebPTask(PeriodicTask):
 
         # Find all convertible images
         conversion_stats = ConversionStats()
-        image_files = self._find_convertible_images()
+        image_files = await self._find_convertible_images()
         total_files = len(image_files)
 
         if total_files == 0:
@@ -211,24 +332,39 @@ class ConvertImagesToWebPTask(PeriodicTask):
         # Reset counters
         self._reset_counters()
 
-        # Process images
-        for i, image_file in enumerate(image_files, 1):
-            self._process_single_image(image_file)
-            conversion_stats.update(
-                processed=self.processed_count,
-                errors=self.error_count,
-                total=total_files,
-            )
-
-            # Log progress periodically
-            if i % 50 == 0 or i == total_files:
+        # Spawn workers, as forking a multi-threaded process can deadlock the child
+        executor = ProcessPoolExecutor(
+            max_workers=IMAGE_PROCESSING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        try:
+            for offset in range(0, total_files, CONVERSION_BATCH_SIZE):
+                batch = image_files[offset : offset + CONVERSION_BATCH_SIZE]
+                results = await self._convert_batch(executor, batch)
+
+                converted = []
+                for image_file, error in zip(batch, results, strict=True):
+                    if error:
+                        self.error_count += 1
+                        self.errors.append(error)
+                    else:
+                        self.processed_count += 1
+                        converted.append(image_file)
+
+                # Interrupted runs resume from the last checkpoint
+                await self._checkpoint(converted)
+
+                conversion_stats.update(
+                    processed=self.processed_count,
+                    errors=self.error_count,
+                    total=total_files,
+                )
                 log.info(
-                    f"Progress: {i}/{total_files} - {self._get_progress_message()}"
+                    f"Progress: {offset + len(batch)}/{total_files} - "
+                    f"{self._get_progress_message()}"
                 )
-
-            # Yield control to prevent blocking
-            if i % 10 == 0:
-                await asyncio.sleep(0.1)
+        finally:
+            executor.shutdown(cancel_futures=True)
 
         # Log final results
         log.info(f"Image to WebP conversion completed. {self._get_progress_message()}")
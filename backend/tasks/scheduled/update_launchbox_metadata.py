@@ -1,12 +1,15 @@
 import json
+import tempfile
 import zipfile
-from io import BytesIO
-from typing import Any
+from collections.abc import Iterator
+from typing import IO, Any, Final
 
 from defusedxml import ElementTree as ET
+from redis.asyncio.client import Pipeline
 
 from config import (
     ENABLE_SCHEDULED_UPDATE_LAUNCHBOX_METADATA,
+    ROMM_TMP_PATH,
     SCHEDULED_UPDATE_LAUNCHBOX_METADATA_CRON,
 )
 from handler.metadata import meta_launchbox_handler
@@ -26,6 +29,70 @@ from utils.context import initialize_context
 
 from . import UpdateStats
 
+# Fields sent in a single HSET command
+HSET_BATCH_SIZE: Final = 2000
+# HSET commands buffered in the pipeline before it's executed
+PIPELINE_FLUSH_COMMANDS: Final = 10
+
+
+class BatchedHashWriter:
+    """Write fields to Redis hashes in batches, executing the pipeline periodically.
+
+    Keeps the pipeline command buffer small, no matter how many fields are written.
+    """
+
+    def __init__(self, pipe: Pipeline) -> None:
+        self.pipe = pipe
+        self.mappings: dict[str, dict[str, str]] = {}
+        self.buffered_commands = 0
+
+    async def hset(self, key: str, field: str, value: str) -> None:
+        mapping = self.mappings.setdefault(key, {})
+        mapping[field] = value
+        if len(mapping) >= HSET_BATCH_SIZE:
+            await self._send(key)
+
+        if self.buffered_commands >= PIPELINE_FLUSH_COMMANDS:
+            await self.pipe.execute()
+            self.buffered_commands = 0
+
+    async def _send(self, key: str) -> None:
+        mapping = self.mappings.pop(key, None)
+        if mapping:
+            await self.pipe.hset(key, mapping=mapping)
+            self.buffered_commands += 1
+
+    async def flush(self) -> None:
+        for key in list(self.mappings):
+            await self._send(key)
+        await self.pipe.execute()
+        self.buffered_commands = 0
+
+
+def iter_root_children(file: IO[bytes]) -> Iterator[Any]:
+    """Iterate over the children of the root element, once fully parsed.
+
+    The parsed elements are then dropped, so memory usage doesn't grow with
+    the size of the document.
+    """
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(file, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1 and root is not None:
+            yield elem
+            root.clear()
+
+
+def element_to_dict(elem: Any) -> dict[str, Any]:
+    return {child.tag: child.text for child in elem}
+
 
 class UpdateLaunchboxMetadataTask(RemoteFilePullTask):
     def __init__(self):
@@ -48,222 +115,154 @@ class UpdateLaunchboxMetadataTask(RemoteFilePullTask):
             log.warning("Launchbox API is not enabled, skipping metadata update")
             return update_stats.to_dict()
 
-        content = await super().run(force)
-        if content is None:
-            log.warning("No content received from launchbox metadata update")
-            return update_stats.to_dict()
-
-        try:
-            zip_file_bytes = BytesIO(content)
-            with zipfile.ZipFile(zip_file_bytes) as z:
-                file_list = z.namelist()
-                total_files = len(file_list)
-                processed_files = 0
-
-                # Update initial progress
-                update_stats.update(processed=processed_files, total=total_files)
-
-                for file in file_list:
-                    if file == "Platforms.xml":
-                        with z.open(file, "r") as f:
-                            async with async_cache.pipeline() as pipe:
-                                ctx = ET.iterparse(f, events=("end",))
-
-                                for _, elem in ctx:
-                                    if elem.tag == "Platform":
-                                        name_elem = elem.find("Name")
-                                        if name_elem is not None and name_elem.text:
-                                            await pipe.hset(
-                                                LAUNCHBOX_PLATFORMS_KEY,
-                                                mapping={
-                                                    name_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
+        # The archive is too large to be kept in memory
+        with tempfile.TemporaryFile(dir=ROMM_TMP_PATH) as archive:
+            if not await self.run_to_file(archive, force):
+                log.warning("No content received from launchbox metadata update")
+                return update_stats.to_dict()
 
-                                        elem.clear()
-                                await pipe.execute()
-                                processed_files += 1
-                                update_stats.update(processed=processed_files)
-
-                    elif file == "Metadata.xml":
-                        with z.open(file, "r") as f:
-                            async with async_cache.pipeline() as pipe:
-                                ctx = ET.iterparse(f, events=("end",))
-
-                                current_game_image_db_id = None
-                                current_game_images: list[dict[str, Any]] = []
-
-                                for _, elem in ctx:
-                                    if elem.tag == "Game":
-                                        id_elem = elem.find("DatabaseID")
-                                        if id_elem is not None and id_elem.text:
-                                            await pipe.hset(
-                                                LAUNCHBOX_METADATA_DATABASE_ID_KEY,
-                                                mapping={
-                                                    id_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
+            try:
+                await self._load_archive(archive, update_stats)
+            except zipfile.BadZipFile:
+                log.error("Bad zip file in launchbox metadata update")
+                return update_stats.to_dict()
 
-                                        name_elem = elem.find("Name")
-                                        platform_elem = elem.find("Platform")
-                                        if (
-                                            name_elem is not None
-                                            and name_elem.text
-                                            and platform_elem is not None
-                                            and platform_elem.text
-                                        ):
-                                            # Use a unique combination of name and platform as the key
-                                            await pipe.hset(
-                                                LAUNCHBOX_METADATA_NAME_KEY,
-                                                mapping={
-                                                    f"{name_elem.text}:{platform_elem.text}": json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
-                                        elem.clear()
-
-                                    elif elem.tag == "GameAlternateName":
-                                        alternate_name_elem = elem.find("AlternateName")
-                                        if (
-                                            alternate_name_elem is not None
-                                            and alternate_name_elem.text
-                                        ):
-                                            await pipe.hset(
-                                                LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY,
-                                                mapping={
-                                                    alternate_name_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
-
-                                        elem.clear()
-
-                                    elif elem.tag == "GameImage":
-                                        id_elem = elem.find("DatabaseID")
-                                        if id_elem is not None and id_elem.text:
-                                            image_id = str(id_elem.text)
-
-                                            if (
-                                                current_game_image_db_id is not None
-                                                and image_id != current_game_image_db_id
-                                            ):
-                                                # Store the previous game's images
-                                                await pipe.hset(
-                                                    LAUNCHBOX_METADATA_IMAGE_KEY,
-                                                    mapping={
-                                                        current_game_image_db_id: json.dumps(
-                                                            current_game_images
-                                                        )
-                                                    },
-                                                )
-                                                current_game_images = []
-
-                                            current_game_image_db_id = image_id
-                                            current_game_images.append(
-                                                {
-                                                    child.tag: child.text
-                                                    for child in elem
-                                                }
-                                            )
-                                        elem.clear()
-
-                                # Store the last game's images
-                                if current_game_image_db_id is not None:
-                                    await pipe.hset(
-                                        LAUNCHBOX_METADATA_IMAGE_KEY,
-                                        mapping={
-                                            current_game_image_db_id: json.dumps(
-                                                current_game_images
-                                            )
-                                        },
-                                    )
-                                await pipe.execute()
-                                processed_files += 1
-                                update_stats.update(processed=processed_files)
-
-                    elif file == "Mame.xml":
-                        with z.open(file, "r") as f:
-                            async with async_cache.pipeline() as pipe:
-                                ctx = ET.iterparse(f, events=("end",))
-
-                                for _, elem in ctx:
-                                    if elem.tag == "MameFile":
-                                        filename_elem = elem.find("FileName")
-                                        if (
-                                            filename_elem is not None
-                                            and filename_elem.text
-                                        ):
-                                            await pipe.hset(
-                                                LAUNCHBOX_MAME_KEY,
-                                                mapping={
-                                                    filename_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
-                                            )
+        log.info("Scheduled launchbox metadata update completed!")
 
-                                        elem.clear()
-                                await pipe.execute()
-                                processed_files += 1
-                                update_stats.update(processed=processed_files)
+        return update_stats.to_dict()
 
-                    elif file == "Files.xml":
-                        with z.open(file, "r") as f:
-                            async with async_cache.pipeline() as pipe:
-                                ctx = ET.iterparse(f, events=("end",))
+    async def _load_archive(self, archive: IO[bytes], update_stats: UpdateStats):
+        with zipfile.ZipFile(archive) as z:
+            file_list = z.namelist()
+            total_files = len(file_list)
+            processed_files = 0
+
+            # Update initial progress
+            update_stats.update(processed=processed_files, total=total_files)
+
+            for file in file_list:
+                if file == "Platforms.xml":
+                    with z.open(file, "r") as f:
+                        async with async_cache.pipeline() as pipe:
+                            writer = BatchedHashWriter(pipe)
+
+                            for elem in iter_root_children(f):
+                                if elem.tag == "Platform":
+                                    name_elem = elem.find("Name")
+                                    if name_elem is not None and name_elem.text:
+                                        await writer.hset(
+                                            LAUNCHBOX_PLATFORMS_KEY,
+                                            name_elem.text,
+                                            json.dumps(element_to_dict(elem)),
+                                        )
+
+                            await writer.flush()
+                            processed_files += 1
+                            update_stats.update(processed=processed_files)
+
+                elif file == "Metadata.xml":
+                    with z.open(file, "r") as f:
+                        async with async_cache.pipeline() as pipe:
+                            writer = BatchedHashWriter(pipe)
+
+                            current_game_image_db_id = None
+                            current_game_images: list[dict[str, Any]] = []
+
+                            for elem in iter_root_children(f):
+                                if elem.tag == "Game":
+                                    game = json.dumps(element_to_dict(elem))
+
+                                    id_elem = elem.find("DatabaseID")
+                                    if id_elem is not None and id_elem.text:
+                                        await writer.hset(
+                                            LAUNCHBOX_METADATA_DATABASE_ID_KEY,
+                                            id_elem.text,
+                                            game,
+                                        )
+
+                                    name_elem = elem.find("Name")
+                                    platform_elem = elem.find("Platform")
+                                    if (
+                                        name_elem is not None
+                                        and name_elem.text
+                                        and platform_elem is not None
+                                        and platform_elem.text
+                                    ):
+                                        # Use a unique combination of name and platform as the key
+                                        await writer.hset(
+                                            LAUNCHBOX_METADATA_NAME_KEY,
+                                            f"{name_elem.text}:{platform_elem.text}",
+                                            game,
+                                        )
+
+                                elif elem.tag == "GameAlternateName":
+                                    alternate_name_elem = elem.find("AlternateName")
+                                    if (
+                                        alternate_name_elem is not None
+                                        and alternate_name_elem.text
+                                    ):
+                                        await writer.hset(
+                                            LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY,
+                                            alternate_name_elem.text,
+                                            json.dumps(element_to_dict(elem)),
+                                        )
+
+                                elif elem.tag == "GameImage":
+                                    id_elem = elem.find("DatabaseID")
+                                    if id_elem is not None and id_elem.text:
+                                        image_id = str(id_elem.text)
 
-                                for _, elem in ctx:
-                                    if elem.tag == "File":
-                                        filename_elem = elem.find("FileName")
                                         if (
-                                            filename_elem is not None
-                                            and filename_elem.text
+                                            current_game_image_db_id is not None
+                                            and image_id != current_game_image_db_id
                                         ):
-                                            await pipe.hset(
-                                                LAUNCHBOX_FILES_KEY,
-                                                mapping={
-                                                    filename_elem.text: json.dumps(
-                                                        {
-                                                            child.tag: child.text
-                                                            for child in elem
-                                                        }
-                                                    )
-                                                },
+                                            # Store the previous game's images
+                                            await writer.hset(
+                                                LAUNCHBOX_METADATA_IMAGE_KEY,
+                                                current_game_image_db_id,
+                                                json.dumps(current_game_images),
                                             )
-
-                                        elem.clear()
-                                await pipe.execute()
-                                processed_files += 1
-                                update_stats.update(processed=processed_files)
-
-        except zipfile.BadZipFile:
-            log.error("Bad zip file in launchbox metadata update")
-            return update_stats.to_dict()
-
-        log.info("Scheduled launchbox metadata update completed!")
-
-        return update_stats.to_dict()
+                                            current_game_images = []
+
+                                        current_game_image_db_id = image_id
+                                        current_game_images.append(
+                                            element_to_dict(elem)
+                                        )
+
+                            # Store the last game's images
+                            if current_game_image_db_id is not None:
+                                await writer.hset(
+                                    LAUNCHBOX_METADATA_IMAGE_KEY,
+                                    current_game_image_db_id,
+                                    json.dumps(current_game_images),
+                                )
+                            await writer.flush()
+                            processed_files += 1
+                            update_stats.update(processed=processed_files)
+
+                elif file in ("Mame.xml", "Files.xml"):
+                    key, tag = (
+                        (LAUNCHBOX_MAME_KEY, "MameFile")
+                        if file == "Mame.xml"
+                        else (LAUNCHBOX_FILES_KEY, "File")
+                    )
+                    with z.open(file, "r") as f:
+                        async with async_cache.pipeline() as pipe:
+                            writer = BatchedHashWriter(pipe)
+
+                            for elem in iter_root_children(f):
+                                if elem.tag == tag:
+                                    filename_elem = elem.find("FileName")
+                                    if filename_elem is not None and filename_elem.text:
+                                        await writer.hset(
+                                            key,
+                                            filename_elem.text,
+                                            json.dumps(element_to_dict(elem)),
+                                        )
+
+                            await writer.flush()
+                            processed_files += 1
+                            update_stats.update(processed=processed_files)
 
 
 update_launchbox_metadata_task = UpdateLaunchboxMetadataTask()
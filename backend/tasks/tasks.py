@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Any
+from typing import IO, Any
 
 import httpx
 from rq import get_current_job
@@ -15,6 +15,8 @@ from utils.context import ctx_httpx_client
 
 tasks_scheduler = Scheduler(queue=low_prio_queue, connection=low_prio_queue.connection)
 
+REMOTE_FILE_CHUNK_SIZE = 1024 * 1024
+
 
 def update_job_meta(metadata: dict[str, Any]) -> None:
     """Update the current RQ job's meta data with update stats information"""
@@ -147,13 +149,18 @@ class RemoteFilePullTask(PeriodicTask, ABC):
         super().__init__(*args, **kwargs)
         self.url = url
 
-    async def run(self, force: bool = False) -> Any:
+    def _start(self, force: bool) -> bool:
         if not self.enabled and not force:
             log.info(f"Scheduled {self.description} not enabled, unscheduling...")
             self.unschedule()
-            return None
+            return False
 
         log.info(f"Scheduled {self.description} started...")
+        return True
+
+    async def run(self, force: bool = False) -> Any:
+        if not self._start(force):
+            return None
 
         httpx_client = ctx_httpx_client.get()
         try:
@@ -164,3 +171,26 @@ class RemoteFilePullTask(PeriodicTask, ABC):
             log.error(f"Scheduled {self.description} failed", exc_info=True)
             log.error(e)
             return None
+
+    async def run_to_file(self, file: IO[bytes], force: bool = False) -> bool:
+        """Pull the remote file into a file object, without holding it in memory.
+
+        The file object is rewound once the download completes.
+        """
+        if not self._start(force):
+            return False
+
+        httpx_client = ctx_httpx_client.get()
+        try:
+            async with httpx_client.stream("GET", self.url, timeout=120) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(REMOTE_FILE_CHUNK_SIZE):
+                    file.write(chunk)
+        except httpx.HTTPError as e:
+            log.error(f"Scheduled {self.description} failed", exc_info=True)
+            log.error(e)
+            return False
+
+        file.flush()
+        file.seek(0)
+        return True
@@ -0,0 +1,111 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from adapters.services.igdb import MULTIQUERY_MAX_QUERIES, IGDBService, build_query
+
+
+class TestBuildQuery:
+    """Test the build_query function."""
+
+    def test_all_clauses(self):
+        query = build_query(
+            search_term="Pokémon", fields=["id", "name"], where="id=4", limit=5
+        )
+        assert query == 'search "Pokemon"; fields id,name; where id=4; limit 5;'
+
+    def test_no_clauses(self):
+        assert build_query() == ""
+
+
+class TestMultiqueryBatching:
+    """Test the batching of concurrent queries as multiqueries."""
+
+    @pytest.fixture
+    def service(self):
+        service = IGDBService(twitch_auth=MagicMock())
+
+        async def post(url: str, content: str, request_timeout: int = 120) -> list:
+            if url.endswith("/multiquery"):
+                queries = content.count("query games")
+                return [
+                    {"name": str(index), "result": [{"id": index}]}
+                    for index in range(queries)
+                ]
+            return [{"id": "single"}]
+
+        service._post = AsyncMock(side_effect=post)  # type: ignore[method-assign]
+        return service
+
+    async def test_concurrent_queries_are_batched(self, service):
+        """Test concurrent queries are sent together and routed back in order."""
+        async with service.multiquery_batching():
+            results = await asyncio.gather(
+                *(service.list_games(search_term=f"game {i}") for i in range(3))
+            )
+
+        assert results == [[{"id": 0}], [{"id": 1}], [{"id": 2}]]
+        service._post.assert_awaited_once()
+        url, content = service._post.await_args.args
+        assert url == "https://api.igdb.com/v4/multiquery"
+        assert 'query games "1" { search "game 1"; };' in content
+
+    async def test_full_batches_are_split(self, service):
+        """Test no multiquery holds more queries than IGDB allows."""
+        async with service.multiquery_batching():
+            await asyncio.gather(
+                *(
+                    service.list_games(search_term=f"game {i}")
+                    for i in range(MULTIQUERY_MAX_QUERIES + 1)
+                )
+            )
+
+        assert service._post.await_count == 2
+
+    async def test_single_query_uses_its_endpoint(self, service):
+        """Test a query made alone isn't wrapped in a multiquery."""
+        async with service.multiquery_batching():
+            result = await service.list_games(search_term="game")
+
+        assert result == [{"id": "single"}]
+        assert service._post.await_args.args[0] == "https://api.igdb.com/v4/games"
+
+    async def test_errors_are_raised_to_all_queries(self, service):
+        service._post.side_effect = RuntimeError("IGDB is down")
+
+        async with service.multiquery_batching():
+            results = await asyncio.gather(
+                *(service.list_games(search_term=f"game {i}") for i in range(2)),
+                return_exceptions=True,
+            )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def test_failed_batch_queries_are_sent_alone(self, service):
+        """Test the queries of a failed multiquery don't resolve to nothing."""
+        post = service._post.side_effect
+
+        async def failing_multiquery(url: str, content: str, **kwargs) -> list:
+            # _post returns no results when IGDB rejects the request
+            if url.endswith("/multiquery"):
+                return []
+            return await post(url, content, **kwargs)
+
+        service._post.side_effect = failing_multiquery
+
+        async with service.multiquery_batching():
+            results = await asyncio.gather(
+                *(service.list_games(search_term=f"game {i}") for i in range(2))
+            )
+
+        assert results == [[{"id": "single"}], [{"id": "single"}]]
+        assert [call.args[0] for call in service._post.await_args_list] == [
+            "https://api.igdb.com/v4/multiquery",
+            "https://api.igdb.com/v4/games",
+            "https://api.igdb.com/v4/games",
+        ]
+
+    async def test_queries_are_not_batched_outside_context(self, service):
+        await service.list_games(search_term="game")
+        assert service._post.await_args.args[0] == "https://api.igdb.com/v4/games"
@@ -12,6 +12,7 @@ from adapters.services.mobygames import (
     MobyGamesService,
     auth_middleware,
 )
+from utils.rate_limit import ProviderRateLimitedException
 
 INVALID_GAME_ID = 999999
 
@@ -191,6 +192,45 @@ class TestMobyGamesServiceUnit:
         }  # First call returns empty dict, retry happens on second call
         mock_sleep.assert_called_once_with(2)
 
+    @pytest.mark.asyncio
+    async def test_request_rate_limit_reached(self, service):
+        """Test requests over the budget fail instead of returning no results."""
+        mock_session = AsyncMock()
+        mock_context = MagicMock()
+        mock_context.get.return_value = mock_session
+
+        with (
+            patch("adapters.services.mobygames.ctx_aiohttp_session", mock_context),
+            patch(
+                "adapters.services.mobygames.acquire_rate_limit",
+                new=AsyncMock(return_value=False),
+            ),
+            pytest.raises(ProviderRateLimitedException),
+        ):
+            await service._request("https://api.mobygames.com/v1/games")
+
+        mock_session.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_request_server_error_with_retry(self, service):
+        """Test a server failing twice isn't mistaken for an empty result."""
+        mock_session = AsyncMock()
+        mock_session.get.side_effect = aiohttp.ClientResponseError(
+            request_info=MagicMock(),
+            history=(),
+            status=http.HTTPStatus.BAD_GATEWAY,
+        )
+
+        mock_context = MagicMock()
+        mock_context.get.return_value = mock_session
+
+        with patch("adapters.services.mobygames.ctx_aiohttp_session", mock_context):
+            with pytest.raises(HTTPException) as exc_info:
+                await service._request("https://api.mobygames.com/v1/games")
+
+        assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert mock_session.get.call_count == 2
+
     @pytest.mark.asyncio
     async def test_request_json_decode_error(self, service):
         """Test handling of JSON decode error."""
@@ -304,3 +304,34 @@ class TestRAHasherServicePerformance:
         # All should succeed
         assert all(result == "a1b2c3d4e5f6789012345678901234ab" for result in results)
         assert len(results) == 5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_processes_are_bounded(self, service):
+        """Test no more than SCAN_RAHASHER_WORKERS processes run at once."""
+        running = 0
+        max_running = 0
+
+        async def wait() -> int:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return 1
+
+        mock_proc = AsyncMock()
+        mock_proc.wait.side_effect = wait
+        mock_proc.stdout.read.return_value = b"a1b2c3d4e5f6789012345678901234ab\n"
+        mock_proc.stderr = None
+
+        with (
+            patch("adapters.services.rahasher.SCAN_RAHASHER_WORKERS", 2),
+            patch("adapters.services.rahasher._rahasher_semaphores", {}),
+            patch("asyncio.create_subprocess_exec", return_value=mock_proc),
+            patch("handler.metadata.ra_handler.RA_ID_TO_SLUG", {7: "nes"}),
+        ):
+            await asyncio.gather(
+                *(service.calculate_hash(7, f"/path/to/game{i}.nes") for i in range(5))
+            )
+
+        assert max_running == 2
@@ -16,6 +16,13 @@ from adapters.services.screenscraper import (
     ScreenScraperService,
     auth_middleware,
 )
+from handler.redis_handler import async_cache
+from utils.rate_limit import (
+    RATE_LIMIT_KEY,
+    ProviderRateLimitedException,
+    RateLimit,
+    get_rate_limit,
+)
 
 INVALID_GAME_ID = 999999
 INVALID_SYSTEM_ID = 999999
@@ -228,11 +235,12 @@ class TestScreenScraperServiceUnit:
 
         with patch("adapters.services.screenscraper.ctx_aiohttp_session", mock_context):
             with patch("asyncio.sleep") as mock_sleep:
-                result = await service._request(
-                    "https://api.screenscraper.fr/api2/jeuInfos.php"
-                )
+                with pytest.raises(ProviderRateLimitedException):
+                    await service._request(
+                        "https://api.screenscraper.fr/api2/jeuInfos.php"
+                    )
 
-        assert result == {}
+        assert mock_session.get.call_count == 2
         mock_sleep.assert_called_once_with(2)
 
     @pytest.mark.asyncio
@@ -300,6 +308,54 @@ class TestScreenScraperServiceUnit:
 
         assert result == {}
 
+    @pytest.mark.asyncio
+    async def test_request_quota_exceeded(self, service):
+        """Test requests stop once the daily quota is exhausted."""
+        mock_session = AsyncMock()
+        mock_session.get.side_effect = aiohttp.ClientResponseError(
+            request_info=MagicMock(),
+            history=(),
+            status=430,
+        )
+
+        mock_context = MagicMock()
+        mock_context.get.return_value = mock_session
+
+        with (
+            patch("adapters.services.screenscraper.ctx_aiohttp_session", mock_context),
+            patch(
+                "adapters.services.screenscraper.block_rate_limit", new=AsyncMock()
+            ) as mock_block,
+            pytest.raises(ProviderRateLimitedException),
+        ):
+            await service._request("https://api.screenscraper.fr/api2/jeuInfos.php")
+
+        assert mock_session.get.call_count == 1
+        mock_block.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_update_rate_limit_from_user_account(self, service):
+        """Test the rate limit follows the limits of the user account."""
+        await service._update_rate_limit(
+            {
+                "response": {
+                    "ssuser": {
+                        "maxthreads": "2",
+                        "maxrequestspermin": "120",
+                        "requeststoday": "10",
+                        "maxrequestsperday": "20000",
+                    }
+                }
+            }
+        )
+
+        try:
+            assert await get_rate_limit(async_cache, "screenscraper") == RateLimit(
+                requests=120, period=60, burst=2
+            )
+        finally:
+            await async_cache.delete(f"{RATE_LIMIT_KEY}:screenscraper:budget")
+
     @pytest.mark.asyncio
     async def test_get_game_info_with_crc(self, service):
         """Test get_game_info with CRC parameter."""
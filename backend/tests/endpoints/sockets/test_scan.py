@@ -1,9 +1,17 @@
-from unittest.mock import Mock
+import asyncio
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
-from endpoints.sockets.scan import ScanStats, _should_scan_rom
+from endpoints.sockets.scan import (
+    ScanStats,
+    ScanWriteBuffer,
+    _identify_platform,
+    _should_scan_rom,
+    scan_platforms,
+)
 from handler.scan_handler import ScanType
+from models.platform import Platform
 from models.rom import Rom
 
 
@@ -70,6 +78,16 @@ def test_merging_scan_stats():
     assert stats.added_firmware == 25
 
 
+def test_scan_stats_unavailable_sources():
+    stats = ScanStats()
+    assert stats.to_dict()["unavailable_sources"] == []
+
+    stats.update(unavailable_sources=["hasheous", "hltb"])
+    assert stats.to_dict()["unavailable_sources"] == ["hasheous", "hltb"]
+    # Each scan starts with its own list
+    assert ScanStats().unavailable_sources == []
+
+
 class TestShouldScanRom:
     def test_new_platforms_scan_with_no_rom(self):
         """NEW_PLATFORMS should scan when rom is None"""
@@ -240,3 +258,232 @@ class TestShouldScanRom:
 
         result = _should_scan_rom(scan_type, rom, roms_ids)
         assert result is expected
+
+
+class TestIdentifyPlatform:
+    @pytest.fixture
+    def scan_mocks(self, mocker):
+        platform = Platform(id=1, name="Nintendo 64", slug="n64", fs_slug="n64")
+        platform.rom_count = 0
+        fs_roms = [{"fs_name": f"rom_{i}.z64"} for i in range(12)]
+
+        mocker.patch("endpoints.sockets.scan.redis_client").get.return_value = None
+        mocker.patch("endpoints.sockets.scan.PlatformSchema")
+        mocker.patch("endpoints.sockets.scan.scan_platform", AsyncMock())
+        db_platform_handler = mocker.patch("endpoints.sockets.scan.db_platform_handler")
+        db_platform_handler.get_platform_by_fs_slug.return_value = platform
+        db_platform_handler.add_platform.return_value = platform
+        mocker.patch("endpoints.sockets.scan.fs_firmware_handler").get_firmware = (
+            AsyncMock(return_value=[])
+        )
+        fs_rom_handler = mocker.patch("endpoints.sockets.scan.fs_rom_handler")
+        fs_rom_handler.get_saved_roms_inventory = AsyncMock(return_value=None)
+        fs_rom_handler.get_roms_inventory = AsyncMock()
+        fs_rom_handler.save_roms_inventory = AsyncMock()
+        fs_rom_handler.get_roms_from_inventory.return_value = fs_roms
+        db_rom_handler = mocker.patch("endpoints.sockets.scan.db_rom_handler")
+        db_rom_handler.get_roms_by_fs_name.return_value = {}
+        db_rom_handler.mark_missing_roms.return_value = []
+        mocker.patch(
+            "endpoints.sockets.scan.db_firmware_handler"
+        ).mark_missing_firmware.return_value = []
+
+        return fs_roms
+
+    async def test_roms_identified_with_bounded_concurrency(self, mocker, scan_mocks):
+        """Roms are identified concurrently without exceeding SCAN_CONCURRENCY"""
+        mocker.patch("endpoints.sockets.scan.SCAN_CONCURRENCY", 3)
+
+        running = 0
+        max_running = 0
+        identified: list[str] = []
+
+        async def fake_identify_rom(fs_rom, scan_stats, **kwargs):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            identified.append(fs_rom["fs_name"])
+            scan_stats.update(scanned_roms=scan_stats.scanned_roms + 1)
+            return scan_stats
+
+        mocker.patch("endpoints.sockets.scan._identify_rom", fake_identify_rom)
+
+        scan_stats = await _identify_platform(
+            platform_slug="n64",
+            scan_type=ScanType.QUICK,
+            fs_platforms=["n64"],
+            roms_ids=[],
+            metadata_sources=["igdb"],
+            socket_manager=AsyncMock(),
+            scan_stats=ScanStats(),
+        )
+
+        assert max_running == 3
+        assert sorted(identified) == sorted(r["fs_name"] for r in scan_mocks)
+        assert scan_stats.scanned_roms == len(scan_mocks)
+
+    async def test_failed_rom_cancels_the_others(self, mocker, scan_mocks):
+        """Roms still being identified are cancelled once one of them failed"""
+        mocker.patch("endpoints.sockets.scan.SCAN_CONCURRENCY", 3)
+
+        identified: list[str] = []
+
+        async def fake_identify_rom(fs_rom, scan_stats, **kwargs):
+            if fs_rom["fs_name"] == "rom_1.z64":
+                raise RuntimeError("Identification failed")
+            await asyncio.sleep(0.01)
+            identified.append(fs_rom["fs_name"])
+            return scan_stats
+
+        mocker.patch("endpoints.sockets.scan._identify_rom", fake_identify_rom)
+
+        with pytest.raises(RuntimeError, match="Identification failed"):
+            await _identify_platform(
+                platform_slug="n64",
+                scan_type=ScanType.QUICK,
+                fs_platforms=["n64"],
+                roms_ids=[],
+                metadata_sources=["igdb"],
+                socket_manager=AsyncMock(),
+                scan_stats=ScanStats(),
+            )
+
+        # Give cancelled roms the time they would have needed to complete
+        await asyncio.sleep(0.05)
+        assert identified == []
+
+    async def test_quick_scan_only_visits_changed_roms(self, mocker, scan_mocks):
+        """Quick scans only identify the roms that changed since the last scan"""
+        fs_rom_handler = mocker.patch("endpoints.sockets.scan.fs_rom_handler")
+        fs_rom_handler.get_saved_roms_inventory = AsyncMock(
+            return_value={"mtime_ns": 1, "rom_count": 0, "entries": {}}
+        )
+        fs_rom_handler.get_roms_inventory = AsyncMock(
+            return_value={"mtime_ns": 2, "rom_count": 0, "entries": {}}
+        )
+        fs_rom_handler.save_roms_inventory = AsyncMock()
+        fs_rom_handler.get_roms_from_inventory.return_value = scan_mocks
+        fs_rom_handler.get_roms_inventory_changes.return_value = (
+            {"rom_0.z64", "rom_1.z64"},
+            {"deleted.z64"},
+        )
+        db_rom_handler = mocker.patch("endpoints.sockets.scan.db_rom_handler")
+        db_rom_handler.get_roms_by_fs_name.return_value = {}
+        db_rom_handler.mark_roms_missing_by_fs_name.return_value = []
+        db_rom_handler.count_roms.return_value = 12
+
+        identified: list[str] = []
+
+        async def fake_identify_rom(fs_rom, scan_stats, **kwargs):
+            identified.append(fs_rom["fs_name"])
+            scan_stats.update(scanned_roms=scan_stats.scanned_roms + 1)
+            return scan_stats
+
+        mocker.patch("endpoints.sockets.scan._identify_rom", fake_identify_rom)
+
+        scan_stats = await _identify_platform(
+            platform_slug="n64",
+            scan_type=ScanType.QUICK,
+            fs_platforms=["n64"],
+            roms_ids=[],
+            metadata_sources=["igdb"],
+            socket_manager=AsyncMock(),
+            scan_stats=ScanStats(),
+        )
+
+        assert sorted(identified) == ["rom_0.z64", "rom_1.z64"]
+        assert scan_stats.scanned_roms == len(scan_mocks)
+        db_rom_handler.mark_missing_roms.assert_not_called()
+        db_rom_handler.mark_roms_missing_by_fs_name.assert_called_once_with(
+            1, {"deleted.z64"}
+        )
+        saved_inventory = fs_rom_handler.save_roms_inventory.call_args.args[1]
+        assert saved_inventory["rom_count"] == 12
+
+
+class TestScanPlatforms:
+    async def test_roms_listed_once_for_selected_platforms(self, mocker):
+        """Progress totals reuse the listing that is then scanned"""
+        n64_inventory = {"mtime_ns": 1, "rom_count": 0, "entries": {}}
+        mocker.patch("endpoints.sockets.scan.redis_client")
+        mocker.patch("endpoints.sockets.scan._get_socket_manager").return_value = (
+            AsyncMock()
+        )
+        mocker.patch("endpoints.sockets.scan.fs_platform_handler").get_platforms = (
+            AsyncMock(return_value=["n64", "psx"])
+        )
+        db_platform_handler = mocker.patch("endpoints.sockets.scan.db_platform_handler")
+        db_platform_handler.get_platform.return_value = Platform(
+            id=1, name="Nintendo 64", slug="n64", fs_slug="n64"
+        )
+        db_platform_handler.mark_missing_platforms.return_value = []
+        fs_rom_handler = mocker.patch("endpoints.sockets.scan.fs_rom_handler")
+        fs_rom_handler.get_saved_roms_inventory = AsyncMock(return_value=None)
+        fs_rom_handler.get_roms_inventory = AsyncMock(return_value=n64_inventory)
+        fs_rom_handler.get_roms_from_inventory.return_value = [
+            {"fs_name": "rom_1.z64"},
+            {"fs_name": "rom_2.z64"},
+        ]
+        identify_platform = mocker.patch(
+            "endpoints.sockets.scan._identify_platform",
+            AsyncMock(side_effect=lambda **kwargs: kwargs["scan_stats"]),
+        )
+
+        scan_stats = await scan_platforms(
+            platform_ids=[1], scan_type=ScanType.QUICK, metadata_sources=["igdb"]
+        )
+
+        fs_rom_handler.get_roms_inventory.assert_awaited_once()
+        assert scan_stats.total_platforms == 1
+        assert scan_stats.total_roms == 2
+        assert identify_platform.call_args.kwargs["roms_inventory"] is n64_inventory
+
+
+class TestScanWriteBuffer:
+    @pytest.fixture
+    def db_rom_handler(self, mocker):
+        mocker.patch("endpoints.sockets.scan.SimpleRomSchema")
+        db_rom_handler = mocker.patch("endpoints.sockets.scan.db_rom_handler")
+        db_rom_handler.get_scanned_roms.side_effect = lambda ids: [
+            Rom(id=rom_id) for rom_id in ids
+        ]
+        return db_rom_handler
+
+    async def test_flushes_every_batch_size_roms(self, db_rom_handler):
+        """Results are written in a single call once the batch is full"""
+        socket_manager = AsyncMock()
+        write_buffer = ScanWriteBuffer(
+            socket_manager, batch_size=3, flush_interval=3600
+        )
+
+        await write_buffer.add_rom(Rom(id=1), [])
+        await write_buffer.update_rom(2, {"missing_from_fs": False})
+        db_rom_handler.write_scan_results.assert_not_called()
+
+        await write_buffer.add_rom(Rom(id=3), [])
+        db_rom_handler.write_scan_results.assert_called_once()
+        kwargs = db_rom_handler.write_scan_results.call_args.kwargs
+        assert [rom.id for rom in kwargs["roms"]] == [1, 3]
+        assert kwargs["rom_updates"] == {2: {"missing_from_fs": False}}
+        assert len(write_buffer) == 0
+
+        # Only the written roms are sent to the client
+        db_rom_handler.get_scanned_roms.assert_called_once_with([1, 3])
+        assert socket_manager.emit.await_count == 3
+
+    async def test_flushes_after_interval(self, db_rom_handler):
+        """Results are written once the flush interval has passed"""
+        write_buffer = ScanWriteBuffer(AsyncMock(), batch_size=100, flush_interval=0)
+
+        await write_buffer.update_rom(1, {"fs_name": "renamed.z64"})
+
+        db_rom_handler.write_scan_results.assert_called_once()
+        db_rom_handler.get_scanned_roms.assert_not_called()
+
+    async def test_empty_flush(self, db_rom_handler):
+        """Flushing an empty buffer doesn't touch the database"""
+        await ScanWriteBuffer(AsyncMock()).flush()
+
+        db_rom_handler.write_scan_results.assert_not_called()
@@ -1,14 +1,25 @@
+import asyncio
 import os
+from io import BytesIO
 from pathlib import Path
 from unittest.mock import Mock, patch
 
+import httpx
 import pytest
+from PIL import Image
 
 from config import RESOURCES_BASE_PATH
 from handler.filesystem.base_handler import CoverSize
-from handler.filesystem.resources_handler import FSResourcesHandler
+from handler.filesystem.resources_handler import (
+    ARTWORK_VALIDATORS_KEY,
+    RA_BADGES_CONCURRENCY,
+    RA_BADGES_KEY,
+    FSResourcesHandler,
+)
+from handler.redis_handler import async_cache
 from models.collection import Collection
 from models.rom import Rom
+from utils.context import ctx_httpx_client
 
 
 class TestFSResourcesHandler:
@@ -161,10 +172,8 @@ class TestFSResourcesHandler:
 
                 await handler.get_cover(rom, False, url)
 
-                # Should call _store_cover for both sizes since covers don't exist
-                assert mock_store.call_count == 2
-                mock_store.assert_any_call(rom, url, CoverSize.SMALL)
-                mock_store.assert_any_call(rom, url, CoverSize.BIG)
+                # Should call _store_cover once for both sizes since covers don't exist
+                mock_store.assert_called_once_with(rom, url)
 
     @pytest.mark.asyncio
     async def test_get_cover_with_overwrite(
@@ -176,10 +185,8 @@ class TestFSResourcesHandler:
         with patch.object(handler, "_store_cover") as mock_store:
             await handler.get_cover(rom, True, url)
 
-            # Should call _store_cover for both sizes regardless of existence
-            assert mock_store.call_count == 2
-            mock_store.assert_any_call(rom, url, CoverSize.SMALL)
-            mock_store.assert_any_call(rom, url, CoverSize.BIG)
+            # Should call _store_cover once for both sizes regardless of existence
+            mock_store.assert_called_once_with(rom, url)
 
     async def test_remove_cover_no_entity(self, handler: FSResourcesHandler):
         """Test remove_cover with no entity"""
@@ -485,3 +492,277 @@ class TestFSResourcesHandler:
         assert isinstance(ra_badges, str)
         assert "retroachievements" in ra_base
         assert "badges" in ra_badges
+
+
+class TestConditionalDownloads:
+    """Test assets are only downloaded again when they changed upstream"""
+
+    @pytest.fixture
+    def handler(self, tmp_path: Path):
+        handler = FSResourcesHandler()
+        handler.base_path = tmp_path.resolve()
+        return handler
+
+    @pytest.fixture
+    def rom(self):
+        rom = Mock(spec=Rom)
+        rom.id = 1
+        rom.fs_resources_path = "roms/1/1"
+        return rom
+
+    @pytest.fixture
+    async def requests(self):
+        requests: list[httpx.Request] = []
+
+        def respond(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200, stream=httpx.ByteStream(b"manual"), headers={"ETag": '"v1"'}
+            )
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        token = ctx_httpx_client.set(client)
+        yield requests
+        ctx_httpx_client.reset(token)
+        await client.aclose()
+        await async_cache.delete(ARTWORK_VALIDATORS_KEY)
+
+    async def test_unchanged_asset_is_not_downloaded_again(
+        self, handler: FSResourcesHandler, rom, requests
+    ):
+        url = "http://example.com/manual.pdf"
+
+        assert await handler.get_manual(rom, True, url) == "roms/1/1/manual/1.pdf"
+        assert "If-None-Match" not in requests[0].headers
+
+        with patch.object(handler, "write_file_streamed") as mock_write:
+            assert await handler.get_manual(rom, True, url) == "roms/1/1/manual/1.pdf"
+            mock_write.assert_not_called()
+        assert requests[1].headers["If-None-Match"] == '"v1"'
+
+    async def test_asset_from_another_url_is_downloaded(
+        self, handler: FSResourcesHandler, rom, requests
+    ):
+        await handler.get_manual(rom, True, "http://example.com/manual.pdf")
+        await handler.get_manual(rom, True, "http://example.com/other.pdf")
+
+        assert "If-None-Match" not in requests[1].headers
+
+    async def test_missing_asset_is_downloaded_again(
+        self, handler: FSResourcesHandler, rom, requests
+    ):
+        url = "http://example.com/manual.pdf"
+        await handler.get_manual(rom, True, url)
+        await handler.remove_manual(rom)
+
+        assert await handler.get_manual(rom, True, url) == "roms/1/1/manual/1.pdf"
+        assert "If-None-Match" not in requests[1].headers
+
+    async def test_interrupted_download_keeps_the_asset(
+        self, handler: FSResourcesHandler, rom, requests
+    ):
+        """Test a failed download leaves the stored asset as it was"""
+
+        class InterruptedStream(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield b"man"
+                raise httpx.ReadError("Connection reset")
+
+        url = "http://example.com/manual.pdf"
+        await handler.get_manual(rom, True, url)
+
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, stream=InterruptedStream())
+            )
+        )
+        token = ctx_httpx_client.set(client)
+        try:
+            assert await handler.get_manual(rom, True, url) == "roms/1/1/manual/1.pdf"
+        finally:
+            ctx_httpx_client.reset(token)
+            await client.aclose()
+
+        manual_path = handler.base_path / "roms/1/1/manual"
+        assert os.listdir(manual_path) == ["1.pdf"]
+        assert (manual_path / "1.pdf").read_bytes() == b"manual"
+
+        # The stored asset is downloaded again instead of being kept as is
+        await handler.get_manual(rom, True, url)
+        assert "If-None-Match" not in requests[1].headers
+
+    async def test_get_rom_artwork(self, handler: FSResourcesHandler, rom, requests):
+        """Test the cover, manual and screenshots of a rom are all fetched"""
+        with patch.object(handler, "_store_cover") as mock_store_cover:
+            artwork = await handler.get_rom_artwork(
+                rom,
+                overwrite=True,
+                url_cover="http://example.com/cover.png",
+                url_manual="http://example.com/manual.pdf",
+                url_screenshots=["http://example.com/0.jpg"],
+            )
+
+        mock_store_cover.assert_called_once()
+        assert artwork.path_manual == "roms/1/1/manual/1.pdf"
+        assert artwork.path_screenshots == ["roms/1/1/screenshots/0.jpg"]
+        assert len(requests) == 2
+
+
+class TestCoverDerivation:
+    """Test the covers are derived from a single decoded image"""
+
+    @pytest.fixture
+    def handler(self, tmp_path: Path):
+        handler = FSResourcesHandler()
+        handler.base_path = tmp_path.resolve()
+        return handler
+
+    @pytest.fixture
+    def rom(self):
+        rom = Mock(spec=Rom)
+        rom.id = 1
+        rom.fs_resources_path = "roms/1/1"
+        return rom
+
+    @pytest.fixture
+    def artwork(self):
+        artwork = BytesIO()
+        Image.new("RGB", (100, 200), "red").save(artwork, "PNG")
+        artwork.seek(0)
+        return artwork
+
+    async def test_store_artwork_decodes_once(
+        self, handler: FSResourcesHandler, rom, artwork
+    ):
+        with (
+            patch(
+                "handler.filesystem.resources_handler."
+                "ENABLE_SCHEDULED_CONVERT_IMAGES_TO_WEBP",
+                True,
+            ),
+            patch(
+                "handler.filesystem.resources_handler.Image.open",
+                wraps=Image.open,
+            ) as mock_open,
+        ):
+            path_cover_l, path_cover_s = await handler.store_artwork(
+                rom, artwork, "png"
+            )
+
+        assert mock_open.call_count == 1
+        assert path_cover_l == "roms/1/1/cover/big.png"
+        assert path_cover_s == "roms/1/1/cover/small.png"
+
+        cover_path = handler.base_path / "roms/1/1/cover"
+        with Image.open(cover_path / "big.webp") as img:
+            assert img.size == (100, 200)
+        with Image.open(cover_path / "small.png") as img:
+            assert img.size == (40, 80)
+        with Image.open(cover_path / "small.webp") as img:
+            assert img.size == (40, 80)
+
+    async def test_get_cover_downloads_once(
+        self, handler: FSResourcesHandler, rom, artwork
+    ):
+        """Test both cover sizes are derived from a single download"""
+        requests: list[httpx.Request] = []
+
+        def respond(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, stream=httpx.ByteStream(artwork.getvalue()))
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        token = ctx_httpx_client.set(client)
+        try:
+            path_cover_s, path_cover_l = await handler.get_cover(
+                rom, True, "http://example.com/cover.png"
+            )
+        finally:
+            ctx_httpx_client.reset(token)
+            await client.aclose()
+
+        assert len(requests) == 1
+        assert path_cover_s == "roms/1/1/cover/small.png"
+        assert path_cover_l == "roms/1/1/cover/big.png"
+        with Image.open(handler.base_path / path_cover_s) as img:
+            assert img.size == (40, 80)
+
+    async def test_invalid_artwork(self, handler: FSResourcesHandler, rom):
+        result = await handler.store_artwork(rom, BytesIO(b"not an image"), "png")
+        assert result == (None, None)
+
+
+class TestRABadges:
+    """Test the achievements badges are downloaded concurrently, and only once"""
+
+    @pytest.fixture
+    def handler(self, tmp_path: Path):
+        handler = FSResourcesHandler()
+        handler.base_path = tmp_path.resolve()
+        return handler
+
+    @pytest.fixture
+    async def requests(self):
+        requests: list[str] = []
+        running = 0
+        self.max_running = 0
+
+        async def respond(request: httpx.Request) -> httpx.Response:
+            nonlocal running
+            requests.append(str(request.url))
+            running += 1
+            self.max_running = max(self.max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return httpx.Response(200, stream=httpx.ByteStream(b"badge"))
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        token = ctx_httpx_client.set(client)
+        yield requests
+        ctx_httpx_client.reset(token)
+        await client.aclose()
+        await async_cache.delete(RA_BADGES_KEY)
+
+    async def test_badges_are_downloaded_concurrently(
+        self, handler: FSResourcesHandler, requests
+    ):
+        badges = [
+            (f"http://example.com/{idx}.png", f"roms/1/1/badges/{idx}.png")
+            for idx in range(RA_BADGES_CONCURRENCY * 2)
+        ]
+
+        await handler.store_ra_badges(badges)
+
+        assert len(requests) == len(badges)
+        assert self.max_running == RA_BADGES_CONCURRENCY
+        assert await handler.read_file("roms/1/1/badges/0.png") == b"badge"
+
+    async def test_existing_badges_are_skipped(
+        self, handler: FSResourcesHandler, requests
+    ):
+        await handler.write_file(b"badge", "roms/1/1/badges", "0.png")
+
+        await handler.store_ra_badges(
+            [("http://example.com/0.png", "roms/1/1/badges/0.png")]
+        )
+
+        assert requests == []
+
+    async def test_badges_are_shared_by_roms(
+        self, handler: FSResourcesHandler, requests
+    ):
+        """Test badges of the same game are downloaded once for all its roms"""
+        url = "http://example.com/0.png"
+
+        await asyncio.gather(
+            handler.store_ra_badges([(url, "roms/1/1/badges/0.png")]),
+            handler.store_ra_badges([(url, "roms/1/2/badges/0.png")]),
+        )
+        await handler.store_ra_badges([(url, "roms/1/3/badges/0.png")])
+
+        assert requests == [url]
+        for rom_id in (1, 2, 3):
+            badge_path = f"roms/1/{rom_id}/badges/0.png"
+            assert await handler.read_file(badge_path) == b"badge"
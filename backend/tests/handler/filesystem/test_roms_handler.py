@@ -1,13 +1,20 @@
 import os
 from pathlib import Path
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
 from config.config_manager import LIBRARY_BASE_PATH, Config
-from handler.filesystem.roms_handler import FileHash, FSRomsHandler
+from handler.filesystem.roms_handler import (
+    ROM_RA_HASHES_KEY,
+    FileHash,
+    FSRomsHandler,
+    _hashing_executor,
+)
+from handler.redis_handler import async_cache
 from models.platform import Platform
 from models.rom import Rom, RomFile, RomFileCategory
+from utils.hashing import calculate_files_hashes, crc32_to_hex
 
 
 class TestFSRomsHandler:
@@ -279,6 +286,57 @@ class TestFSRomsHandler:
             # Check excluded files are not present
             assert "excluded_test.tmp" not in rom_names
 
+    @pytest.mark.asyncio
+    async def test_get_roms_inventory_reused_when_unchanged(
+        self, handler: FSRomsHandler, platform, config
+    ):
+        """Test the roms folder isn't listed again if it didn't change"""
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr("handler.filesystem.roms_handler.cm.get_config", lambda: config)
+            m.setattr("os.path.exists", lambda x: False)  # Normal structure
+
+            inventory = await handler.get_roms_inventory(platform)
+            assert inventory["entries"]["Super Mario 64 (J) (Rev A)"][0] == 1
+            assert inventory["entries"]["Paper Mario (USA).z64"][0] == 0
+
+            scandir = Mock(side_effect=AssertionError("folder listed again"))
+            m.setattr("os.scandir", scandir)
+            assert (
+                await handler.get_roms_inventory(platform, previous=inventory)
+                is inventory
+            )
+
+    def test_get_roms_inventory_changes(self, handler: FSRomsHandler, config):
+        """Test added, modified and removed roms are found by comparing snapshots"""
+        previous = {
+            "mtime_ns": 1,
+            "rom_count": 3,
+            "entries": {
+                "kept.z64": [0, 10, 100],
+                "modified": [1, 4096, 100],
+                "removed.z64": [0, 10, 100],
+            },
+        }
+        current = {
+            "mtime_ns": 2,
+            "rom_count": 0,
+            "entries": {
+                "kept.z64": [0, 10, 100],
+                "modified": [1, 4096, 200],
+                "added.z64": [0, 10, 200],
+                "excluded_test.tmp": [0, 10, 200],
+            },
+        }
+
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr("handler.filesystem.roms_handler.cm.get_config", lambda: config)
+            m.setattr("handler.filesystem.base_handler.cm.get_config", lambda: config)
+
+            changed, removed = handler.get_roms_inventory_changes(previous, current)
+
+        assert changed == {"modified", "added.z64"}
+        assert removed == {"removed.z64"}
+
     @pytest.mark.asyncio
     async def test_get_rom_files_single_rom(
         self, handler: FSRomsHandler, rom_single, config
@@ -326,6 +384,87 @@ class TestFSRomsHandler:
                 assert rom_file.file_size_bytes > 0
                 assert rom_file.last_modified is not None
 
+    async def test_get_rom_files_reuses_cached_hashes(
+        self, handler: FSRomsHandler, rom_single, config, mocker
+    ):
+        """Test get_rom_files doesn't rehash files that didn't change"""
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr("handler.filesystem.roms_handler.cm.get_config", lambda: config)
+            m.setattr("os.path.exists", lambda x: False)  # Normal structure
+
+            _, *first_hashes = await handler.get_rom_files(rom_single)
+
+            calculate_files_hashes = mocker.spy(handler, "_calculate_files_hashes")
+
+            _, *cached_hashes = await handler.get_rom_files(rom_single)
+            calculate_files_hashes.assert_not_called()
+            assert cached_hashes == first_hashes
+
+            _, *rehashed_hashes = await handler.get_rom_files(
+                rom_single, use_cached_hashes=False
+            )
+            calculate_files_hashes.assert_called_once()
+            assert rehashed_hashes == first_hashes
+
+            # Removed roms don't keep their cached hashes
+            rom_path = handler.get_roms_fs_structure(rom_single.platform.fs_slug)
+            await handler.remove_cached_hashes([f"{rom_path}/{rom_single.fs_name}"])
+            await handler.get_rom_files(rom_single)
+            assert calculate_files_hashes.call_count == 2
+
+    async def test_hashing_pool_is_shut_down(
+        self, handler: FSRomsHandler, rom_single, config
+    ):
+        """Test the hashing workers don't outlive the scan they were started for"""
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr("handler.filesystem.roms_handler.cm.get_config", lambda: config)
+            m.setattr("os.path.exists", lambda x: False)  # Normal structure
+
+            with handler.hashing_pool():
+                executor = _hashing_executor.get()
+                assert executor is not None
+
+            assert _hashing_executor.get() is None
+            with pytest.raises(RuntimeError):
+                executor.submit(print)
+
+            # Outside of scans, roms are still hashed
+            _, crc_hash, *_ = await handler.get_rom_files(
+                rom_single, use_cached_hashes=False
+            )
+            assert crc_hash
+
+    async def test_get_rom_files_reuses_cached_ra_hash(
+        self, handler: FSRomsHandler, rom_single, config, mocker
+    ):
+        """Test get_rom_files only runs RAHasher again if the rom changed"""
+        calculate_hash = mocker.patch(
+            "adapters.services.rahasher.RAHasherService.calculate_hash",
+            AsyncMock(return_value="a1b2c3d4e5f6789012345678901234ab"),
+        )
+        try:
+            with pytest.MonkeyPatch.context() as m:
+                m.setattr(
+                    "handler.filesystem.roms_handler.cm.get_config", lambda: config
+                )
+                m.setattr("os.path.exists", lambda x: False)  # Normal structure
+
+                *_, ra_hash = await handler.get_rom_files(rom_single)
+                *_, cached_ra_hash = await handler.get_rom_files(rom_single)
+                assert ra_hash == cached_ra_hash == "a1b2c3d4e5f6789012345678901234ab"
+                calculate_hash.assert_awaited_once()
+
+                await handler.get_rom_files(rom_single, use_cached_hashes=False)
+                assert calculate_hash.await_count == 2
+
+                # Removed roms don't keep their cached hashes
+                rom_path = handler.get_roms_fs_structure(rom_single.platform.fs_slug)
+                await handler.remove_cached_hashes([f"{rom_path}/{rom_single.fs_name}"])
+                await handler.get_rom_files(rom_single)
+                assert calculate_hash.await_count == 3
+        finally:
+            await async_cache.delete(ROM_RA_HASHES_KEY)
+
     async def test_rename_fs_rom_same_name(self, handler: FSRomsHandler):
         """Test rename_fs_rom when old and new names are the same"""
         old_name = "test_rom.n64"
@@ -527,18 +666,12 @@ class TestFSRomsHandler:
             ).hexdigest()
 
             # Test the hash calculation method
-            crc_result, _, md5_result, _, sha1_result, _ = (
-                handler._calculate_rom_hashes(
-                    test_file,
-                    0,
-                    hashlib.md5(usedforsecurity=False),
-                    hashlib.sha1(usedforsecurity=False),
-                )
-            )
+            [file_hash], rom_hash = calculate_files_hashes([test_file])
 
-            assert crc_result == expected_crc
-            assert md5_result.hexdigest() == expected_md5
-            assert sha1_result.hexdigest() == expected_sha1
+            assert file_hash["crc_hash"] == crc32_to_hex(expected_crc)
+            assert file_hash["md5_hash"] == expected_md5
+            assert file_hash["sha1_hash"] == expected_sha1
+            assert rom_hash == file_hash
 
         finally:
             # Clean up
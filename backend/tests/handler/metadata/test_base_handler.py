@@ -1,8 +1,11 @@
+import asyncio
 import json
 import re
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
+from fastapi import HTTPException
 
 from handler.metadata.base_handler import (
     LEADING_ARTICLE_PATTERN,
@@ -18,11 +21,17 @@ from handler.metadata.base_handler import (
     SWITCH_PRODUCT_ID_REGEX,
     SWITCH_TITLEDB_REGEX,
     BaseRom,
+    CircuitBreaker,
+    MatchCandidates,
     MetadataHandler,
     UniversalPlatformSlug,
     _normalize_search_term,
+    is_provider_failure,
+    jarowinkler,
+    single_flight,
 )
 from handler.redis_handler import async_cache
+from utils.rate_limit import ProviderRateLimitedException
 
 
 class ExampleMetadataHandler(MetadataHandler):
@@ -246,11 +255,10 @@ class TestMetadataHandlerMethods:
     @pytest.mark.asyncio
     async def test_switch_titledb_format_cache_exists(self, handler: MetadataHandler):
         """Test Switch TitleDB format when cache exists."""
-        with patch.object(
-            async_cache, "exists", new_callable=AsyncMock
-        ) as mock_exists, patch.object(
-            async_cache, "hget", new_callable=AsyncMock
-        ) as mock_hget:
+        with (
+            patch.object(async_cache, "exists", new_callable=AsyncMock) as mock_exists,
+            patch.object(async_cache, "hget", new_callable=AsyncMock) as mock_hget,
+        ):
 
             mock_exists.return_value = True
             mock_hget.return_value = json.dumps(
@@ -273,13 +281,13 @@ class TestMetadataHandlerMethods:
         self, handler: MetadataHandler
     ):
         """Test Switch TitleDB format when cache is missing but fetch succeeds."""
-        with patch.object(
-            async_cache, "exists", new_callable=AsyncMock
-        ) as mock_exists, patch.object(
-            async_cache, "hget", new_callable=AsyncMock
-        ) as mock_hget, patch(
-            "handler.metadata.base_handler.update_switch_titledb_task"
-        ) as mock_task:
+        with (
+            patch.object(async_cache, "exists", new_callable=AsyncMock) as mock_exists,
+            patch.object(async_cache, "hget", new_callable=AsyncMock) as mock_hget,
+            patch(
+                "handler.metadata.base_handler.update_switch_titledb_task"
+            ) as mock_task,
+        ):
 
             # First call returns False (cache missing), second returns True (after fetch)
             mock_exists.side_effect = [False, True]
@@ -298,13 +306,13 @@ class TestMetadataHandlerMethods:
         self, handler: MetadataHandler
     ):
         """Test Switch TitleDB format when cache is missing and fetch fails."""
-        with patch.object(
-            async_cache, "exists", new_callable=AsyncMock
-        ) as mock_exists, patch(
-            "handler.metadata.base_handler.update_switch_titledb_task"
-        ) as mock_task, patch(
-            "handler.metadata.base_handler.log"
-        ) as mock_log:
+        with (
+            patch.object(async_cache, "exists", new_callable=AsyncMock) as mock_exists,
+            patch(
+                "handler.metadata.base_handler.update_switch_titledb_task"
+            ) as mock_task,
+            patch("handler.metadata.base_handler.log") as mock_log,
+        ):
 
             mock_exists.return_value = False  # Cache always missing
             mock_task.run = AsyncMock()
@@ -319,11 +327,10 @@ class TestMetadataHandlerMethods:
     @pytest.mark.asyncio
     async def test_switch_titledb_format_not_found(self, handler: MetadataHandler):
         """Test Switch TitleDB format when title ID not found."""
-        with patch.object(
-            async_cache, "exists", new_callable=AsyncMock
-        ) as mock_exists, patch.object(
-            async_cache, "hget", new_callable=AsyncMock
-        ) as mock_hget:
+        with (
+            patch.object(async_cache, "exists", new_callable=AsyncMock) as mock_exists,
+            patch.object(async_cache, "hget", new_callable=AsyncMock) as mock_hget,
+        ):
 
             mock_exists.return_value = True
             mock_hget.return_value = None
@@ -337,11 +344,10 @@ class TestMetadataHandlerMethods:
     @pytest.mark.asyncio
     async def test_switch_productid_format_found(self, handler: MetadataHandler):
         """Test Switch Product ID format when found."""
-        with patch.object(
-            async_cache, "exists", new_callable=AsyncMock
-        ) as mock_exists, patch.object(
-            async_cache, "hget", new_callable=AsyncMock
-        ) as mock_hget:
+        with (
+            patch.object(async_cache, "exists", new_callable=AsyncMock) as mock_exists,
+            patch.object(async_cache, "hget", new_callable=AsyncMock) as mock_hget,
+        ):
             mock_exists.return_value = True
             mock_hget.return_value = json.dumps({"name": "Product Game"})
 
@@ -450,6 +456,221 @@ class TestMetadataHandlerMethods:
         assert result["api_key"] == "ab***ab"  # Shows first 2 and last 2
 
 
+class TestFindBestMatch:
+    """Test the fuzzy matching of game names."""
+
+    GAME_NAMES = [
+        "Super Mario Bros.",
+        "Super Mario Bros. 3",
+        "Super Mario World",
+        "The Legend of Zelda",
+        "Zelda II - Adventure of Link",
+        "Metroid",
+    ]
+
+    @pytest.fixture
+    def handler(self):
+        return ExampleMetadataHandler()
+
+    def test_exact_match(self, handler: MetadataHandler):
+        assert handler.find_best_match("legend of zelda", self.GAME_NAMES) == (
+            "The Legend of Zelda",
+            1.0,
+        )
+
+    def test_fuzzy_match(self, handler: MetadataHandler):
+        best_match, score = handler.find_best_match(
+            "Super Mario Bros 3", self.GAME_NAMES
+        )
+        assert best_match == "Super Mario Bros. 3"
+        assert score == 1.0
+
+        best_match, score = handler.find_best_match("Super Mario Wrld", self.GAME_NAMES)
+        assert best_match == "Super Mario World"
+        assert 0.75 <= score < 1.0
+
+    def test_no_match(self, handler: MetadataHandler):
+        assert handler.find_best_match("Castlevania", self.GAME_NAMES) == (None, 0.0)
+        assert handler.find_best_match("Metroid", []) == (None, 0.0)
+
+    def test_split_game_name(self, handler: MetadataHandler):
+        best_match, score = handler.find_best_match(
+            "Adventure of Link", self.GAME_NAMES, split_game_name=True
+        )
+        assert best_match == "Zelda II - Adventure of Link"
+        assert score == 1.0
+
+    def test_first_candidate_wins_ties(self, handler: MetadataHandler):
+        assert handler.find_best_match("Metroid", ["Metroid!", "Metroid"]) == (
+            "Metroid!",
+            1.0,
+        )
+
+    def test_same_result_as_pairwise_scoring(self, handler: MetadataHandler):
+        """Test candidates skipped by length can't be better than the best match."""
+        search_terms = ["Mario", "Super Mario", "Zelda", "Link", "Metroid Prime", "M"]
+        for search_term in search_terms:
+            scores = [
+                jarowinkler.similarity(
+                    _normalize_search_term(search_term),
+                    _normalize_search_term(game_name),
+                )
+                for game_name in self.GAME_NAMES
+            ]
+            best_score = max(scores)
+            expected = (
+                (self.GAME_NAMES[scores.index(best_score)], best_score)
+                if best_score >= 0.5
+                else (None, 0.0)
+            )
+            assert (
+                handler.find_best_match(
+                    search_term, self.GAME_NAMES, min_similarity_score=0.5
+                )
+                == expected
+            )
+
+    def test_find_best_matches(self, handler: MetadataHandler):
+        results = handler.find_best_matches(
+            ["Metroid", "Super Mario World", "Castlevania"], self.GAME_NAMES
+        )
+        assert results == [
+            ("Metroid", 1.0),
+            ("Super Mario World", 1.0),
+            (None, 0.0),
+        ]
+
+    def test_extract_candidates(self):
+        candidates = MatchCandidates(self.GAME_NAMES)
+        matches = candidates.extract("Super Mario Bros", score_cutoff=0.8)
+
+        assert [name for name, _ in matches] == [
+            "Super Mario Bros.",
+            "Super Mario Bros. 3",
+            "Super Mario World",
+        ]
+        assert [score for _, score in matches] == sorted(
+            (score for _, score in matches), reverse=True
+        )
+        assert candidates.extract("Super Mario Bros", score_cutoff=0.8, limit=2) == (
+            matches[:2]
+        )
+
+
+class TestSingleFlight:
+    """Test the sharing of identical in-flight calls."""
+
+    class CountingHandler(ExampleMetadataHandler):
+        def __init__(self) -> None:
+            self.calls = 0
+
+        @single_flight
+        async def lookup(self, search_term: str) -> dict:
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            if search_term == "error":
+                raise ValueError("Lookup failed")
+            return {"name": search_term}
+
+    async def test_concurrent_identical_calls_are_shared(self):
+        handler = self.CountingHandler()
+        results = await asyncio.gather(*(handler.lookup("Metroid") for _ in range(3)))
+
+        assert results == [{"name": "Metroid"}] * 3
+        assert handler.calls == 1
+        # Each caller gets its own copy of the result
+        assert results[0] is not results[1]
+
+    async def test_different_calls_are_not_shared(self):
+        handler = self.CountingHandler()
+        await asyncio.gather(handler.lookup("Metroid"), handler.lookup("Zelda"))
+        assert handler.calls == 2
+
+    async def test_sequential_calls_are_not_shared(self):
+        handler = self.CountingHandler()
+        await handler.lookup("Metroid")
+        await handler.lookup("Metroid")
+        assert handler.calls == 2
+
+    async def test_errors_are_raised_to_all_callers(self):
+        handler = self.CountingHandler()
+        results = await asyncio.gather(
+            *(handler.lookup("error") for _ in range(2)), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert handler.calls == 1
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        handler = self.CountingHandler()
+        first = asyncio.create_task(handler.lookup("Metroid"))
+        second = asyncio.create_task(handler.lookup("Metroid"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == {"name": "Metroid"}
+        assert handler.calls == 1
+
+
+class TestCircuitBreaker:
+    """Test the skipping of providers that keep failing."""
+
+    @pytest.fixture
+    def heartbeat(self):
+        return AsyncMock(return_value=True)
+
+    @pytest.fixture
+    def circuit_breaker(self, heartbeat, mocker):
+        self.now = mocker.patch(
+            "handler.metadata.base_handler.time.monotonic", return_value=1000.0
+        )
+        return CircuitBreaker("Test", heartbeat, threshold=2, cooldown_seconds=60)
+
+    async def test_opens_after_consecutive_failures(self, circuit_breaker):
+        circuit_breaker.record_failure()
+        circuit_breaker.record_success()
+        circuit_breaker.record_failure()
+        assert await circuit_breaker.allow_request()
+
+        circuit_breaker.record_failure()
+        assert circuit_breaker.is_open
+        assert not await circuit_breaker.allow_request()
+
+    async def test_closes_once_heartbeat_succeeds(self, circuit_breaker, heartbeat):
+        circuit_breaker.record_failure()
+        circuit_breaker.record_failure()
+
+        self.now.return_value = 1059.0
+        assert not await circuit_breaker.allow_request()
+        heartbeat.assert_not_awaited()
+
+        self.now.return_value = 1060.0
+        assert await circuit_breaker.allow_request()
+        heartbeat.assert_awaited_once()
+        assert not circuit_breaker.is_open
+
+    async def test_stays_open_while_heartbeat_fails(self, circuit_breaker, heartbeat):
+        heartbeat.side_effect = httpx.ConnectError("Connection refused")
+        circuit_breaker.record_failure()
+        circuit_breaker.record_failure()
+
+        self.now.return_value = 1060.0
+        assert not await circuit_breaker.allow_request()
+
+        # A new cool-down starts
+        self.now.return_value = 1100.0
+        assert not await circuit_breaker.allow_request()
+        heartbeat.assert_awaited_once()
+
+    def test_provider_failures(self):
+        assert is_provider_failure(HTTPException(status_code=503))
+        assert is_provider_failure(httpx.ReadTimeout("Timed out"))
+        assert is_provider_failure(TimeoutError())
+        assert is_provider_failure(ProviderRateLimitedException("igdb"))
+        assert not is_provider_failure(HTTPException(status_code=404))
+        assert not is_provider_failure(ValueError())
+
+
 class TestRegexPatterns:
     """Test regex patterns used in the metadata handler."""
 
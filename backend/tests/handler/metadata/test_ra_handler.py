@@ -0,0 +1,93 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from handler.metadata.ra_handler import RAHandler
+
+RA_GAMES = [
+    {"ID": 1, "Title": "Game 1", "Hashes": ["AAA111", "bbb222"]},
+    {"ID": 2, "Title": "Game 2", "Hashes": ["ccc333"]},
+    {"ID": 3, "Title": "Game 3"},
+]
+
+
+class TestRAHashesIndex:
+    """Test the lookup of RetroAchievements games by hash."""
+
+    @pytest.fixture
+    def handler(self):
+        handler = RAHandler()
+        with (
+            patch.object(
+                handler, "_days_since_last_cache_file_update", AsyncMock(return_value=0)
+            ),
+            patch.object(handler, "_exists_cache_file", AsyncMock(return_value=True)),
+            patch.object(
+                handler, "_get_hashes_file_mtime", MagicMock(return_value=1.0)
+            ),
+        ):
+            yield handler
+
+    @pytest.fixture
+    def rom(self):
+        rom = MagicMock()
+        rom.platform.id = 1
+        rom.platform.ra_id = 7
+        return rom
+
+    @pytest.fixture
+    def read_file(self):
+        with patch(
+            "handler.metadata.ra_handler.fs_resource_handler.read_file",
+            AsyncMock(return_value=json.dumps(RA_GAMES).encode()),
+        ) as read_file:
+            yield read_file
+
+    async def test_search_rom_by_hash(self, handler, rom, read_file):
+        """Test games are found by hash, regardless of the case."""
+        game = await handler._search_rom(rom, "aaa111")
+        assert game is not None and game["ID"] == 1
+
+        game = await handler._search_rom(rom, "CCC333")
+        assert game is not None and game["ID"] == 2
+
+        assert await handler._search_rom(rom, "ddd444") is None
+
+    async def test_hashes_file_is_read_once(self, handler, rom, read_file):
+        """Test the hashes file is only read again once it changed."""
+        await handler._search_rom(rom, "aaa111")
+        await handler._search_rom(rom, "bbb222")
+        assert read_file.await_count == 1
+
+        handler._get_hashes_file_mtime.return_value = 2.0
+        await handler._search_rom(rom, "aaa111")
+        assert read_file.await_count == 2
+
+    async def test_stale_hashes_file_is_refreshed_once(self, handler, rom):
+        """Test the roms of a platform scanned at once share a single refresh."""
+        handler._days_since_last_cache_file_update.return_value = 30
+
+        async def get_game_list(**kwargs):
+            await asyncio.sleep(0)
+            handler._days_since_last_cache_file_update.return_value = 0
+            return RA_GAMES
+
+        with (
+            patch.object(
+                handler.ra_service, "get_game_list", AsyncMock(wraps=get_game_list)
+            ) as mock_get_game_list,
+            patch(
+                "handler.metadata.ra_handler.fs_resource_handler.write_file",
+                AsyncMock(),
+            ),
+        ):
+            games = await asyncio.gather(
+                *(handler._search_rom(rom, "aaa111") for _ in range(5))
+            )
+
+        assert [game["ID"] for game in games] == [1] * 5
+        mock_get_game_list.assert_awaited_once_with(
+            system_id=7, only_games_with_achievements=True, include_hashes=True
+        )
@@ -11,7 +11,7 @@ from handler.database import (
 )
 from models.assets import Save, Screenshot, State
 from models.platform import Platform
-from models.rom import Rom
+from models.rom import Rom, RomFile
 from models.user import Role, User
 
 
@@ -70,6 +70,57 @@ def test_roms(rom: Rom, platform: Platform):
     assert len(roms) == 1
 
 
+def test_upsert_rom(platform: Platform):
+    rom = db_rom_handler.upsert_rom(
+        Rom(
+            platform_id=platform.id,
+            name="test_rom",
+            fs_name="test_rom.zip",
+            fs_name_no_tags="test_rom",
+            fs_name_no_ext="test_rom",
+            fs_extension="zip",
+            fs_path=f"{platform.slug}/roms",
+        )
+    )
+    assert rom.id is not None
+    assert rom.platform_slug == platform.slug
+    assert rom.files == []
+
+    rom = db_rom_handler.upsert_rom(Rom(id=rom.id, name="test_rom_updated"))
+    assert rom.name == "test_rom_updated"
+    assert rom.fs_name == "test_rom.zip"
+
+
+def test_write_scan_results(rom: Rom, platform: Platform):
+    other_rom = db_rom_handler.upsert_rom(
+        Rom(
+            platform_id=platform.id,
+            name="test_rom_2",
+            fs_name="test_rom_2.zip",
+            fs_name_no_tags="test_rom_2",
+            fs_name_no_ext="test_rom_2",
+            fs_extension="zip",
+            fs_path=f"{platform.slug}/roms",
+        )
+    )
+
+    db_rom_handler.write_scan_results(
+        roms=[Rom(id=rom.id, name="scanned_rom", igdb_id=1234)],
+        rom_files={},
+        rom_updates={other_rom.id: {"missing_from_fs": True}},
+    )
+
+    scanned_roms = {r.id: r for r in db_rom_handler.get_scanned_roms([rom.id])}
+    assert scanned_roms[rom.id].name == "scanned_rom"
+    assert scanned_roms[rom.id].igdb_id == 1234
+    # Columns not set on the scanned rom are left as they were
+    assert scanned_roms[rom.id].fs_name == "test_rom.zip"
+
+    other_rom = db_rom_handler.get_rom(other_rom.id)
+    assert other_rom is not None
+    assert other_rom.missing_from_fs
+
+
 def test_users(admin_user):
     db_user_handler.add_user(
         User(
@@ -215,3 +266,54 @@ def test_screenshots(screenshot: Screenshot, platform: Platform, admin_user: Use
     rom = db_rom_handler.get_rom(id=screenshot.rom_id)
     assert rom is not None
     assert len(rom.screenshots) == 1
+
+
+def test_write_scan_results_replaces_rom_files(rom: Rom):
+    def build_rom_file(file_name: str, crc_hash: str) -> RomFile:
+        return RomFile(
+            file_name=file_name,
+            file_path=rom.full_path,
+            file_size_bytes=1024,
+            last_modified=1700000000.0,
+            crc_hash=crc_hash,
+        )
+
+    db_rom_handler.write_scan_results(
+        roms=[],
+        rom_files={
+            rom.id: [
+                build_rom_file("disc1.bin", "aaaa"),
+                build_rom_file("disc2.bin", "bbbb"),
+            ]
+        },
+        rom_updates={},
+    )
+    rom_files = {f.file_name: f for f in db_rom_handler.get_rom(rom.id).files}
+    assert set(rom_files) == {"disc1.bin", "disc2.bin"}
+    disc1_id = rom_files["disc1.bin"].id
+    disc2_id = rom_files["disc2.bin"].id
+
+    db_rom_handler.write_scan_results(
+        roms=[],
+        rom_files={
+            rom.id: [
+                build_rom_file("disc1.bin", "aaaa"),
+                build_rom_file("disc3.bin", "cccc"),
+            ]
+        },
+        rom_updates={},
+    )
+    rom_files = {f.file_name: f for f in db_rom_handler.get_rom(rom.id).files}
+    assert set(rom_files) == {"disc1.bin", "disc3.bin"}
+    assert rom_files["disc1.bin"].id == disc1_id
+    assert db_rom_handler.get_rom_file_by_id(disc2_id) is None
+
+    db_rom_handler.write_scan_results(
+        roms=[],
+        rom_files={rom.id: [build_rom_file("disc1.bin", "dddd")]},
+        rom_updates={},
+    )
+    rom_files = db_rom_handler.get_rom(rom.id).files
+    assert len(rom_files) == 1
+    assert rom_files[0].id == disc1_id
+    assert rom_files[0].crc_hash == "dddd"
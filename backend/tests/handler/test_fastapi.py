@@ -1,10 +1,21 @@
+import httpx
 import pytest
 
 from handler.database import db_platform_handler
+from handler.metadata import (
+    meta_flashpoint_handler,
+    meta_hltb_handler,
+    meta_igdb_handler,
+    meta_moby_handler,
+    meta_playmatch_handler,
+)
+from handler.metadata.moby_handler import MobyGamesRom
+from handler.metadata.playmatch_handler import PlaymatchRomMatch
 from handler.scan_handler import MetadataSource, ScanType, scan_platform, scan_rom
 from models.platform import Platform
 from models.rom import Rom, RomFile
-from utils.context import initialize_context
+from utils.context import ctx_httpx_client, initialize_context
+from utils.rate_limit import ProviderRateLimitedException
 
 
 @pytest.mark.vcr
@@ -77,3 +88,115 @@ async def test_scan_rom():
     assert rom.igdb_id == 3340
     assert rom.fs_size_bytes == 1024
     assert rom.tags == []
+
+
+async def test_scan_rom_doesnt_record_throttled_misses(mocker):
+    """Test only the providers that answered are remembered as finding nothing"""
+    platform = Platform(
+        id=1, slug="n64", fs_slug="n64", name="Nintendo 64", igdb_id=4, moby_id=9
+    )
+    rom = Rom(fs_name="Paper Mario (USA).z64", fs_path="n64", tags=[])
+
+    mocker.patch.object(
+        meta_playmatch_handler,
+        "lookup_rom",
+        return_value=PlaymatchRomMatch(igdb_id=None),
+    )
+    mocker.patch.object(
+        meta_igdb_handler,
+        "get_rom",
+        side_effect=ProviderRateLimitedException("igdb"),
+    )
+    mocker.patch.object(
+        meta_moby_handler, "get_rom", return_value=MobyGamesRom(moby_id=None)
+    )
+    mocker.patch.object(meta_igdb_handler.circuit_breaker, "record_failure")
+    set_scan_misses = mocker.patch("handler.scan_handler.set_scan_misses")
+
+    await scan_rom(
+        platform=platform,
+        scan_type=ScanType.QUICK,
+        rom=rom,
+        fs_rom={
+            "fs_name": "Paper Mario (USA).z64",
+            "flat": True,
+            "nested": False,
+            "files": [],
+            "crc_hash": "",
+            "md5_hash": "",
+            "sha1_hash": "",
+            "ra_hash": "",
+        },
+        metadata_sources=[MetadataSource.IGDB, MetadataSource.MOBY],
+        newly_added=True,
+    )
+
+    assert set_scan_misses.call_args.args[1] == [MetadataSource.MOBY]
+
+
+def unavailable_provider(request: httpx.Request) -> httpx.Response:
+    """HowLongToBeat fails, and Flashpoint times out"""
+    if request.url.host == "howlongtobeat.com":
+        return httpx.Response(503)
+    raise httpx.ReadTimeout("Timed out", request=request)
+
+
+async def scan_browser_rom(metadata_sources: list[MetadataSource]) -> Rom:
+    platform = Platform(id=1, slug="browser", fs_slug="browser", name="Browser")
+    rom = Rom(fs_name="Canabalt.swf", fs_path="browser", tags=[])
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(unavailable_provider)
+    ) as client:
+        token = ctx_httpx_client.set(client)
+        try:
+            return await scan_rom(
+                platform=platform,
+                scan_type=ScanType.QUICK,
+                rom=rom,
+                fs_rom={
+                    "fs_name": "Canabalt.swf",
+                    "flat": True,
+                    "nested": False,
+                    "files": [],
+                    "crc_hash": "",
+                    "md5_hash": "",
+                    "sha1_hash": "",
+                    "ra_hash": "",
+                },
+                metadata_sources=metadata_sources,
+                newly_added=True,
+            )
+        finally:
+            ctx_httpx_client.reset(token)
+
+
+@pytest.fixture
+def browser_providers(mocker):
+    mocker.patch("handler.metadata.hltb_handler.HLTB_API_ENABLED", True)
+    mocker.patch("handler.metadata.flashpoint_handler.FLASHPOINT_API_ENABLED", True)
+    return {
+        MetadataSource.HLTB: mocker.patch.object(
+            meta_hltb_handler.circuit_breaker, "record_failure"
+        ),
+        MetadataSource.FLASHPOINT: mocker.patch.object(
+            meta_flashpoint_handler.circuit_breaker, "record_failure"
+        ),
+    }
+
+
+async def test_scan_rom_records_provider_failures(browser_providers):
+    """Test providers that can't be reached count towards their circuit breaker"""
+    await scan_browser_rom([MetadataSource.HLTB, MetadataSource.FLASHPOINT])
+
+    for record_failure in browser_providers.values():
+        record_failure.assert_called_once()
+
+
+async def test_scan_rom_doesnt_record_failed_misses(browser_providers, mocker):
+    """Test a provider that failed or timed out isn't remembered as finding nothing"""
+    set_scan_misses = mocker.patch("handler.scan_handler.set_scan_misses")
+
+    await scan_browser_rom([MetadataSource.HLTB, MetadataSource.FLASHPOINT])
+
+    assert set_scan_misses.call_args.args[1] == []
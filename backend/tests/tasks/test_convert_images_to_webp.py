@@ -0,0 +1,122 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from handler.redis_handler import async_cache
+from tasks.scheduled.convert_images_to_webp import (
+    WEBP_CONVERSIONS_KEY,
+    WEBP_CONVERTED_DIRS_KEY,
+    ConvertImagesToWebPTask,
+    convert_image,
+)
+
+
+@pytest.fixture
+async def task(tmp_path: Path):
+    """Create a task instance converting the images of a temporary directory"""
+    task = ConvertImagesToWebPTask()
+    task.resources_path = tmp_path
+    with patch("tasks.scheduled.convert_images_to_webp.IMAGE_PROCESSING_WORKERS", 1):
+        yield task
+    await async_cache.delete(WEBP_CONVERSIONS_KEY, WEBP_CONVERTED_DIRS_KEY)
+
+
+def create_cover(root: Path, rom_id: int) -> Path:
+    cover_path = root / "roms" / "1" / str(rom_id) / "cover" / "big.png"
+    cover_path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", (10, 10), "blue").save(cover_path)
+    return cover_path
+
+
+class TestConvertImage:
+    def test_convert_image(self, tmp_path: Path):
+        cover_path = create_cover(tmp_path, 1)
+
+        assert convert_image(cover_path, cover_path.stat().st_mtime_ns) is None
+        assert cover_path.with_suffix(".webp").exists()
+
+    def test_invalid_image(self, tmp_path: Path):
+        cover_path = tmp_path / "cover.png"
+        cover_path.write_bytes(b"not an image")
+
+        error = convert_image(cover_path, cover_path.stat().st_mtime_ns)
+        assert error is not None and error.startswith("Invalid image file")
+
+    def test_changed_image_is_converted_again(self, tmp_path: Path):
+        cover_path = create_cover(tmp_path, 1)
+        webp_path = cover_path.with_suffix(".webp")
+        webp_path.write_bytes(b"outdated")
+        os.utime(webp_path, ns=(0, 0))
+
+        assert convert_image(cover_path, cover_path.stat().st_mtime_ns) is None
+        with Image.open(webp_path) as img:
+            assert img.format == "WEBP"
+
+
+class TestConvertImagesToWebPTask:
+    """Test the conversion of the covers, across runs"""
+
+    async def test_run_converts_covers(self, task: ConvertImagesToWebPTask):
+        covers = [create_cover(task.resources_path, rom_id) for rom_id in range(3)]
+
+        result = await task.run()
+
+        assert result == {"processed": 3, "errors": 0, "total": 3}
+        assert all(cover.with_suffix(".webp").exists() for cover in covers)
+
+    async def test_converted_covers_are_skipped(self, task: ConvertImagesToWebPTask):
+        """Test covers recorded as converted aren't checked again, until changed"""
+        create_cover(task.resources_path, 1)
+        await task.run()
+
+        assert await task._find_convertible_images() == []
+
+        changed_cover = create_cover(task.resources_path, 1)
+        os.utime(changed_cover, ns=(1, 1))
+        # Covers are replaced by renaming them, which changes their directory
+        os.utime(changed_cover.parent, ns=(1, 1))
+        assert await task._find_convertible_images() == [(changed_cover, 1)]
+
+    async def test_unchanged_directories_are_skipped(
+        self, task: ConvertImagesToWebPTask
+    ):
+        """Test the images of a converted directory aren't listed until it changes"""
+        create_cover(task.resources_path, 1)
+        await task.run()
+        assert await task._find_convertible_images() == []
+
+        with patch.object(task, "_iter_cover_images") as iter_cover_images:
+            assert await task._find_convertible_images() == []
+        iter_cover_images.assert_not_called()
+
+    async def test_interrupted_run_resumes(self, task: ConvertImagesToWebPTask):
+        """Test batches converted before an interruption aren't converted again"""
+        for rom_id in range(3):
+            create_cover(task.resources_path, rom_id)
+
+        record_conversions = task._checkpoint
+
+        async def checkpoint_then_interrupt(converted):
+            await record_conversions(converted)
+            raise RuntimeError("Interrupted")
+
+        with (
+            patch("tasks.scheduled.convert_images_to_webp.CONVERSION_BATCH_SIZE", 2),
+            patch.object(task, "_checkpoint", side_effect=checkpoint_then_interrupt),
+            pytest.raises(RuntimeError),
+        ):
+            await task.run()
+
+        assert len(await task._find_convertible_images()) == 1
+
+    async def test_removed_covers_are_forgotten(self, task: ConvertImagesToWebPTask):
+        cover_path = create_cover(task.resources_path, 1)
+        await task.run()
+
+        cover_path.unlink()
+        await task._find_convertible_images()
+
+        assert not await async_cache.hgetall(WEBP_CONVERSIONS_KEY)
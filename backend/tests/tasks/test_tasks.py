@@ -1,3 +1,4 @@
+from io import BytesIO
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
@@ -296,6 +297,33 @@ class TestRemoteFilePullTask:
         mock_log.error.assert_any_call(http_error)
         assert result is None
 
+    @patch("tasks.tasks.ctx_httpx_client")
+    async def test_run_to_file_success(self, mock_ctx_httpx_client, task):
+        """Test remote file pull streamed to a file"""
+
+        async def aiter_bytes(chunk_size):
+            yield b"test "
+            yield b"content"
+
+        mock_response = MagicMock()
+        mock_response.aiter_bytes = aiter_bytes
+        mock_client = MagicMock()
+        mock_client.stream.return_value.__aenter__ = AsyncMock(
+            return_value=mock_response
+        )
+        mock_client.stream.return_value.__aexit__ = AsyncMock(return_value=None)
+        mock_ctx_httpx_client.get.return_value = mock_client
+
+        file = BytesIO()
+        result = await task.run_to_file(file, force=True)
+
+        mock_client.stream.assert_called_once_with(
+            "GET", "https://example.com/data.json", timeout=120
+        )
+        mock_response.raise_for_status.assert_called_once()
+        assert result is True
+        assert file.read() == b"test content"
+
     @patch.object(RemoteFilePullTask, "unschedule")
     @patch("tasks.tasks.log")
     async def test_run_disabled_not_forced(
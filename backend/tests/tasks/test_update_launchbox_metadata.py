@@ -15,12 +15,32 @@ from handler.metadata.launchbox_handler import (
     LaunchboxHandler,
 )
 from tasks.scheduled.update_launchbox_metadata import (
+    HSET_BATCH_SIZE,
+    PIPELINE_FLUSH_COMMANDS,
+    BatchedHashWriter,
     UpdateLaunchboxMetadataTask,
     update_launchbox_metadata_task,
 )
 from tasks.tasks import RemoteFilePullTask
 
 
+def pull_content(content: bytes | None):
+    """Mock run_to_file, writing the content to the given file."""
+
+    async def run_to_file(file, force=False) -> bool:
+        if content is None:
+            return False
+        file.write(content)
+        file.seek(0)
+        return True
+
+    return run_to_file
+
+
+def count_hset_fields(hset_calls, key: str) -> int:
+    return sum(len(call.kwargs["mapping"]) for call in hset_calls if call[0][0] == key)
+
+
 @pytest.fixture
 def task() -> UpdateLaunchboxMetadataTask:
     """Create a task instance for testing"""
@@ -54,16 +74,17 @@ class TestUpdateLaunchboxMetadataTask:
         assert task.description == "Updates the LaunchBox metadata store"
         assert task.url == "https://gamesdb.launchbox-app.com/Metadata.zip"
 
-    @patch.object(RemoteFilePullTask, "run")
+    @patch.object(RemoteFilePullTask, "run_to_file")
     async def test_run_when_launchbox_api_enabled(
         self, mock_super_run, task, sample_zip_content
     ):
         """Test run method when Launchbox API is enabled"""
-        mock_super_run.return_value = sample_zip_content
+        mock_super_run.side_effect = pull_content(sample_zip_content)
 
         await task.run(force=True)
 
-        mock_super_run.assert_called_once_with(True)
+        mock_super_run.assert_called_once()
+        assert mock_super_run.call_args.args[1] is True
 
     async def test_run_when_launchbox_api_disabled(self, task, mocker):
         """Test run method when Launchbox API is disabled"""
@@ -76,11 +97,11 @@ class TestUpdateLaunchboxMetadataTask:
             "Launchbox API is not enabled, skipping metadata update"
         )
 
-    @patch.object(RemoteFilePullTask, "run")
+    @patch.object(RemoteFilePullTask, "run_to_file")
     @patch("tasks.scheduled.update_launchbox_metadata.log")
     async def test_run_when_content_is_none(self, mock_log, mock_super_run, task):
         """Test run method when super().run() returns None"""
-        mock_super_run.return_value = None
+        mock_super_run.side_effect = pull_content(None)
 
         await task.run(force=True)
 
@@ -90,13 +111,13 @@ class TestUpdateLaunchboxMetadataTask:
             "No content received from launchbox metadata update"
         )
 
-    @patch.object(RemoteFilePullTask, "run")
+    @patch.object(RemoteFilePullTask, "run_to_file")
     @patch("tasks.scheduled.update_launchbox_metadata.log")
     async def test_run_with_corrupt_zip_file(
         self, mock_log, mock_super_run, task, corrupt_zip_content
     ):
         """Test run method with corrupt ZIP file"""
-        mock_super_run.return_value = corrupt_zip_content
+        mock_super_run.side_effect = pull_content(corrupt_zip_content)
 
         await task.run(force=True)
 
@@ -104,13 +125,13 @@ class TestUpdateLaunchboxMetadataTask:
             "Bad zip file in launchbox metadata update"
         )
 
-    @patch.object(RemoteFilePullTask, "run")
+    @patch.object(RemoteFilePullTask, "run_to_file")
     @patch("tasks.scheduled.update_launchbox_metadata.log")
     async def test_run_successful_completion(
         self, mock_log, mock_super_run, task, sample_zip_content
     ):
         """Test successful completion of the task"""
-        mock_super_run.return_value = sample_zip_content
+        mock_super_run.side_effect = pull_content(sample_zip_content)
 
         await task.run(force=True)
 
@@ -118,7 +139,7 @@ class TestUpdateLaunchboxMetadataTask:
             "Scheduled launchbox metadata update completed!"
         )
 
-    @patch.object(RemoteFilePullTask, "run")
+    @patch.object(RemoteFilePullTask, "run_to_file")
     @patch("tasks.scheduled.update_launchbox_metadata.async_cache.pipeline")
     async def test_xml_parsing(
         self,
@@ -128,7 +149,7 @@ class TestUpdateLaunchboxMetadataTask:
         sample_zip_content,
     ):
         """Test parsing of Platforms.xml file"""
-        mock_super_run.return_value = sample_zip_content
+        mock_super_run.side_effect = pull_content(sample_zip_content)
 
         # Create a mock pipeline with async context manager support
         mock_pipe = AsyncMock()
@@ -145,44 +166,19 @@ class TestUpdateLaunchboxMetadataTask:
         assert mock_pipe.hset.called
         assert mock_pipe.execute.called
 
-        # Check hset call details
+        # Fields are sent in one batch per key
         hset_calls = mock_pipe.hset.call_args_list
-        assert len(hset_calls) == 12
+        assert len(hset_calls) == 7
 
-        platform_calls = [
-            call for call in hset_calls if call[0][0] == LAUNCHBOX_PLATFORMS_KEY
-        ]
-        assert len(platform_calls) == 2
+        assert count_hset_fields(hset_calls, LAUNCHBOX_PLATFORMS_KEY) == 2
+        assert count_hset_fields(hset_calls, LAUNCHBOX_METADATA_DATABASE_ID_KEY) == 2
+        assert count_hset_fields(hset_calls, LAUNCHBOX_METADATA_NAME_KEY) == 2
+        assert count_hset_fields(hset_calls, LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY) == 1
+        assert count_hset_fields(hset_calls, LAUNCHBOX_METADATA_IMAGE_KEY) == 1
+        assert count_hset_fields(hset_calls, LAUNCHBOX_MAME_KEY) == 2
+        assert count_hset_fields(hset_calls, LAUNCHBOX_FILES_KEY) == 2
 
-        metadata_id_calls = [
-            call
-            for call in hset_calls
-            if call[0][0] == LAUNCHBOX_METADATA_DATABASE_ID_KEY
-        ]
-        metadata_name_calls = [
-            call for call in hset_calls if call[0][0] == LAUNCHBOX_METADATA_NAME_KEY
-        ]
-        metadata_alt_calls = [
-            call
-            for call in hset_calls
-            if call[0][0] == LAUNCHBOX_METADATA_ALTERNATE_NAME_KEY
-        ]
-        metadata_image_calls = [
-            call for call in hset_calls if call[0][0] == LAUNCHBOX_METADATA_IMAGE_KEY
-        ]
-
-        assert len(metadata_id_calls) == 2
-        assert len(metadata_name_calls) == 2
-        assert len(metadata_alt_calls) == 1
-        assert len(metadata_image_calls) == 1
-
-        mame_calls = [call for call in hset_calls if call[0][0] == LAUNCHBOX_MAME_KEY]
-        assert len(mame_calls) == 2
-
-        files_calls = [call for call in hset_calls if call[0][0] == LAUNCHBOX_FILES_KEY]
-        assert len(files_calls) == 2
-
-    @patch.object(RemoteFilePullTask, "run")
+    @patch.object(RemoteFilePullTask, "run_to_file")
     @patch("tasks.scheduled.update_launchbox_metadata.async_cache.pipeline")
     async def test_empty_xml_elements_handling(
         self,
@@ -197,7 +193,7 @@ class TestUpdateLaunchboxMetadataTask:
         )
 
         async with await anyio.open_file(sample_path, "rb") as f:
-            mock_super_run.return_value = await f.read()
+            mock_super_run.side_effect = pull_content(await f.read())
 
         # Create a mock pipeline with async context manager support
         mock_pipe = AsyncMock()
@@ -221,7 +217,7 @@ class TestUpdateLaunchboxMetadataTask:
         # Only one valid platform should be processed
         assert len(platform_calls) == 1
 
-    @patch.object(RemoteFilePullTask, "run")
+    @patch.object(RemoteFilePullTask, "run_to_file")
     @patch("tasks.scheduled.update_launchbox_metadata.async_cache.pipeline")
     async def test_missing_xml_files_handling(
         self,
@@ -236,7 +232,7 @@ class TestUpdateLaunchboxMetadataTask:
         )
 
         async with await anyio.open_file(sample_path, "rb") as f:
-            mock_super_run.return_value = await f.read()
+            mock_super_run.side_effect = pull_content(await f.read())
 
         # Create a mock pipeline with async context manager support
         mock_pipe = AsyncMock()
@@ -274,6 +270,28 @@ class TestUpdateLaunchboxMetadataTask:
         assert isinstance(update_launchbox_metadata_task, UpdateLaunchboxMetadataTask)
 
 
+class TestBatchedHashWriter:
+    """Test suite for BatchedHashWriter"""
+
+    async def test_fields_are_batched_and_pipeline_flushed(self):
+        """Test fields are sent in batches, and the pipeline executed periodically"""
+        mock_pipe = AsyncMock()
+        writer = BatchedHashWriter(mock_pipe)
+
+        total_fields = HSET_BATCH_SIZE * PIPELINE_FLUSH_COMMANDS + 1
+        for i in range(total_fields):
+            await writer.hset("key", f"field{i}", "value")
+
+        assert mock_pipe.hset.call_count == PIPELINE_FLUSH_COMMANDS
+        mock_pipe.execute.assert_called_once()
+
+        await writer.flush()
+
+        assert mock_pipe.hset.call_count == PIPELINE_FLUSH_COMMANDS + 1
+        assert mock_pipe.execute.call_count == 2
+        assert count_hset_fields(mock_pipe.hset.call_args_list, "key") == total_fields
+
+
 class TestUpdateLaunchboxMetadataTaskIntegration:
     """Integration tests for UpdateLaunchboxMetadataTask"""
 
@@ -281,13 +299,13 @@ class TestUpdateLaunchboxMetadataTaskIntegration:
     def task(self):
         return UpdateLaunchboxMetadataTask()
 
-    @patch.object(RemoteFilePullTask, "run")
+    @patch.object(RemoteFilePullTask, "run_to_file")
     @patch("tasks.scheduled.update_launchbox_metadata.async_cache.pipeline")
     async def test_full_workflow_integration(
         self, mock_async_cache_pipeline, mock_super_run, task, sample_zip_content
     ):
         """Test the complete workflow from ZIP download to Redis storage"""
-        mock_super_run.return_value = sample_zip_content
+        mock_super_run.side_effect = pull_content(sample_zip_content)
 
         # Create a mock pipeline with async context manager support
         mock_pipe = AsyncMock()
@@ -300,7 +318,7 @@ class TestUpdateLaunchboxMetadataTaskIntegration:
 
         # Check hset call details
         hset_calls = mock_pipe.hset.call_args_list
-        assert len(hset_calls) == 12
+        assert len(hset_calls) == 7
 
         # Verify that all expected Redis keys were used
         redis_keys_used = [call[0][0] for call in hset_calls]
@@ -0,0 +1,113 @@
+import hashlib
+import stat
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from utils import archive_7zip
+from utils.archive_7zip import process_file_7z
+from utils.hashing import calculate_files_hashes
+
+MEMBER_CONTENT = b"7z member content" * 1024
+
+FAKE_7ZZ = f"""#!{sys.executable}
+import sys
+
+if sys.argv[1] == "l":
+    print("Path = small.bin\\nSize = 10\\nAttributes = A")
+    print("Path = large.bin\\nSize = {len(MEMBER_CONTENT)}\\nAttributes = A")
+elif sys.argv[1:3] == ["e", "-so"] and sys.argv[4] == "large.bin":
+    sys.stdout.buffer.write({MEMBER_CONTENT!r})
+else:
+    sys.exit(2)
+"""
+
+
+@pytest.fixture
+def fake_7zz(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    binary = tmp_path / "7zz"
+    binary.write_text(FAKE_7ZZ)
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(archive_7zip, "SEVEN_ZIP_PATH", str(binary))
+    return binary
+
+
+class TestProcessFile7z:
+    """Test the process_file_7z function."""
+
+    def test_largest_member_is_streamed(self, fake_7zz: Path, tmp_path: Path):
+        """Test the largest member is piped to the callback without a temp file."""
+        md5_h = hashlib.md5(usedforsecurity=False)
+
+        assert process_file_7z(tmp_path / "rom.7z", md5_h.update)
+        assert (
+            md5_h.hexdigest()
+            == hashlib.md5(MEMBER_CONTENT, usedforsecurity=False).hexdigest()
+        )
+
+    def test_timeout_grows_with_member_size(self):
+        """Test bigger members are given more time to extract."""
+        assert archive_7zip._get_extract_timeout(
+            4 * 1024**3
+        ) > archive_7zip._get_extract_timeout(0)
+
+    def test_extraction_timeout(
+        self, fake_7zz: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test a stuck extraction is killed."""
+        fake_7zz.write_text(f"#!{sys.executable}\nimport time\ntime.sleep(10)\n")
+        monkeypatch.setattr(archive_7zip, "_get_extract_timeout", lambda _: 0.1)
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            archive_7zip._stream_file_7z(tmp_path / "rom.7z", "large.bin", 0, print)
+
+
+class TestFailedExtractionFallback:
+    """Test a 7z archive whose extraction fails is hashed as a regular file."""
+
+    @pytest.fixture
+    def failing_7zz(self, fake_7zz: Path) -> Path:
+        """Stream part of the member before failing."""
+        fake_7zz.write_text(
+            FAKE_7ZZ.replace(
+                f"sys.stdout.buffer.write({MEMBER_CONTENT!r})",
+                "sys.stdout.buffer.write(b'partial member')\n"
+                "    sys.stdout.flush()\n"
+                "    sys.exit(2)",
+            )
+        )
+        return fake_7zz
+
+    def test_partial_member_is_discarded(self, failing_7zz: Path, tmp_path: Path):
+        archive = tmp_path / "rom.7z"
+        archive.write_bytes(b"7z archive content")
+
+        file_hashes, rom_hash = calculate_files_hashes([archive])
+
+        assert (
+            file_hashes[0]["md5_hash"]
+            == hashlib.md5(b"7z archive content", usedforsecurity=False).hexdigest()
+        )
+        assert rom_hash == file_hashes[0]
+
+    def test_rom_hashes_keep_previous_files(self, failing_7zz: Path, tmp_path: Path):
+        """Test only the failed archive is hashed again in the rom aggregate."""
+        disc = tmp_path / "disc1.bin"
+        disc.write_bytes(b"disc content")
+        archive = tmp_path / "disc2.7z"
+        archive.write_bytes(b"7z archive content")
+
+        file_hashes, rom_hash = calculate_files_hashes([disc, archive])
+
+        assert (
+            file_hashes[1]["sha1_hash"]
+            == hashlib.sha1(b"7z archive content", usedforsecurity=False).hexdigest()
+        )
+        assert (
+            rom_hash["sha1_hash"]
+            == hashlib.sha1(
+                b"disc content7z archive content", usedforsecurity=False
+            ).hexdigest()
+        )
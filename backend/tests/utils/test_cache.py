@@ -1,10 +1,22 @@
 from unittest.mock import AsyncMock
 
+import pytest
 from redis.asyncio import Redis as AsyncRedis
 
 from handler.metadata.base_handler import MAME_XML_KEY, METADATA_FIXTURES_DIR
 from handler.redis_handler import async_cache
-from utils.cache import conditionally_set_cache
+from utils.cache import (
+    PROVIDER_CACHE_STATS_KEY,
+    bypass_provider_cache,
+    cached_provider_response,
+    clear_provider_cache,
+    clear_scan_misses,
+    conditionally_set_cache,
+    get_provider_cache_stats,
+    get_scan_miss_digest,
+    get_scan_misses,
+    set_scan_misses,
+)
 
 
 class TestConditionallySetCache:
@@ -84,3 +96,138 @@ class TestConditionallySetCache:
         )
 
         mock_cache_pipeline.assert_not_called()
+
+
+class TestCachedProviderResponse:
+    """Test the cached_provider_response decorator."""
+
+    @pytest.fixture(autouse=True)
+    async def provider_cache(self, mocker):
+        mocker.patch("utils.cache.PROVIDER_CACHE_ENABLED", True)
+        yield
+        await clear_provider_cache(async_cache)
+        await async_cache.delete(PROVIDER_CACHE_STATS_KEY)
+
+    def build_service(self, responses: dict[str, object]):
+        class Service:
+            calls: list[str] = []
+
+            @cached_provider_response("test")
+            async def _request(self, url: str) -> object:
+                self.calls.append(url)
+                return responses[url]
+
+        return Service()
+
+    async def test_repeated_requests_are_served_from_cache(self):
+        """Test the same request only hits the network once."""
+        service = self.build_service({"/games/1": {"id": 1}})
+
+        assert await service._request("/games/1") == {"id": 1}
+        assert await service._request("/games/1") == {"id": 1}
+
+        assert service.calls == ["/games/1"]
+        stats = await get_provider_cache_stats(async_cache)
+        assert stats == {"test:misses": 1, "test:hits": 1}
+
+    async def test_empty_responses_are_not_cached(self):
+        """Test empty responses, also returned on errors, are requested again."""
+        service = self.build_service({"/games/1": {}})
+
+        await service._request("/games/1")
+        await service._request("/games/1")
+
+        assert service.calls == ["/games/1", "/games/1"]
+
+    async def test_least_recently_used_entries_are_evicted(self, mocker):
+        """Test the least recently used entries are evicted over the size limit."""
+        mocker.patch("utils.cache.PROVIDER_CACHE_MAX_ENTRIES", 2)
+        times = iter(range(100))
+        mocker.patch("utils.cache.time.time", lambda: next(times))
+        service = self.build_service({f"/games/{i}": {"id": i} for i in range(3)})
+
+        await service._request("/games/0")
+        await service._request("/games/1")
+        await service._request("/games/0")
+        await service._request("/games/2")
+        service.calls.clear()
+
+        await service._request("/games/0")
+        await service._request("/games/1")
+
+        assert service.calls == ["/games/1"]
+
+    async def test_large_responses_are_not_cached(self, mocker):
+        """Test responses over the entry size limit aren't cached."""
+        mocker.patch("utils.cache.PROVIDER_CACHE_MAX_ENTRY_SIZE_KB", 1)
+        service = self.build_service({"/games/1": {"summary": "x" * 2048}})
+
+        await service._request("/games/1")
+        await service._request("/games/1")
+
+        assert service.calls == ["/games/1", "/games/1"]
+
+    async def test_bypass_provider_cache(self):
+        """Test requests made while bypassing the cache always hit the network."""
+        service = self.build_service({"/games/1": {"id": 1}})
+
+        await service._request("/games/1")
+        with bypass_provider_cache():
+            await service._request("/games/1")
+
+        assert service.calls == ["/games/1", "/games/1"]
+
+    async def test_clear_provider_cache(self):
+        """Test clearing the cache forgets the responses, but keeps the stats."""
+        service = self.build_service({"/games/1": {"id": 1}, "/games/2": {"id": 2}})
+        await service._request("/games/1")
+        await service._request("/games/2")
+
+        assert await clear_provider_cache(async_cache) == 2
+
+        await service._request("/games/1")
+        assert service.calls == ["/games/1", "/games/2", "/games/1"]
+        assert await get_provider_cache_stats(async_cache) == {"test:misses": 3}
+
+
+class TestScanMisses:
+    """Test the cache of providers that found nothing for a ROM."""
+
+    @pytest.fixture(autouse=True)
+    async def scan_miss_cache(self, mocker):
+        mocker.patch("utils.cache.SCAN_MISS_CACHE_ENABLED", True)
+        yield
+        await clear_scan_misses(async_cache)
+
+    async def test_misses_are_remembered_by_provider(self):
+        digest = get_scan_miss_digest("metroid", 1, ["abcd1234", None])
+        await set_scan_misses(async_cache, ["igdb", "ss"], digest)
+
+        misses = await get_scan_misses(async_cache, ["igdb", "moby", "ss"], digest)
+        assert misses == {"igdb", "ss"}
+
+    async def test_misses_depend_on_rom_inputs(self):
+        digest = get_scan_miss_digest("metroid", 1, ["abcd1234"])
+        await set_scan_misses(async_cache, ["igdb"], digest)
+
+        assert digest == get_scan_miss_digest("metroid", 1, ["ABCD1234"])
+        for other_digest in (
+            get_scan_miss_digest("metroid", 2, ["abcd1234"]),
+            get_scan_miss_digest("metroid", 1, ["ef567890"]),
+            get_scan_miss_digest("zelda", 1, ["abcd1234"]),
+        ):
+            assert await get_scan_misses(async_cache, ["igdb"], other_digest) == set()
+
+    async def test_clear_scan_misses(self):
+        digest = get_scan_miss_digest("metroid", 1, [])
+        await set_scan_misses(async_cache, ["igdb", "ss"], digest)
+
+        assert await clear_scan_misses(async_cache, "igdb") == 1
+        assert await get_scan_misses(async_cache, ["igdb", "ss"], digest) == {"ss"}
+
+    async def test_disabled_cache_has_no_misses(self, mocker):
+        digest = get_scan_miss_digest("metroid", 1, [])
+        await set_scan_misses(async_cache, ["igdb"], digest)
+        mocker.patch("utils.cache.SCAN_MISS_CACHE_ENABLED", False)
+
+        assert await get_scan_misses(async_cache, ["igdb"], digest) == set()
@@ -0,0 +1,79 @@
+import binascii
+import hashlib
+from pathlib import Path
+
+from utils.hashing import calculate_files_hashes, crc32_to_hex, read_basic_file
+
+
+class TestCalculateFilesHashes:
+    """Test the calculate_files_hashes function."""
+
+    def test_per_file_and_aggregate_hashes(self, tmp_path: Path):
+        """Test each file is hashed on its own and as part of the rom aggregate."""
+        contents = [b"Test ROM content part 1", b"Test ROM content part 2"]
+        file_paths = []
+        for idx, content in enumerate(contents):
+            file_path = tmp_path / f"part{idx}.bin"
+            file_path.write_bytes(content)
+            file_paths.append(file_path)
+
+        file_hashes, rom_hash = calculate_files_hashes(file_paths)
+
+        assert len(file_hashes) == len(contents)
+        for file_hash, content in zip(file_hashes, contents, strict=True):
+            assert file_hash["crc_hash"] == crc32_to_hex(binascii.crc32(content))
+            assert (
+                file_hash["md5_hash"]
+                == hashlib.md5(content, usedforsecurity=False).hexdigest()
+            )
+            assert (
+                file_hash["sha1_hash"]
+                == hashlib.sha1(content, usedforsecurity=False).hexdigest()
+            )
+
+        full_content = b"".join(contents)
+        assert rom_hash["crc_hash"] == crc32_to_hex(binascii.crc32(full_content))
+        assert (
+            rom_hash["md5_hash"]
+            == hashlib.md5(full_content, usedforsecurity=False).hexdigest()
+        )
+        assert (
+            rom_hash["sha1_hash"]
+            == hashlib.sha1(full_content, usedforsecurity=False).hexdigest()
+        )
+
+    def test_missing_file_returns_empty_hashes(self, tmp_path: Path):
+        """Test missing files don't break hashing and return empty hashes."""
+        file_hashes, rom_hash = calculate_files_hashes([tmp_path / "missing.bin"])
+
+        assert file_hashes == [{"crc_hash": "", "md5_hash": "", "sha1_hash": ""}]
+        assert rom_hash == {"crc_hash": "", "md5_hash": "", "sha1_hash": ""}
+
+
+class TestReadBasicFile:
+    """Test the read_basic_file function."""
+
+    def test_buffered_and_mmap_reads_match(self, tmp_path: Path):
+        """Test both read strategies return the same content in chunks."""
+        content = bytes(range(256)) * 64
+        file_path = tmp_path / "rom.bin"
+        file_path.write_bytes(content)
+
+        buffered = b"".join(
+            bytes(chunk)
+            for chunk in read_basic_file(file_path, chunk_size=1000, use_mmap=False)
+        )
+        mapped = b"".join(
+            bytes(chunk)
+            for chunk in read_basic_file(file_path, chunk_size=1000, use_mmap=True)
+        )
+
+        assert buffered == content
+        assert mapped == content
+
+    def test_mmap_empty_file(self, tmp_path: Path):
+        """Test empty files can't be mapped but are still read."""
+        file_path = tmp_path / "empty.bin"
+        file_path.write_bytes(b"")
+
+        assert list(read_basic_file(file_path, use_mmap=True)) == []
@@ -0,0 +1,82 @@
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from handler.redis_handler import async_cache
+from utils.rate_limit import (
+    RATE_LIMIT_KEY,
+    RateLimit,
+    acquire_rate_limit,
+    backoff_rate_limit,
+    parse_retry_after,
+    set_rate_limit,
+)
+
+
+class TestParseRetryAfter:
+    """Test the parse_retry_after function."""
+
+    def test_seconds(self):
+        assert parse_retry_after("5") == 5
+
+    def test_http_date(self):
+        retry_at = datetime.now(UTC) + timedelta(seconds=30)
+        seconds = parse_retry_after(format_datetime(retry_at, usegmt=True))
+        assert seconds is not None
+        assert 28 <= seconds <= 30
+
+    def test_invalid_values(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TestRateLimit:
+    """Test the provider rate limiter."""
+
+    @pytest.fixture(autouse=True)
+    async def rate_limiter(self, mocker):
+        mocker.patch("utils.rate_limit.PROVIDER_RATE_LIMIT_ENABLED", True)
+        mocker.patch("utils.rate_limit.time.time", return_value=1000.0)
+        self.sleep = mocker.patch("utils.rate_limit.asyncio.sleep", new=AsyncMock())
+        yield
+        keys = [key async for key in async_cache.scan_iter(f"{RATE_LIMIT_KEY}:*")]
+        if keys:
+            await async_cache.delete(*keys)
+
+    async def test_burst_then_wait_for_tokens(self):
+        """Test the burst is served at once, and following requests are spaced out."""
+        for _ in range(4):
+            assert await acquire_rate_limit(async_cache, "igdb")
+        self.sleep.assert_not_awaited()
+
+        assert await acquire_rate_limit(async_cache, "igdb")
+        self.sleep.assert_awaited_once_with(pytest.approx(0.25))
+
+    async def test_unknown_provider_is_not_limited(self):
+        for _ in range(10):
+            assert await acquire_rate_limit(async_cache, "unknown")
+        self.sleep.assert_not_awaited()
+
+    async def test_over_max_wait_skips_without_using_tokens(self):
+        """Test requests that would wait too long are skipped."""
+        await set_rate_limit(async_cache, "test", RateLimit(requests=1, period=10))
+
+        assert await acquire_rate_limit(async_cache, "test", max_wait=5)
+        assert not await acquire_rate_limit(async_cache, "test", max_wait=5)
+        assert await acquire_rate_limit(async_cache, "test", max_wait=10)
+        self.sleep.assert_awaited_once_with(pytest.approx(10))
+
+    async def test_backoff_honours_retry_after(self):
+        """Test requests are paused for the time asked by the provider."""
+        seconds = await backoff_rate_limit(async_cache, "igdb", {"Retry-After": "5"})
+
+        assert seconds == 5
+        assert await acquire_rate_limit(async_cache, "igdb")
+        self.sleep.assert_awaited_once_with(pytest.approx(5))
+
+    async def test_backoff_doubles_without_retry_after(self):
+        """Test the backoff grows while the provider keeps throttling requests."""
+        assert await backoff_rate_limit(async_cache, "mobygames") == 2
+        assert await backoff_rate_limit(async_cache, "mobygames") == 4
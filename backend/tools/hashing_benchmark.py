@@ -0,0 +1,67 @@
+import binascii
+import hashlib
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from utils.hashing import FILE_READ_CHUNK_SIZE, read_basic_file
+
+LEGACY_CHUNK_SIZE = 1024 * 8
+
+
+def read_legacy(file_path: Path) -> Iterator[bytes]:
+    with open(file_path, "rb") as f:
+        while chunk := f.read(LEGACY_CHUNK_SIZE):
+            yield chunk
+
+
+def read_buffered(file_path: Path) -> Iterator[bytes | memoryview]:
+    return read_basic_file(file_path, use_mmap=False)
+
+
+def read_mmap(file_path: Path) -> Iterator[bytes | memoryview]:
+    return read_basic_file(file_path, use_mmap=True)
+
+
+def hash_file(file_path: Path, reader) -> float:
+    crc_c = 0
+    md5_h = hashlib.md5(usedforsecurity=False)
+    sha1_h = hashlib.sha1(usedforsecurity=False)
+
+    start = time.perf_counter()
+    for chunk in reader(file_path):
+        crc_c = binascii.crc32(chunk, crc_c)
+        md5_h.update(chunk)
+        sha1_h.update(chunk)
+
+    return time.perf_counter() - start
+
+
+def benchmark(file_paths: list[Path], rounds: int = 3):
+    total_size = sum(file_path.stat().st_size for file_path in file_paths)
+    print(
+        f"Hashing {len(file_paths)} file(s), {total_size / 1024 / 1024:.1f} MB, "
+        f"chunk size {FILE_READ_CHUNK_SIZE // 1024} KB, best of {rounds} rounds"
+    )
+
+    readers = {
+        f"read() {LEGACY_CHUNK_SIZE // 1024} KB": read_legacy,
+        "readinto()": read_buffered,
+        "mmap": read_mmap,
+    }
+    for name, reader in readers.items():
+        elapsed = min(
+            sum(hash_file(file_path, reader) for file_path in file_paths)
+            for _ in range(rounds)
+        )
+        throughput = total_size / 1024 / 1024 / elapsed if elapsed else 0
+        print(f"  {name:<16} {elapsed:8.3f}s  {throughput:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m tools.hashing_benchmark <file> [<file> ...]")
+        sys.exit(1)
+
+    benchmark([Path(arg) for arg in sys.argv[1:]])
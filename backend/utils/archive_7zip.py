@@ -1,20 +1,76 @@
 # trunk-ignore-all(bandit/B404)
 
 import subprocess
-import tempfile
+import threading
 from collections.abc import Callable
 from pathlib import Path
 
-from config import ROMM_TMP_PATH
+from config import SCAN_HASHING_CHUNK_SIZE_MB
 from logger.logger import log
 
 SEVEN_ZIP_PATH = "/usr/bin/7zz"
-FILE_READ_CHUNK_SIZE = 1024 * 8
+FILE_READ_CHUNK_SIZE = int(SCAN_HASHING_CHUNK_SIZE_MB * 1024 * 1024)
+
+# Extraction timeout grows with the size of the member, assuming a slow disk
+EXTRACT_BASE_TIMEOUT = 60
+EXTRACT_MIN_THROUGHPUT = 10 * 1024 * 1024  # 10 MB/s
+
+
+def _get_extract_timeout(member_size: int) -> float:
+    return EXTRACT_BASE_TIMEOUT + member_size / EXTRACT_MIN_THROUGHPUT
+
+
+def _stream_file_7z(
+    file_path: Path,
+    member: str,
+    member_size: int,
+    fn_hash_update: Callable[[bytes | bytearray | memoryview], None],
+) -> bool:
+    """Extract a single member to stdout and feed it to the callback, without touching the disk."""
+    timeout = _get_extract_timeout(member_size)
+
+    process = subprocess.Popen(
+        [SEVEN_ZIP_PATH, "e", "-so", str(file_path), member],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        shell=False,  # trunk-ignore(bandit/B603): 7z path is hardcoded, args are validated
+    )
+
+    # Reads from the pipe block, so a timer kills the process if it runs for too long
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, _kill)
+    timer.start()
+    try:
+        buffer = bytearray(FILE_READ_CHUNK_SIZE)
+        view = memoryview(buffer)
+        while size := process.stdout.readinto(buffer):  # type: ignore[union-attr]
+            fn_hash_update(view[:size])
+
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        process.stdout.close()  # type: ignore[union-attr]
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(process.args, timeout)
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, process.args)
+
+    return True
 
 
 def process_file_7z(
     file_path: Path,
-    fn_hash_update: Callable[[bytes | bytearray], None],
+    fn_hash_update: Callable[[bytes | bytearray | memoryview], None],
 ) -> bool:
     """
     Process a 7zip file using the system's 7zip binary and use the provided callables to update the calculated hashes.
@@ -61,34 +117,14 @@ def process_file_7z(
         if not largest_file:
             return False
 
-        with tempfile.TemporaryDirectory(dir=ROMM_TMP_PATH) as temp_dir:
-            log.debug(f"Extracting {largest_file} from {file_path}...")
-
-            temp_path = Path(temp_dir)
-            subprocess.run(
-                [
-                    SEVEN_ZIP_PATH,
-                    "e",
-                    str(file_path),
-                    largest_file,
-                    f"-o{temp_path}",
-                    "-y",
-                ],
-                capture_output=True,
-                check=True,
-                timeout=60,
-                shell=False,  # trunk-ignore(bandit/B603): 7z path is hardcoded, args are validated
-            )
-
-            # Get the first file in temp_path
-            extracted_file = next(temp_path.iterdir(), None)
-            if extracted_file and extracted_file.exists():
-                with open(extracted_file, "rb") as f:
-                    while chunk := f.read(FILE_READ_CHUNK_SIZE):
-                        fn_hash_update(chunk)
-
-                return True
-            return False
+        log.debug(f"Streaming {largest_file} from {file_path}...")
+
+        return _stream_file_7z(
+            file_path=file_path,
+            member=largest_file,
+            member_size=largest_size,
+            fn_hash_update=fn_hash_update,
+        )
 
     except (
         subprocess.TimeoutExpired,
@@ -1,13 +1,45 @@
+import contextlib
+import functools
 import hashlib
 import json
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextvars import ContextVar
 from itertools import batched
 from pathlib import Path
+from typing import Any, Final, ParamSpec, TypeVar
 
 from anyio import open_file
 from redis.asyncio import Redis as AsyncRedis
 
+from config import (
+    PROVIDER_CACHE_ENABLED,
+    PROVIDER_CACHE_MAX_ENTRIES,
+    PROVIDER_CACHE_MAX_ENTRY_SIZE_KB,
+    PROVIDER_CACHE_TTL_HOURS,
+    SCAN_MISS_CACHE_ENABLED,
+    SCAN_MISS_CACHE_TTL_HOURS,
+)
+from handler.redis_handler import async_cache
 from logger.logger import log
 
+P = ParamSpec("P")
+R = TypeVar("R")
+
+PROVIDER_CACHE_KEY: Final = "romm:provider_cache"
+PROVIDER_CACHE_STATS_KEY: Final = f"{PROVIDER_CACHE_KEY}:stats"
+SCAN_MISS_CACHE_KEY: Final = "romm:scan_misses"
+
+_bypass_provider_cache: ContextVar[bool] = ContextVar(
+    "bypass_provider_cache", default=False
+)
+
+# Providers whose data changes often are cached for less time
+PROVIDER_CACHE_TTL_HOURS_OVERRIDES: Final = {
+    "hasheous": 24,
+    "hltb": 24,
+}
+
 
 async def conditionally_set_cache(cache: AsyncRedis, key: str, file_path: Path) -> None:
     """Set the content of a JSON file to the cache, if it does not already exist or is outdated.
@@ -49,3 +81,193 @@ async def conditionally_set_cache(cache: AsyncRedis, key: str, file_path: Path)
     except Exception as e:
         # Log the error but don't fail - this allows migrations to run even if Redis is not available
         log.warning(f"Failed to initialize cache for {key}: {e}")
+
+
+def _decode(value: str | bytes) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def get_provider_cache_ttl(provider: str) -> int:
+    """Time to live of the cached responses of a provider, in seconds."""
+    ttl_hours = min(
+        PROVIDER_CACHE_TTL_HOURS_OVERRIDES.get(provider, PROVIDER_CACHE_TTL_HOURS),
+        PROVIDER_CACHE_TTL_HOURS,
+    )
+    return ttl_hours * 60 * 60
+
+
+def get_provider_cache_digest(*args: Any, **kwargs: Any) -> str:
+    """Stable digest of the arguments of a request, used as the cache entry name."""
+    request = json.dumps([args, kwargs], sort_keys=True, default=str)
+    return hashlib.sha1(request.encode(), usedforsecurity=False).hexdigest()
+
+
+async def get_provider_response(
+    cache: AsyncRedis, provider: str, digest: str
+) -> Any | None:
+    """Get a cached provider response, marking it as recently used."""
+    value = await cache.get(f"{PROVIDER_CACHE_KEY}:{provider}:{digest}")
+    if value is None:
+        await cache.hincrby(PROVIDER_CACHE_STATS_KEY, f"{provider}:misses", 1)
+        return None
+
+    async with cache.pipeline() as pipe:
+        await pipe.zadd(f"{PROVIDER_CACHE_KEY}:{provider}:lru", {digest: time.time()})
+        await pipe.hincrby(PROVIDER_CACHE_STATS_KEY, f"{provider}:hits", 1)
+        await pipe.execute()
+
+    return json.loads(value)
+
+
+async def set_provider_response(
+    cache: AsyncRedis, provider: str, digest: str, response: Any
+) -> None:
+    """Cache a provider response, evicting the least recently used ones over the limit."""
+    value = json.dumps(response)
+    if len(value) > PROVIDER_CACHE_MAX_ENTRY_SIZE_KB * 1024:
+        log.debug(f"Response from {provider} too large to be cached")
+        return
+
+    ttl = get_provider_cache_ttl(provider)
+    lru_key = f"{PROVIDER_CACHE_KEY}:{provider}:lru"
+    now = time.time()
+
+    async with cache.pipeline() as pipe:
+        await pipe.set(f"{PROVIDER_CACHE_KEY}:{provider}:{digest}", value, ex=ttl)
+        await pipe.zadd(lru_key, {digest: now})
+        # Entries not used for longer than the TTL have already expired
+        await pipe.zremrangebyscore(lru_key, "-inf", now - ttl)
+        await pipe.zcard(lru_key)
+        *_, entries_count = await pipe.execute()
+
+    if entries_count > PROVIDER_CACHE_MAX_ENTRIES:
+        evicted = await cache.zpopmin(
+            lru_key, entries_count - PROVIDER_CACHE_MAX_ENTRIES
+        )
+        if evicted:
+            await cache.delete(
+                *(
+                    f"{PROVIDER_CACHE_KEY}:{provider}:{_decode(member)}"
+                    for member, _ in evicted
+                )
+            )
+
+
+async def get_provider_cache_stats(cache: AsyncRedis) -> dict[str, int]:
+    """Hit and miss counters of the provider responses cache, by provider."""
+    stats = await cache.hgetall(PROVIDER_CACHE_STATS_KEY)
+    return {_decode(key): int(value) for key, value in stats.items()}
+
+
+async def clear_provider_cache(cache: AsyncRedis, provider: str | None = None) -> int:
+    """Remove the cached responses of a provider, or of all providers.
+
+    Returns the number of responses removed.
+    """
+    pattern = f"{PROVIDER_CACHE_KEY}:{provider or '*'}:*"
+    keys = [key async for key in cache.scan_iter(match=pattern, count=1000)]
+    for keys_batch in batched(keys, 1000, strict=False):
+        await cache.delete(*keys_batch)
+    return sum(1 for key in keys if not _decode(key).endswith(":lru"))
+
+
+def get_scan_miss_digest(
+    search_term: str, platform_id: int, hashes: list[str | None]
+) -> str:
+    """Stable digest of the inputs providers are queried with for a ROM."""
+    return get_provider_cache_digest(
+        search_term, platform_id, [value.lower() if value else None for value in hashes]
+    )
+
+
+async def get_scan_misses(
+    cache: AsyncRedis, providers: list[str], digest: str
+) -> set[str]:
+    """Providers that recently found nothing for the same ROM inputs."""
+    if not SCAN_MISS_CACHE_ENABLED or not providers:
+        return set()
+
+    values = await cache.mget(
+        [f"{SCAN_MISS_CACHE_KEY}:{provider}:{digest}" for provider in providers]
+    )
+    return {provider for provider, value in zip(providers, values) if value}
+
+
+async def set_scan_misses(cache: AsyncRedis, providers: list[str], digest: str) -> None:
+    """Remember that providers found nothing for the given ROM inputs."""
+    if not SCAN_MISS_CACHE_ENABLED or not providers:
+        return
+
+    async with cache.pipeline() as pipe:
+        for provider in providers:
+            await pipe.set(
+                f"{SCAN_MISS_CACHE_KEY}:{provider}:{digest}",
+                1,
+                ex=SCAN_MISS_CACHE_TTL_HOURS * 60 * 60,
+            )
+        await pipe.execute()
+
+
+async def clear_scan_misses(cache: AsyncRedis, provider: str | None = None) -> int:
+    """Forget the misses of a provider, or of all providers.
+
+    Returns the number of misses removed.
+    """
+    pattern = f"{SCAN_MISS_CACHE_KEY}:{provider or '*'}:*"
+    keys = [key async for key in cache.scan_iter(match=pattern, count=1000)]
+    for keys_batch in batched(keys, 1000, strict=False):
+        await cache.delete(*keys_batch)
+    return len(keys)
+
+
+@contextlib.contextmanager
+def bypass_provider_cache() -> Iterator[None]:
+    """Always hit the network for the provider requests made in this context."""
+    token = _bypass_provider_cache.set(True)
+    try:
+        yield
+    finally:
+        _bypass_provider_cache.reset(token)
+
+
+def cached_provider_response(
+    provider: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Cache the responses of a provider request method in Redis.
+
+    The cache entry is keyed by the arguments of the request, so the decorated
+    method must be deterministic for a given set of arguments. Empty responses
+    aren't cached, as they are also returned when requests fail.
+    """
+
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not PROVIDER_CACHE_ENABLED or _bypass_provider_cache.get():
+                return await func(*args, **kwargs)
+
+            # Skip the instance the method is bound to
+            digest = get_provider_cache_digest(*args[1:], **kwargs)
+            try:
+                cached_response = await get_provider_response(
+                    async_cache, provider, digest
+                )
+            except Exception as e:
+                log.warning(f"Failed to read cached {provider} response: {e}")
+                cached_response = None
+
+            if cached_response is not None:
+                return cached_response
+
+            response = await func(*args, **kwargs)
+            if response:
+                try:
+                    await set_provider_response(async_cache, provider, digest, response)
+                except Exception as e:
+                    log.warning(f"Failed to cache {provider} response: {e}")
+
+            return response
+
+        return wrapper
+
+    return decorator
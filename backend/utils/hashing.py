@@ -1,2 +1,297 @@
+import binascii
+import bz2
+import hashlib
+import mmap
+import os
+import tarfile
+import zipfile
+import zlib
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import IO, Any, Literal, TypedDict
+
+import magic
+import zipfile_inflate64  # trunk-ignore(ruff/F401): Patches zipfile to support Enhanced Deflate
+
+from config import SCAN_HASHING_CHUNK_SIZE_MB, SCAN_HASHING_USE_MMAP
+from utils.archive_7zip import process_file_7z
+
+FILE_READ_CHUNK_SIZE = int(SCAN_HASHING_CHUNK_SIZE_MB * 1024 * 1024)
+
+DEFAULT_CRC_C = 0
+DEFAULT_MD5_H_DIGEST = hashlib.md5(usedforsecurity=False).digest()
+DEFAULT_SHA1_H_DIGEST = hashlib.sha1(usedforsecurity=False).digest()
+
+
+class FileHash(TypedDict):
+    crc_hash: str
+    md5_hash: str
+    sha1_hash: str
+
+
 def crc32_to_hex(value: int) -> str:
     return (value & 0xFFFFFFFF).to_bytes(4, byteorder="big").hex()
+
+
+def read_chunks(
+    f: IO[bytes], chunk_size: int = FILE_READ_CHUNK_SIZE
+) -> Iterator[memoryview]:
+    """Read a file object in chunks, reusing a single buffer.
+
+    The yielded views are only valid until the next chunk is read.
+    """
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    while size := f.readinto(buffer):  # type: ignore[attr-defined]
+        yield view[:size]
+
+
+def read_mmap_file(
+    file_path: os.PathLike[str], chunk_size: int = FILE_READ_CHUNK_SIZE
+) -> Iterator[memoryview]:
+    """Read a file in chunks by mapping it into memory, avoiding buffer copies."""
+    with open(file_path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and some filesystems can't be mapped
+            yield from read_chunks(f, chunk_size)  # type: ignore[misc]
+            return
+
+        with mm, memoryview(mm) as view:
+            for offset in range(0, len(view), chunk_size):
+                with view[offset : offset + chunk_size] as chunk:
+                    yield chunk
+
+
+def read_basic_file(
+    file_path: os.PathLike[str],
+    chunk_size: int = FILE_READ_CHUNK_SIZE,
+    use_mmap: bool = SCAN_HASHING_USE_MMAP,
+) -> Iterator[bytes | memoryview]:
+    if use_mmap:
+        yield from read_mmap_file(file_path, chunk_size)
+        return
+
+    with open(file_path, "rb", buffering=0) as f:
+        yield from read_chunks(f, chunk_size)
+
+
+def read_zip_file(
+    file: str | os.PathLike[str] | IO[bytes],
+) -> Iterator[bytes | memoryview]:
+    try:
+        with zipfile.ZipFile(file, "r") as z:
+            # Find the biggest file in the archive
+            largest_file = max(z.infolist(), key=lambda x: x.file_size)
+            with z.open(largest_file, "r") as f:
+                yield from read_chunks(f)
+    except zipfile.BadZipFile:
+        if isinstance(file, Path):
+            for chunk in read_basic_file(file):
+                yield chunk
+
+
+def read_tar_file(
+    file_path: Path, mode: Literal["r", "r:*", "r:", "r:gz", "r:bz2", "r:xz"] = "r"
+) -> Iterator[bytes | memoryview]:
+    try:
+        with tarfile.open(file_path, mode) as f:
+            regular_files = [member for member in f.getmembers() if member.isfile()]
+
+            # Find the largest file among regular files only
+            largest_file = max(regular_files, key=lambda x: x.size)
+            with f.extractfile(largest_file) as ef:  # type: ignore
+                yield from read_chunks(ef)
+    except tarfile.ReadError:
+        for chunk in read_basic_file(file_path):
+            yield chunk
+
+
+def read_gz_file(file_path: Path) -> Iterator[bytes | memoryview]:
+    return read_tar_file(file_path, "r:gz")
+
+
+def process_7z_file(
+    file_path: Path,
+    fn_hash_update: Callable[[bytes | bytearray | memoryview], None],
+    fn_hash_reset: Callable[[], None],
+) -> None:
+    processed = process_file_7z(
+        file_path=file_path,
+        fn_hash_update=fn_hash_update,
+    )
+    if not processed:
+        # Part of the member may have been hashed before the extraction failed
+        fn_hash_reset()
+        for chunk in read_basic_file(file_path):
+            fn_hash_update(chunk)
+
+
+def read_bz2_file(file_path: Path) -> Iterator[bytes | memoryview]:
+    try:
+        with bz2.BZ2File(file_path, "rb") as f:
+            yield from read_chunks(f)
+    except EOFError:
+        for chunk in read_basic_file(file_path):
+            yield chunk
+
+
+def build_file_hash(crc_c: int, md5_h: Any, sha1_h: Any) -> FileHash:
+    return FileHash(
+        crc_hash=crc32_to_hex(crc_c) if crc_c != DEFAULT_CRC_C else "",
+        md5_hash=(md5_h.hexdigest() if md5_h.digest() != DEFAULT_MD5_H_DIGEST else ""),
+        sha1_hash=(
+            sha1_h.hexdigest() if sha1_h.digest() != DEFAULT_SHA1_H_DIGEST else ""
+        ),
+    )
+
+
+def read_file_content(
+    file_path: Path,
+    fn_hash_update: Callable[[bytes | bytearray | memoryview], None],
+    fn_hash_reset: Callable[[], None],
+) -> None:
+    """Feed the content of a file to the callback, decompressing it if needed.
+
+    The reset callback is called to discard what was fed so far when the file
+    has to be read again from the start.
+    """
+    extension = Path(file_path).suffix.lower()
+    mime = magic.Magic(mime=True)
+    file_type = mime.from_file(file_path)
+
+    if extension == ".zip" or file_type == "application/zip":
+        for chunk in read_zip_file(file_path):
+            fn_hash_update(chunk)
+
+    elif extension == ".tar" or file_type == "application/x-tar":
+        for chunk in read_tar_file(file_path):
+            fn_hash_update(chunk)
+
+    elif extension == ".gz" or file_type == "application/x-gzip":
+        for chunk in read_gz_file(file_path):
+            fn_hash_update(chunk)
+
+    elif extension == ".7z" or file_type == "application/x-7z-compressed":
+        process_7z_file(
+            file_path=file_path,
+            fn_hash_update=fn_hash_update,
+            fn_hash_reset=fn_hash_reset,
+        )
+
+    elif extension == ".bz2" or file_type == "application/x-bzip2":
+        for chunk in read_bz2_file(file_path):
+            fn_hash_update(chunk)
+
+    else:
+        for chunk in read_basic_file(file_path):
+            fn_hash_update(chunk)
+
+
+def calculate_file_hashes(
+    file_path: Path,
+    rom_crc_c: int,
+    rom_md5_h: Any,
+    rom_sha1_h: Any,
+) -> tuple[int, int, Any, Any, Any, Any]:
+    """Hash a single file, also feeding its content to the rom aggregate hashes."""
+    crc_c = 0
+    md5_h = hashlib.md5(usedforsecurity=False)
+    sha1_h = hashlib.sha1(usedforsecurity=False)
+
+    def update_hashes(chunk: bytes | bytearray | memoryview):
+        md5_h.update(chunk)
+        rom_md5_h.update(chunk)
+
+        sha1_h.update(chunk)
+        rom_sha1_h.update(chunk)
+
+        nonlocal crc_c
+        crc_c = binascii.crc32(chunk, crc_c)
+        nonlocal rom_crc_c
+        rom_crc_c = binascii.crc32(chunk, rom_crc_c)
+
+    initial_rom_hashes = (rom_crc_c, rom_md5_h.copy(), rom_sha1_h.copy())
+
+    def reset_hashes():
+        nonlocal crc_c, md5_h, sha1_h
+        crc_c = 0
+        md5_h = hashlib.md5(usedforsecurity=False)
+        sha1_h = hashlib.sha1(usedforsecurity=False)
+
+        nonlocal rom_crc_c, rom_md5_h, rom_sha1_h
+        rom_crc_c = initial_rom_hashes[0]
+        rom_md5_h = initial_rom_hashes[1].copy()
+        rom_sha1_h = initial_rom_hashes[2].copy()
+
+    try:
+        read_file_content(file_path, update_hashes, reset_hashes)
+        return crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h
+    except (FileNotFoundError, PermissionError):
+        return (
+            0,
+            rom_crc_c,
+            hashlib.md5(usedforsecurity=False),
+            rom_md5_h,
+            hashlib.sha1(usedforsecurity=False),
+            rom_sha1_h,
+        )
+
+
+def calculate_single_file_hash(file_path: Path) -> FileHash:
+    """Hash a single file, without keeping any aggregate hashes."""
+    crc_c = 0
+    md5_h = hashlib.md5(usedforsecurity=False)
+    sha1_h = hashlib.sha1(usedforsecurity=False)
+
+    def update_hashes(chunk: bytes | bytearray | memoryview):
+        md5_h.update(chunk)
+        sha1_h.update(chunk)
+
+        nonlocal crc_c
+        crc_c = binascii.crc32(chunk, crc_c)
+
+    def reset_hashes():
+        nonlocal crc_c, md5_h, sha1_h
+        crc_c = 0
+        md5_h = hashlib.md5(usedforsecurity=False)
+        sha1_h = hashlib.sha1(usedforsecurity=False)
+
+    try:
+        read_file_content(file_path, update_hashes, reset_hashes)
+    except (FileNotFoundError, PermissionError, zlib.error):
+        return FileHash(crc_hash="", md5_hash="", sha1_hash="")
+
+    return build_file_hash(crc_c, md5_h, sha1_h)
+
+
+def calculate_files_hashes(file_paths: list[Path]) -> tuple[list[FileHash], FileHash]:
+    """Hash all the files of a rom, in order.
+
+    Meant to be run in a worker process, so only picklable values are returned:
+    the hashes of each file, and the aggregate hashes of the whole rom.
+    """
+    # The aggregate hashes of a single file rom are the same as the file ones
+    if len(file_paths) == 1:
+        file_hash = calculate_single_file_hash(file_paths[0])
+        return [file_hash], file_hash
+
+    rom_crc_c = 0
+    rom_md5_h = hashlib.md5(usedforsecurity=False)
+    rom_sha1_h = hashlib.sha1(usedforsecurity=False)
+
+    file_hashes: list[FileHash] = []
+    for file_path in file_paths:
+        try:
+            crc_c, rom_crc_c, md5_h, rom_md5_h, sha1_h, rom_sha1_h = (
+                calculate_file_hashes(file_path, rom_crc_c, rom_md5_h, rom_sha1_h)
+            )
+        except zlib.error:
+            crc_c = 0
+            md5_h = hashlib.md5(usedforsecurity=False)
+            sha1_h = hashlib.sha1(usedforsecurity=False)
+
+        file_hashes.append(build_file_hash(crc_c, md5_h, sha1_h))
+
+    return file_hashes, build_file_hash(rom_crc_c, rom_md5_h, rom_sha1_h)
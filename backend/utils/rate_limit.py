@@ -0,0 +1,203 @@
+import asyncio
+import json
+import math
+import time
+from collections.abc import Mapping
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Final, NamedTuple
+
+from fastapi import HTTPException, status
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import WatchError
+
+from config import PROVIDER_RATE_LIMIT_ENABLED, PROVIDER_RATE_LIMIT_MAX_WAIT_SECONDS
+from logger.logger import log
+
+RATE_LIMIT_KEY: Final = "romm:rate_limit"
+
+# Backoff used when a provider throttles requests without a Retry-After header,
+# doubled every time it keeps throttling
+RATE_LIMIT_BACKOFF_SECONDS: Final = 2
+RATE_LIMIT_MAX_BACKOFF_SECONDS: Final = 60
+
+# Budgets overridden at runtime, like the ones of a ScreenScraper account
+RATE_LIMIT_OVERRIDE_TTL_SECONDS: Final = 24 * 60 * 60
+
+
+class ProviderRateLimitedException(HTTPException):
+    """Raised when a provider can't be requested without going over its budget,
+    or throttled the request.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limited by {provider}, try again later",
+        )
+
+
+class RateLimit(NamedTuple):
+    requests: int  # Requests allowed per period
+    period: float  # In seconds
+    burst: int = 1  # Requests allowed at once, when no request was made recently
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.requests
+
+
+PROVIDER_RATE_LIMITS: Final = {
+    "igdb": RateLimit(requests=4, period=1, burst=4),
+    # Budget of anonymous accounts, replaced by the one of the user account
+    "screenscraper": RateLimit(requests=60, period=60, burst=1),
+    "mobygames": RateLimit(requests=1, period=1),
+    "hasheous": RateLimit(requests=2, period=1, burst=2),
+    "hltb": RateLimit(requests=1, period=1),
+    "flashpoint": RateLimit(requests=2, period=1, burst=2),
+}
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header, in seconds or HTTP date form."""
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0)
+
+
+async def get_rate_limit(cache: AsyncRedis, provider: str) -> RateLimit | None:
+    """Budget of a provider, or None if its requests aren't limited."""
+    override = await cache.get(f"{RATE_LIMIT_KEY}:{provider}:budget")
+    if override:
+        return RateLimit(*json.loads(override))
+    return PROVIDER_RATE_LIMITS.get(provider)
+
+
+async def set_rate_limit(
+    cache: AsyncRedis, provider: str, rate_limit: RateLimit
+) -> None:
+    """Override the budget of a provider, for all the workers."""
+    await cache.set(
+        f"{RATE_LIMIT_KEY}:{provider}:budget",
+        json.dumps(rate_limit),
+        ex=RATE_LIMIT_OVERRIDE_TTL_SECONDS,
+    )
+
+
+def _expiry_ms(seconds: float) -> int:
+    return max(math.ceil(seconds * 1000), 1)
+
+
+async def acquire_rate_limit(
+    cache: AsyncRedis,
+    provider: str,
+    max_wait: float = PROVIDER_RATE_LIMIT_MAX_WAIT_SECONDS,
+) -> bool:
+    """Wait until a request can be made to a provider without going over its budget.
+
+    Implements a token bucket shared by all workers, stored as the time the
+    bucket will be full again (GCRA). Returns False, without using any token,
+    if the provider can't be requested within `max_wait` seconds.
+    """
+    if not PROVIDER_RATE_LIMIT_ENABLED:
+        return True
+
+    rate_limit = await get_rate_limit(cache, provider)
+    if not rate_limit:
+        return True
+
+    key = f"{RATE_LIMIT_KEY}:{provider}"
+    burst_offset = (rate_limit.burst - 1) * rate_limit.interval
+
+    async with cache.pipeline() as pipe:
+        while True:
+            try:
+                await pipe.watch(key)
+                now = time.time()
+                full_at = max(float(await pipe.get(key) or 0), now)
+                wait = max(full_at - burst_offset - now, 0)
+                if wait > max_wait:
+                    await pipe.reset()
+                    return False
+
+                full_at += rate_limit.interval
+                pipe.multi()
+                await pipe.set(key, full_at, px=_expiry_ms(full_at - now))
+                await pipe.execute()
+                break
+            except WatchError:
+                # Another worker took a token in the meantime
+                continue
+
+    if wait:
+        await asyncio.sleep(wait)
+    return True
+
+
+async def block_rate_limit(cache: AsyncRedis, provider: str, seconds: float) -> None:
+    """Don't make any request to a provider for the given number of seconds."""
+    rate_limit = await get_rate_limit(cache, provider) or RateLimit(1, 1)
+    key = f"{RATE_LIMIT_KEY}:{provider}"
+    burst_offset = (rate_limit.burst - 1) * rate_limit.interval
+
+    async with cache.pipeline() as pipe:
+        while True:
+            try:
+                await pipe.watch(key)
+                now = time.time()
+                # Requests resume one at a time, without a burst
+                full_at = max(
+                    float(await pipe.get(key) or 0), now + seconds + burst_offset
+                )
+                pipe.multi()
+                await pipe.set(key, full_at, px=_expiry_ms(full_at - now))
+                await pipe.execute()
+                break
+            except WatchError:
+                continue
+
+
+async def backoff_rate_limit(
+    cache: AsyncRedis, provider: str, headers: Mapping[str, str] | None = None
+) -> float:
+    """Slow down the requests to a provider after it throttled one.
+
+    The Retry-After header of the response is honoured when the provider sends
+    one, otherwise the backoff doubles while the provider keeps throttling
+    requests. Returns the number of seconds requests are paused for.
+    """
+    seconds = parse_retry_after(headers.get("Retry-After") if headers else None)
+
+    if not PROVIDER_RATE_LIMIT_ENABLED:
+        seconds = RATE_LIMIT_BACKOFF_SECONDS if seconds is None else seconds
+        await asyncio.sleep(seconds)
+        return seconds
+
+    if seconds is None:
+        backoff_key = f"{RATE_LIMIT_KEY}:{provider}:backoff"
+        async with cache.pipeline() as pipe:
+            await pipe.incr(backoff_key)
+            await pipe.expire(backoff_key, RATE_LIMIT_MAX_BACKOFF_SECONDS * 2)
+            strikes, _ = await pipe.execute()
+        seconds = min(
+            RATE_LIMIT_BACKOFF_SECONDS * 2 ** (strikes - 1),
+            RATE_LIMIT_MAX_BACKOFF_SECONDS,
+        )
+
+    log.warning(f"Rate limited by {provider}, pausing requests for {seconds:.1f}s")
+    await block_rate_limit(cache, provider, seconds)
+    return seconds
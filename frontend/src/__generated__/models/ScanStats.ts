@@ -13,5 +13,6 @@ export type ScanStats = {
     identified_roms: number;
     scanned_firmware: number;
     added_firmware: number;
+    unavailable_sources: Array<string>;
 };
 
@@ -9,5 +9,6 @@ export type StatsReturn = {
     STATES: number;
     SCREENSHOTS: number;
     TOTAL_FILESIZE_BYTES: number;
+    PROVIDER_CACHE: Record<string, number>;
 };
 